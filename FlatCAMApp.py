@@ -29,11 +29,16 @@ from FlatCAMShell import FCShell
 from FlatCAMDraw import FlatCAMDraw
 from FlatCAMProcess import *
 from FlatCAMWorkerStack import WorkerStack
-from multiprocessing import Pool
+from multiprocessing import Pool, resource_tracker
 
 from fcCamlib.gerber import Gerber, GerberParseError
 from fcCamlib.cncjob import CNCjob
+from fcCamlib.drillorder import DrillOrder
 from fcCamlib.excellon import Excellon
+from fcCamlib.geometry import Geometry
+from fcCamlib.fabset import detect_kind, parse_params, parse_layer
+from fcCamlib.parsecache import ParseCache
+from fcCamlib.parsestats import ParseStats
 from fcTools.MeasurementTool import Measurement
 from fcTools.DblSidedTool import DblSidedTool
 
@@ -200,7 +205,10 @@ class App(QObject):
         os.chdir(self.app_home)
 
         # Create multiprocessing pool
-        self.pool = Pool()
+        self.pool = self.new_pool()
+
+        # Cache of parsed Gerber and Excellon files
+        self.parse_cache = ParseCache(self.data_path + '/cache')
 
         ####################
         ## Initialize GUI ##
@@ -269,6 +277,7 @@ class App(QObject):
             "excellon_spindlespeed": self.defaults_form.excellon_group.spindlespeed_entry,
             "excellon_toolchangez": self.defaults_form.excellon_group.toolchangez_entry,
             "excellon_tooldia": self.defaults_form.excellon_group.tooldia_entry,
+            "excellon_drillorder": self.defaults_form.excellon_group.drillorder_radio,
             "geometry_plot": self.defaults_form.geometry_group.plot_cb,
             "geometry_cutz": self.defaults_form.geometry_group.cutz_entry,
             "geometry_travelz": self.defaults_form.geometry_group.travelz_entry,
@@ -317,6 +326,7 @@ class App(QObject):
             "excellon_spindlespeed": None,
             "excellon_toolchangez": 1.0,
             "excellon_tooldia": 0.016,
+            "excellon_drillorder": "file",
             "geometry_plot": True,
             "geometry_cutz": -0.002,
             "geometry_travelz": 0.1,
@@ -358,8 +368,13 @@ class App(QObject):
             "point_clipboard_format": "(%.4f, %.4f)",
             "zdownrate": None,
             "excellon_zeros": "L",
-            "gerber_use_buffer_for_union": True,
-            "cncjob_coordinate_format": "X%.4fY%.4f"
+            "gerber_use_buffer_for_union": True,  # True, False or "parallel"
+            "cncjob_coordinate_format": "X%.4fY%.4f",
+            "parsecache_enabled": True,
+            "parsecache_size": 256,             # MB
+            "parsestats_enabled": False,        # Instrument the Gerber/Excellon parsers.
+            "arc_tolerance": 0.0001,            # Inches. Max. chordal error of arcs.
+            "drillorder_time_budget": 1.0       # Seconds per tool to optimize the drill order.
         })
 
         ###############################
@@ -413,6 +428,7 @@ class App(QObject):
             "excellon_spindlespeed": self.options_form.excellon_group.spindlespeed_entry,
             "excellon_toolchangez": self.options_form.excellon_group.toolchangez_entry,
             "excellon_tooldia": self.options_form.excellon_group.tooldia_entry,
+            "excellon_drillorder": self.options_form.excellon_group.drillorder_radio,
             "geometry_plot": self.options_form.geometry_group.plot_cb,
             "geometry_cutz": self.options_form.geometry_group.cutz_entry,
             "geometry_travelz": self.options_form.geometry_group.travelz_entry,
@@ -458,6 +474,7 @@ class App(QObject):
             "excellon_spindlespeed": None,
             "excellon_toolchangez": 1.0,
             "excellon_tooldia": 0.016,
+            "excellon_drillorder": "file",
             "geometry_plot": True,
             "geometry_cutz": -0.002,
             "geometry_travelz": 0.1,
@@ -518,6 +535,7 @@ class App(QObject):
         self.ui.menufilenew.triggered.connect(self.on_file_new)
         self.ui.menufileopengerber.triggered.connect(self.on_fileopengerber)
         self.ui.menufileopenexcellon.triggered.connect(self.on_fileopenexcellon)
+        self.ui.menufileopenfabset.triggered.connect(self.on_fileopenfabset)
         self.ui.menufileopengcode.triggered.connect(self.on_fileopengcode)
         self.ui.menufileopenproject.triggered.connect(self.on_file_openproject)
         self.ui.menufileimportsvg.triggered.connect(self.on_file_importsvg)
@@ -697,9 +715,23 @@ class App(QObject):
         # Send to worker
         self.worker_task.emit({'fcn': worker_task, 'params': [self]})
 
+    @staticmethod
+    def new_pool():
+        """
+        Creates the multiprocessing pool. The resource tracker is
+        started first so the workers share it, and shared memory
+        blocks opened by the workers stay registered to this process
+        only once (see ``fcCamlib.isolation.parallel_buffers()``).
+
+        :return: multiprocessing.Pool
+        """
+        if os.name == 'posix':
+            resource_tracker.ensure_running()
+        return Pool()
+
     def clear_pool(self):
         self.pool.close()
-        self.pool = Pool()
+        self.pool = self.new_pool()
 
         self.pool_recreated.emit(self.pool)
 
@@ -1792,6 +1824,30 @@ class App(QObject):
             "Excellon Files (*.drl *.txt *.xln *.drd *.tap *.exc)",
             self.open_excellon)
 
+    def on_fileopenfabset(self):
+        """
+        File menu callback for opening several Gerber and Excellon
+        files at once.
+
+        :return: None
+        """
+
+        self.report_usage("on_fileopenfabset")
+        App.log.debug("on_fileopenfabset()")
+
+        try:
+            filenames, _ = QFileDialog.getOpenFileNames(caption="Open Fabrication Set",
+                                                        directory=self.get_last_folder(),
+                                                        filter="All Files (*.*)")
+        except TypeError:
+            filenames, _ = QFileDialog.getOpenFileNames(caption="Open Fabrication Set",
+                                                        filter="All Files (*.*)")
+
+        if len(filenames) == 0:
+            self.inform.emit("Open cancelled.")
+        else:
+            self.worker_task.emit({'fcn': self.open_fabrication_set, 'params': [[str(f) for f in filenames]]})
+
     def on_fileopengcode(self):
         """
         File menu call back for opening gcode.
@@ -2065,6 +2121,27 @@ class App(QObject):
             # GUI feedback
             self.inform.emit("Opened: " + filename)
 
+    def parse_gerber(self, gerber_obj, filename, follow=False):
+        """
+        Populates a Gerber object from a file, through the parse cache.
+
+        :param gerber_obj: Gerber to populate.
+        :param filename: Gerber file filename
+        :type filename: str
+        :param follow: See ``Gerber.parse_file()``.
+        :type follow: bool
+        :return: True if loaded from the cache, False if parsed.
+        :rtype: bool
+        """
+        key = self.parse_cache.key(filename, "gerber",
+                                   steps_per_circle=gerber_obj.steps_per_circ,
+                                   use_buffer_for_union=gerber_obj.use_buffer_for_union,
+                                   units=gerber_obj.units,
+                                   arc_tolerance=gerber_obj.arc_tolerance(),
+                                   follow=follow)
+        return self.parse_cache.load_or_parse(key, gerber_obj,
+                                              lambda: gerber_obj.parse_file(filename, follow=follow))
+
     def open_gerber(self, filename, follow=False, outname=None):
         """
         Opens a Gerber file, parses it and creates a new object for
@@ -2087,7 +2164,7 @@ class App(QObject):
             # Opening the file happens here
             self.progress.emit(30)
             try:
-                gerber_obj.parse_file(filename, follow=follow)
+                self.parse_gerber(gerber_obj, filename, follow=follow)
 
             except IOError:
                 app_obj.inform.emit("[error] Failed to open file: " + filename)
@@ -2154,7 +2231,15 @@ class App(QObject):
             #self.progress.emit(20)
 
             try:
-                excellon_obj.parse_file(filename)
+                key = self.parse_cache.key(filename, "excellon",
+                                           zeros=excellon_obj.zeros,
+                                           units=excellon_obj.units)
+
+                def parse():
+                    excellon_obj.parse_file(filename)
+                    excellon_obj.create_geometry()
+
+                self.parse_cache.load_or_parse(key, excellon_obj, parse)
 
             except IOError:
                 app_obj.inform.emit("[error] Cannot open file: " + filename)
@@ -2167,15 +2252,6 @@ class App(QObject):
                 app_obj.inform.emit(msg)
                 raise
 
-            try:
-                excellon_obj.create_geometry()
-
-            except:
-                msg = "[error] An internal error has ocurred. See shell.\n"
-                msg += traceback.format_exc()
-                app_obj.inform.emit(msg)
-                raise
-
             if excellon_obj.is_empty():
                 app_obj.inform.emit("[error] No geometry found in file: " + filename)
                 self.collection.set_active(excellon_obj.options["name"])
@@ -2196,6 +2272,81 @@ class App(QObject):
             self.inform.emit("Opened: " + filename)
             #self.progress.emit(100)
 
+    def open_fabrication_set(self, filenames):
+        """
+        Opens a set of Gerber and Excellon files, i.e. all the layers
+        of a board, parsing them at the same time in ``self.pool``.
+        The kind of each file is detected from its contents. Each
+        object is created as soon as its file is parsed, so the whole
+        set takes about as long as the slowest file. Files in the
+        parse cache are not parsed again. Thread-safe.
+
+        :param filenames: Paths to the files.
+        :type filenames: list
+        :return: Names of the objects created.
+        :rtype: list
+        """
+
+        App.log.debug("open_fabrication_set()")
+
+        created = []
+
+        def register(filename, kind, data):
+            def obj_init(obj, app_obj):
+                ParseCache.loads(data, obj)
+                if obj.is_empty():
+                    app_obj.inform.emit("[error] No geometry found in file: " + filename)
+
+            name = filename.split('/')[-1].split('\\')[-1]
+            obj = self.new_object(kind, name, obj_init)
+            created.append(obj.options["name"])
+            self.file_opened.emit(kind, filename)
+
+        with self.proc_container.new("Opening fabrication set"):
+
+            jobs = []
+            keys = {}
+            for filename in filenames:
+                kind = detect_kind(filename)
+                if kind is None:
+                    self.inform.emit("[warning] Not a Gerber or Excellon file: " + filename)
+                    continue
+
+                params = parse_params(kind, self.options["units"])
+                try:
+                    keys[filename] = self.parse_cache.key(filename, kind, **params)
+                except IOError:
+                    self.inform.emit("[error] Cannot open file: " + filename)
+                    continue
+
+                # Parse statistics need a real parse.
+                data = None
+                if not ParseStats.defaults["enabled"]:
+                    data = self.parse_cache.read(keys[filename])
+                if data is not None:
+                    register(filename, kind, data)
+                else:
+                    jobs.append((filename, kind, params))
+
+            self.log.debug("open_fabrication_set(): %d cached, %d to parse." %
+                           (len(filenames) - len(jobs), len(jobs)))
+
+            kinds = {filename: kind for filename, kind, _ in jobs}
+            for filename, data, error in self.pool.imap_unordered(parse_layer, jobs):
+                if data is None:
+                    self.log.error("Failed to parse %s:\n%s" % (filename, error))
+                    self.inform.emit("[error] Failed to parse file: " + filename)
+                    continue
+
+                self.parse_cache.write(keys[filename], data)
+                register(filename, kinds[filename], data)
+                self.progress.emit(int(100 * len(created) / len(filenames)))
+
+            self.progress.emit(0)
+            self.inform.emit("Opened %d of %d files." % (len(created), len(filenames)))
+
+        return created
+
     def open_gcode(self, filename, outname=None):
         """
         Opens a G-gcode file, parses it and creates a new object for
@@ -2338,12 +2489,13 @@ class App(QObject):
         self.save_defaults()
         log.debug("Application defaults saved ... Exit event.")
 
-    def propagate_defaults(self):
+    def propagate_defaults(self, silent=False):
         """
         This method is used to set default values in classes. It's
         an alternative to project options but allows the use
         of values invisible to the user.
 
+        :param silent: Do not log each parameter.
         :return: None
         """
 
@@ -2354,7 +2506,12 @@ class App(QObject):
             "zdownrate": CNCjob,
             "excellon_zeros": Excellon,
             "gerber_use_buffer_for_union": Gerber,
-            "cncjob_coordinate_format": CNCjob
+            "cncjob_coordinate_format": CNCjob,
+            "parsecache_enabled": ParseCache,
+            "parsecache_size": ParseCache,
+            "parsestats_enabled": ParseStats,
+            "arc_tolerance": Geometry,
+            "drillorder_time_budget": DrillOrder
             # "spindlespeed": CNCjob
         }
 
@@ -2362,7 +2519,8 @@ class App(QObject):
             if param in routes[param].defaults:
                 try:
                     routes[param].defaults[param] = self.defaults[param]
-                    self.log.debug("  " + param + " OK")
+                    if not silent:
+                        self.log.debug("  " + param + " OK")
                 except KeyError:
                     self.log.debug("  ERROR: " + param + " not in defaults.")
             else:
@@ -2372,7 +2530,8 @@ class App(QObject):
                     p = param[len(routes[param].__name__) + 1:]
                     if p in routes[param].defaults:
                         routes[param].defaults[p] = self.defaults[param]
-                        self.log.debug("  " + param + " OK!")
+                        if not silent:
+                            self.log.debug("  " + param + " OK!")
 
     def restore_main_win_geom(self):
         try:
@@ -254,6 +254,11 @@ class FCArc(FCShapeTool):
 
         self.steps_per_circ = 55
 
+        # Max. chordal error, in the units of the project.
+        self.tolerance = Geometry.defaults["arc_tolerance"]
+        if self.tolerance and draw_app.app.options["units"].upper() == "MM":
+            self.tolerance *= 25.4
+
     def click(self, point):
         self.points.append(point)
 
@@ -302,7 +307,7 @@ class FCArc(FCShapeTool):
                 stopangle = arctan2(p2[1] - center[1], p2[0] - center[0])
 
                 return DrawToolUtilityShape([LineString(arc(center, radius, startangle, stopangle,
-                                       self.direction, self.steps_per_circ)),
+                                       self.direction, self.steps_per_circ, self.tolerance)),
                         Point(center)])
 
             elif self.mode == '132':
@@ -317,7 +322,7 @@ class FCArc(FCShapeTool):
                 stopangle = arctan2(p3[1] - center[1], p3[0] - center[0])
 
                 return DrawToolUtilityShape([LineString(arc(center, radius, startangle, stopangle,
-                                   direction, self.steps_per_circ)),
+                                   direction, self.steps_per_circ, self.tolerance)),
                         Point(center), Point(p1), Point(p3)])
 
             else:  # '12c'
@@ -350,7 +355,7 @@ class FCArc(FCShapeTool):
                 stopangle = arctan2(p2[1] - center[1], p2[0] - center[0])
 
                 return DrawToolUtilityShape([LineString(arc(center, radius, startangle, stopangle,
-                                       self.direction, self.steps_per_circ)),
+                                       self.direction, self.steps_per_circ, self.tolerance)),
                         Point(center)])
 
         return None
@@ -366,7 +371,7 @@ class FCArc(FCShapeTool):
             startangle = arctan2(p1[1] - center[1], p1[0] - center[0])
             stopangle = arctan2(p2[1] - center[1], p2[0] - center[0])
             self.geometry = DrawToolShape(LineString(arc(center, radius, startangle, stopangle,
-                                          self.direction, self.steps_per_circ)))
+                                          self.direction, self.steps_per_circ, self.tolerance)))
 
         elif self.mode == '132':
             p1 = array(self.points[0])
@@ -380,7 +385,7 @@ class FCArc(FCShapeTool):
             stopangle = arctan2(p3[1] - center[1], p3[0] - center[0])
 
             self.geometry = DrawToolShape(LineString(arc(center, radius, startangle, stopangle,
-                                          direction, self.steps_per_circ)))
+                                          direction, self.steps_per_circ, self.tolerance)))
 
         else:  # self.mode == '12c'
             p1 = array(self.points[0])
@@ -413,7 +418,7 @@ class FCArc(FCShapeTool):
             stopangle = arctan2(p2[1] - center[1], p2[0] - center[0])
 
             self.geometry = DrawToolShape(LineString(arc(center, radius, startangle, stopangle,
-                                           self.direction, self.steps_per_circ)))
+                                           self.direction, self.steps_per_circ, self.tolerance)))
         self.complete = True
 
 
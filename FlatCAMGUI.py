@@ -3,7 +3,7 @@ from PyQt6.QtCore import pyqtSignal, Qt, QSize
 from PyQt6.QtGui import QAction, QIcon, QPixmap, QMovie
 from PyQt6.QtWidgets import QMainWindow, QLabel, QGridLayout, \
     QMenu, QApplication, QToolBar, QSplitter, QWidget, QTabWidget, \
-    QVBoxLayout, QHBoxLayout, QComboBox, QProgressBar, QGroupBox
+    QVBoxLayout, QHBoxLayout, QComboBox, QProgressBar, QGroupBox, QToolButton
 from PyQt6.QtOpenGLWidgets import QOpenGLWidget
 
 from GUIElements import *
@@ -58,6 +58,10 @@ class FlatCAMGUI(QMainWindow):
         self.menufileopenexcellon = QAction('Open &Excellon ...', self)
         self.menufile.addAction(self.menufileopenexcellon)
 
+        # Open fabrication set ...
+        self.menufileopenfabset = QAction('Open &Fabrication Set ...', self)
+        self.menufile.addAction(self.menufileopenfabset)
+
         # Open G-Code ...
         self.menufileopengcode = QAction('Open G-&Code ...', self)
         self.menufile.addAction(self.menufileopengcode)
@@ -383,13 +387,22 @@ class FlatCAMActivityView(QWidget):
 
         layout.addWidget(self.text)
 
+        self.cancel_button = QToolButton(self)
+        self.cancel_button.setIcon(QIcon('share/cancel_edit16.png'))
+        self.cancel_button.setToolTip("Cancel running processes that support it.")
+        self.cancel_button.setAutoRaise(True)
+        self.cancel_button.hide()
+        layout.addWidget(self.cancel_button)
+
     def set_idle(self):
         self.movie.stop()
         self.text.setText("Idle.")
+        self.cancel_button.hide()
 
     def set_busy(self, msg):
         self.movie.start()
         self.text.setText(msg)
+        self.cancel_button.show()
 
 
 class FlatCAMInfoBar(QWidget):
@@ -744,6 +757,19 @@ class ExcellonOptionsGroupUI(OptionsGroupUI):
         self.spindlespeed_entry = IntEntry(allow_empty=True)
         grid1.addWidget(self.spindlespeed_entry, 4, 1)
 
+        orderlabel = QLabel('Drill order:')
+        orderlabel.setToolTip(
+            "Order of the holes of each tool.\n"
+            "Nearest: always the closest hole next.\n"
+            "Optimized: nearest, then shortened\n"
+            "further for a limited time."
+        )
+        grid1.addWidget(orderlabel, 5, 0)
+        self.drillorder_radio = RadioSet([{'label': 'File', 'value': 'file'},
+                                          {'label': 'Nearest', 'value': 'nearest'},
+                                          {'label': 'Optimized', 'value': 'optimized'}])
+        grid1.addWidget(self.drillorder_radio, 5, 1)
+
         #### Milling Holes ####
         self.mill_hole_label = QLabel('<b>Mill Holes</b>')
         self.mill_hole_label.setToolTip(
@@ -21,11 +21,15 @@ class FCProcess(object):
 
     def __init__(self, descr):
         self.callbacks = {
-            "done": []
+            "done": [],
+            "change": []
         }
         self.descr = descr
         self.status = "Active"
 
+        # Set by cancel(). Long jobs check it and stop early.
+        self.cancelled = False
+
     def __del__(self):
         self.done()
 
@@ -58,8 +62,21 @@ class FCProcess(object):
     def set_status(self, status_string):
         self.status = status_string
 
+        for fcn in self.callbacks["change"]:
+            fcn(self)
+
     def status_msg(self):
-        return self.descr
+        if self.status == "Active":
+            return self.descr
+        return "%s %s" % (self.descr, self.status)
+
+    def cancel(self):
+        """
+        Asks the process to stop. It is cooperative: the job
+        stops when it next checks ``self.cancelled``.
+        """
+        self.cancelled = True
+        self.set_status("Cancelling...")
 
 
 class FCProcessContainer(object):
@@ -86,6 +103,7 @@ class FCProcessContainer(object):
         proc = FCProcess(descr)
 
         proc.connect(self.on_done, event="done")
+        proc.connect(self.on_change, event="change")
 
         self.add(proc)
 
@@ -99,6 +117,12 @@ class FCProcessContainer(object):
     def on_done(self, proc):
         self.remove(proc)
 
+    def cancel_all(self):
+        for pref in self.procs:
+            proc = pref()
+            if proc is not None:
+                proc.cancel()
+
     def remove(self, proc):
 
         to_be_removed = []
@@ -124,6 +148,7 @@ class FCVisibleProcessContainer(QObject, FCProcessContainer):
         self.view = view
 
         self.something_changed.connect(self.update_view)
+        self.view.cancel_button.clicked.connect(self.cancel_all)
 
     def on_done(self, proc):
         self.app.log.debug("FCVisibleProcessContainer.on_done()")
@@ -38,7 +38,12 @@ class ApertureMacro:
     am2_re = re.compile(r'(.*)%$')
     amcomm_re = re.compile(r'^0(.*)')
     amprim_re = re.compile(r'^[1-9].*')
-    amvar_re = re.compile(r'^\$([0-9a-zA-z]+)=(.*)')
+    amvar_re = re.compile(r'^\$(\d+)=(.*)')
+    amref_re = re.compile(r'\$(\d+)')
+
+    ## make_geometry() memo statistics, for all macros.
+    hits = 0
+    misses = 0
 
     def __init__(self, name=None):
         self.name = name
@@ -50,6 +55,11 @@ class ApertureMacro:
         self.locvars = {}
         self.geometry = None
 
+        ## Compiled content, see compile(), and geometry
+        ## already made, by tuple of modifiers.
+        self.program = None
+        self.memo = {}
+
     def to_dict(self):
         """
         Returns the object in a serializable form. Only the name and
@@ -74,19 +84,59 @@ class ApertureMacro:
         """
         for attr in ['name', 'raw']:
             setattr(self, attr, d[attr])
+        self.program = None
+        self.memo = {}
 
-    def parse_content(self):
+    @classmethod
+    def cache_info(cls):
         """
-        Creates numerical lists for all primitives in the aperture
-        macro (in ``self.raw``) by replacing all variables by their
-        values iteratively and evaluating expressions. Results
-        are stored in ``self.primitives``.
+        Statistics of the ``make_geometry()`` memo of all macros.
+
+        :return: {'hits': int, 'misses': int}
+        :rtype: dict
+        """
+        return {'hits': cls.hits, 'misses': cls.misses}
+
+    @classmethod
+    def reset_cache_info(cls):
+        cls.hits = 0
+        cls.misses = 0
+
+    @staticmethod
+    def compile_expression(expr):
+        """
+        Compiles an arithmetic expression of the macro into Python
+        code to be evaluated with the variables in a dictionary
+        named ``v``. Undefined variables evaluate to 0.
+
+        :param expr: Expression, i.e. ``$1x0.5+0.1``.
+        :type expr: str
+        :return: Code object.
+        """
+        # Variables are looked up before replacing x with * so
+        # their names are left alone.
+        parts = ApertureMacro.amref_re.split(expr)
+        for i in range(0, len(parts), 2):
+            parts[i] = re.sub(r'[xX]', "*", parts[i])
+        for i in range(1, len(parts), 2):
+            parts[i] = "v.get(%r, 0)" % parts[i]
+        return compile(''.join(parts), '<macro>', 'eval')
+
+    def compile(self):
+        """
+        Translates the macro (in ``self.raw``) into a list of steps
+        that ``parse_content()`` can run for any set of variables
+        without parsing the text again. The result is stored in
+        ``self.program``. Each step is one of:
+
+        * ``('var', name, code)``: Local variable definition.
+        * ``('prim', [code, ...])``: Primitive.
 
         :return: None
         """
         # Cleanup
         self.raw = self.raw.replace('\n', '').replace('\r', '').strip(" *")
-        self.primitives = []
+        self.program = []
 
         # Separate parts
         parts = self.raw.split('*')
@@ -102,49 +152,47 @@ class ApertureMacro:
             # These are variables defined locally inside the macro. They can be
             # numerical constant or defind in terms of previously define
             # variables, which can be defined locally or in an aperture
-            # definition. All replacements ocurr here.
+            # definition.
             match = ApertureMacro.amvar_re.search(part)
             if match:
-                var = match.group(1)
-                val = match.group(2)
-
-                # Replace variables in value
-                for v in self.locvars:
-                    val = re.sub(r'\$'+str(v)+r'(?![0-9a-zA-Z])', str(self.locvars[v]), val)
-
-                # Make all others 0
-                val = re.sub(r'\$[0-9a-zA-Z](?![0-9a-zA-Z])', "0", val)
-
-                # Change x with *
-                val = re.sub(r'[xX]', "*", val)
-
-                # Eval() and store.
-                self.locvars[var] = eval(val)
+                self.program.append(('var', match.group(1),
+                                     ApertureMacro.compile_expression(match.group(2))))
                 continue
 
             ### Primitives
             # Each is an array. The first identifies the primitive, while the
-            # rest depend on the primitive. All are strings representing a
-            # number and may contain variable definition. The values of these
-            # variables are defined in an aperture definition.
+            # rest depend on the primitive. All are expressions and may contain
+            # variables. The values of these variables are defined in an
+            # aperture definition.
             match = ApertureMacro.amprim_re.search(part)
             if match:
-                ## Replace all variables
-                for v in self.locvars:
-                    part = re.sub(r'\$' + str(v) + r'(?![0-9a-zA-Z])', str(self.locvars[v]), part)
+                self.program.append(('prim', [ApertureMacro.compile_expression(x)
+                                              for x in part.split(",")]))
+                continue
 
-                # Make all others 0
-                part = re.sub(r'\$[0-9a-zA-Z](?![0-9a-zA-Z])', "0", part)
+            log.warning("Unknown syntax of aperture macro part: %s" % str(part))
+
+    def parse_content(self):
+        """
+        Creates numerical lists for all primitives in the aperture
+        macro by evaluating the compiled macro (see ``compile()``)
+        with the variables in ``self.locvars``. Variables defined in
+        the macro are added to ``self.locvars``. Results are stored
+        in ``self.primitives``.
 
-                # Change x with *
-                part = re.sub(r'[xX]', "*", part)
+        :return: None
+        """
+        if self.program is None:
+            self.compile()
 
-                ## Store
-                elements = part.split(",")
-                self.primitives.append([eval(x) for x in elements])
-                continue
+        self.primitives = []
+        env = {'__builtins__': {}, 'v': self.locvars}
 
-            log.warning("Unknown syntax of aperture macro part: %s" % str(part))
+        for step in self.program:
+            if step[0] == 'var':
+                self.locvars[step[1]] = eval(step[2], env)
+            else:
+                self.primitives.append([eval(code, env) for code in step[1]])
 
     def append(self, data):
         """
@@ -155,6 +203,8 @@ class ApertureMacro:
         :return: None
         """
         self.raw += data
+        self.program = None
+        self.memo = {}
 
     @staticmethod
     def default2zero(n, mods):
@@ -339,7 +389,8 @@ class ApertureMacro:
     def make_geometry(self, modifiers):
         """
         Runs the macro for the given modifiers and generates
-        the corresponding geometry.
+        the corresponding geometry. Results are memoized per
+        modifiers, see ``cache_info()``.
 
         :param modifiers: Modifiers (parameters) for this macro
         :type modifiers: list
@@ -362,7 +413,14 @@ class ApertureMacro:
 
         ## Store modifiers as local variables
         modifiers = modifiers or []
-        modifiers = [float(m) for m in modifiers]
+        modifiers = tuple(float(m) for m in modifiers)
+
+        if modifiers in self.memo:
+            ApertureMacro.hits += 1
+            self.geometry = self.memo[modifiers]
+            return self.geometry
+        ApertureMacro.misses += 1
+
         self.locvars = {}
         for i in range(0, len(modifiers)):
             self.locvars[str(i + 1)] = modifiers[i]
@@ -388,4 +446,5 @@ class ApertureMacro:
                 self.geometry = self.geometry.difference(prim_geo['geometry'])
                 continue
 
+        self.memo[modifiers] = self.geometry
         return self.geometry
@@ -8,16 +8,18 @@
 
 import re
 
+import numpy as np
+
 from decimal import Decimal
-from numpy import arctan2, sqrt
-from io import StringIO
-from shapely import affinity
-from shapely.geometry import LineString, Point, LinearRing
-from shapely.ops import unary_union
+from shapely.geometry import LineString, LinearRing, MultiLineString, Point
 
+from .drillorder import DrillOrder, travel
 from .fcTree import FlatCAMRTreeStorage
+from .gcode import GCodeEmitter, PathCode, parse_gcode
 from .geometry import Geometry
-from .utils import arc, setup_log
+from .toolpath import KINDS, ToolpathView, as_toolpaths
+from .union import tiled_line_union
+from .utils import setup_log
 
 log = setup_log("fcCamlib.cncjob")
 
@@ -28,7 +30,9 @@ class CNCjob(Geometry):
 
     *ATTRIBUTES*
 
-    * ``gcode_parsed`` (list): Each is a dictionary:
+    * ``toolpaths`` (Toolpaths): Paths of the job, see ``gcode_parse()``.
+
+    * ``gcode_parsed`` (ToolpathView): The same as a list. Each is a dictionary:
 
     =====================  =========================================
     Key                    Value
@@ -66,11 +70,19 @@ class CNCjob(Geometry):
         #self.pausecode = "G04 P1"
         self.feedminutecode = "G94"
         self.absolutecode = "G90"
-        self.gcode = ""
+        self._gcode = GCodeEmitter()
         self.input_geometry_bounds = None
-        self.gcode_parsed = None
+        self.toolpaths = None
         self.steps_per_circ = 20  # Used when parsing G-code arcs
 
+        # multiprocessing.Pool for the union of the paths in
+        # solid_geometry. Set by the app.
+        self.pool = None
+
+        # Rapid travel between holes of the last Excellon job, in
+        # file order and as drilled: (before, after).
+        self.drill_travel = None
+
         if zdownrate is not None:
             self.zdownrate = float(zdownrate)
         elif CNCjob.defaults["zdownrate"] is not None:
@@ -87,6 +99,46 @@ class CNCjob(Geometry):
                            'gcode', 'input_geometry_bounds', 'gcode_parsed',
                            'steps_per_circ']
 
+    @property
+    def gcode(self):
+        """
+        The G-code of the job as a single string. The string is only
+        built on first access: exporting and parsing iterate over
+        ``gcode_lines()`` instead.
+
+        :rtype: str
+        """
+        return self._gcode.getvalue()
+
+    @gcode.setter
+    def gcode(self, value):
+        self._gcode = GCodeEmitter()
+        self._gcode.write(value)
+
+    @property
+    def gcode_parsed(self):
+        """
+        The paths of the job as ``{"geom": LineString, "kind": [..]}``
+        dictionaries, a view over ``self.toolpaths``. None before
+        ``gcode_parse()``.
+        """
+        if self.toolpaths is None:
+            return None
+        return ToolpathView(self.toolpaths)
+
+    @gcode_parsed.setter
+    def gcode_parsed(self, paths):
+        self.toolpaths = as_toolpaths(paths)
+
+    def gcode_lines(self):
+        """
+        Yields the G-code of the job one line at a time, each with
+        its newline.
+
+        :return: Generator of str.
+        """
+        return self._gcode.lines()
+
     def convert_units(self, units):
         factor = Geometry.convert_units(self, units)
         log.debug("CNCjob.convert_units()")
@@ -99,15 +151,25 @@ class CNCjob(Geometry):
         return factor
 
     def generate_from_excellon_by_tool(self, exobj, tools="all",
-                                       toolchange=False, toolchangez=0.1):
+                                       toolchange=False, toolchangez=0.1, drillorder="file",
+                                       output=None):
         """
         Creates gcode for this object from an Excellon object
         for the specified tools.
 
+        The holes of each tool are drilled in the order given by
+        ``drillorder``, a method of ``DrillOrder``. The rapid travel
+        between holes before and after ordering is left in
+        ``self.drill_travel``.
+
         :param exobj: Excellon object to process
         :type exobj: Excellon
         :param tools: Comma separated tool names
         :type: tools: str
+        :param drillorder: "file", "nearest" or "optimized".
+        :type drillorder: str
+        :param output: Text file to write the G-code to instead of
+            ``self.gcode``.
         :return: None
         :rtype: None
         """
@@ -118,29 +180,43 @@ class CNCjob(Geometry):
         
         # sort the tools list by the second item in tuple (here we have a dict with diameter of the tool)
         # so we actually are sorting the tools by diameter
-        sorted_tools = sorted(exobj.tools.items(), key = lambda x: x[1])
+        sorted_tools = sorted(exobj.tools.items(), key = lambda x: x[1]["C"])
         if tools == "all":
             tools = [i[0] for i in sorted_tools]   # we get a array of ordered tools
             log.debug("Tools 'all' and sorted are: %s" % str(tools))
         else:
             selected_tools = [x.strip() for x in tools.split(",")]  # we strip spaces and also separate the tools by ','
-            selected_tools = filter(lambda i: i in selected_tools, selected_tools)
+            selected_tools = list(filter(lambda i: i in selected_tools, selected_tools))
 
             # Create a sorted list of selected tools from the sorted_tools list
             tools = [i for i, j in sorted_tools for k in selected_tools if i == k]
             log.debug("Tools selected and sorted are: %s" % str(tools)) 
 
         # Points (Group by tool)
-        points = {}
-        for drill in exobj.drills:
-            if drill['tool'] in tools:
-                try:
-                    points[drill['tool']].append(drill['point'])
-                except KeyError:
-                    points[drill['tool']] = [drill['point']]
+        groups = exobj.drill_table.by_tool()
+        points = {tool: exobj.drill_table.xy[groups[tool]] for tool in tools if tool in groups}
+
+        # Drilling order. Each tool starts where the previous one ended.
+        # The travel before is all in file order, so it starts where
+        # the previous tool ended in file order.
+        sequencer = DrillOrder(drillorder)
+        position = file_position = (0, 0)
+        travel_before = travel_after = 0.0
+        for tool in tools:
+            if tool in points:
+                before = travel(points[tool], np.arange(len(points[tool])), file_position)
+                file_position = points[tool][-1]
+                order, _, after = sequencer.order(points[tool], position)
+                points[tool] = points[tool][order]
+                position = points[tool][-1]
+                travel_before += before
+                travel_after += after
+                log.debug("Tool %s: %d holes, travel %.4f -> %.4f" % (tool, len(order), before, after))
+        self.drill_travel = (travel_before, travel_after)
+        log.info("Drill travel (%s): %.4f -> %.4f" % (drillorder, travel_before, travel_after))
 
         #log.debug("Found %d drills." % len(points))
-        self.gcode = []
+        gc = GCodeEmitter(output)
 
         # Basic G-Code macros
         t = "G00 " + CNCjob.defaults["coordinate_format"] + "\n"
@@ -149,19 +225,22 @@ class CNCjob(Geometry):
         up_to_zero = "G01 Z0\n"
 
         # Initialization
-        gcode = self.unitcode[self.units.upper()] + "\n"
-        gcode += self.absolutecode + "\n"
-        gcode += self.feedminutecode + "\n"
-        gcode += "F%.2f\n" % self.feedrate
-        gcode += "G00 Z%.4f\n" % self.z_move  # Move to travel height
+        gc.write(self.unitcode[self.units.upper()] + "\n")
+        gc.write(self.absolutecode + "\n")
+        gc.write(self.feedminutecode + "\n")
+        gc.write("F%.2f\n" % self.feedrate)
+        gc.write("G00 Z%.4f\n" % self.z_move)  # Move to travel height
 
         if self.spindlespeed is not None:
             # Spindle start with configured speed
-            gcode += "M03 S%d\n" % int(self.spindlespeed)
+            gc.write("M03 S%d\n" % int(self.spindlespeed))
         else:
-            gcode += "M03\n"  # Spindle start
+            gc.write("M03\n")  # Spindle start
+
+        #gc.write(self.pausecode + "\n")
 
-        #gcode += self.pausecode + "\n"
+        # Move and drill cycle of one hole
+        hole = t + (down + up_to_zero + up).replace("%", "%%")
 
         for tool in tools:
 
@@ -169,28 +248,28 @@ class CNCjob(Geometry):
             if tool in points:
                 # Tool change sequence (optional)
                 if toolchange:
-                    gcode += "G00 Z%.4f\n" % toolchangez
-                    gcode += "T%d\n" % int(tool)  # Indicate tool slot (for automatic tool changer)
-                    gcode += "M5\n"  # Spindle Stop
-                    gcode += "M6\n"  # Tool change
-                    gcode += "(MSG, Change to tool dia=%.4f)\n" % exobj.tools[tool]["C"]
-                    gcode += "M0\n"  # Temporary machine stop
+                    gc.write("G00 Z%.4f\n" % toolchangez)
+                    gc.write("T%d\n" % int(tool))  # Indicate tool slot (for automatic tool changer)
+                    gc.write("M5\n")  # Spindle Stop
+                    gc.write("M6\n")  # Tool change
+                    gc.write("(MSG, Change to tool dia=%.4f)\n" % exobj.tools[tool]["C"])
+                    gc.write("M0\n")  # Temporary machine stop
                     if self.spindlespeed is not None:
                         # Spindle start with configured speed
-                        gcode += "M03 S%d\n" % int(self.spindlespeed)
+                        gc.write("M03 S%d\n" % int(self.spindlespeed))
                     else:
-                        gcode += "M03\n"  # Spindle start
+                        gc.write("M03\n")  # Spindle start
 
-                # Drillling!
-                for point in points[tool]:
-                    x, y = point.coords.xy
-                    gcode += t % (x[0], y[0])
-                    gcode += down + up_to_zero + up
+                # Drillling! All holes of the tool in one formatting operation.
+                gc.write(hole * len(points[tool]) % tuple(points[tool].ravel().tolist()))
 
-        gcode += t % (0, 0)
-        gcode += "M05\n"  # Spindle stop
+        gc.write(t % (0, 0))
+        gc.write("M05\n")  # Spindle stop
 
-        self.gcode = gcode
+        if output is None:
+            self._gcode = gc
+        else:
+            gc.flush()
 
     def generate_from_geometry_2(self,
                                  geometry,
@@ -198,7 +277,8 @@ class CNCjob(Geometry):
                                  tooldia=None,
                                  tolerance=0,
                                  multidepth=False,
-                                 depthpercut=None):
+                                 depthpercut=None,
+                                 output=None):
         """
         Second algorithm to generate from Geometry.
 
@@ -213,6 +293,8 @@ class CNCjob(Geometry):
         :param multidepth: If True, use multiple passes to reach
            the desired depth.
         :param depthpercut: Maximum depth in each pass.
+        :param output: Text file to write the G-code to instead of
+            ``self.gcode``.
         :return: None
         """
         assert isinstance(geometry, Geometry), \
@@ -248,17 +330,20 @@ class CNCjob(Geometry):
         if not append:
             self.gcode = ""
 
+        gc = GCodeEmitter(output)
+        fmt = CNCjob.defaults["coordinate_format"]
+
         # Initial G-Code
-        self.gcode = self.unitcode[self.units.upper()] + "\n"
-        self.gcode += self.absolutecode + "\n"
-        self.gcode += self.feedminutecode + "\n"
-        self.gcode += "F%.2f\n" % self.feedrate
-        self.gcode += "G00 Z%.4f\n" % self.z_move  # Move (up) to travel height
+        gc.write(self.unitcode[self.units.upper()] + "\n")
+        gc.write(self.absolutecode + "\n")
+        gc.write(self.feedminutecode + "\n")
+        gc.write("F%.2f\n" % self.feedrate)
+        gc.write("G00 Z%.4f\n" % self.z_move)  # Move (up) to travel height
         if self.spindlespeed is not None:
-            self.gcode += "M03 S%d\n" % int(self.spindlespeed)  # Spindle start with configured speed
+            gc.write("M03 S%d\n" % int(self.spindlespeed))  # Spindle start with configured speed
         else:
-            self.gcode += "M03\n"  # Spindle start
-        #self.gcode += self.pausecode + "\n"
+            gc.write("M03\n")  # Spindle start
+        #gc.write(self.pausecode + "\n")
 
         ## Iterate over geometry paths getting the nearest each time.
         log.debug("Starting G-Code...")
@@ -274,23 +359,35 @@ class CNCjob(Geometry):
                 # deletion will fail.
                 storage.remove(geo)
 
-                # If last point in geometry is the nearest
-                # but prefer the first one if last point == first point
-                # then reverse coordinates.
-                if pt != geo.coords[0] and pt == geo.coords[-1]:
-                    geo.coords = list(geo.coords)[::-1]
+                # Coordinates are formatted once per path and reused
+                # by every pass.
+                path = None
+                if type(geo) == LineString or type(geo) == LinearRing:
+                    if tolerance > 0:
+                        path = PathCode(geo.simplify(tolerance).coords, fmt)
+                    else:
+                        path = PathCode(geo.coords, fmt)
+
+                    # If last point in geometry is the nearest
+                    # but prefer the first one if last point == first point
+                    # then reverse coordinates.
+                    if pt != path.start and pt == path.end:
+                        path = path.reversed()
 
                 #---------- Single depth/pass --------
                 if not multidepth:
                     # G-code
                     # Note: self.linear2gcode() and self.point2gcode() will
                     # lower and raise the tool every time.
-                    if type(geo) == LineString or type(geo) == LinearRing:
-                        self.gcode += self.linear2gcode(geo, tolerance=tolerance)
+                    if path is not None:
+                        self.linear2gcode(path, emitter=gc)
+                        current_pt = path.end
                     elif type(geo) == Point:
-                        self.gcode += self.point2gcode(geo)
+                        self.point2gcode(geo, emitter=gc)
+                        current_pt = geo.coords[-1]
                     else:
                         log.warning("G-code generation not implemented for %s" % (str(type(geo))))
+                        current_pt = geo.coords[-1]
 
                 #--------- Multi-pass ---------
                 else:
@@ -304,8 +401,9 @@ class CNCjob(Geometry):
                     elif not isinstance(depthpercut, Decimal):
                         depthpercut = Decimal(depthpercut).quantize(Decimal('0.000000001'))
 
+                    # Continue from the end of the first pass.
+                    current_pt = path.end if path is not None else geo.coords[-1]
                     depth = 0
-                    reverse = False
                     while depth > z_cut:
 
                         # Increase depth. Limit to z_cut.
@@ -318,14 +416,12 @@ class CNCjob(Geometry):
                         # first point in the path, but it should be already
                         # at the first point if the tool is down (in the material).
                         # So, an extra G00 should show up but is inconsequential.
-                        if type(geo) == LineString or type(geo) == LinearRing:
-                            self.gcode += self.linear2gcode(geo, tolerance=tolerance,
-                                                            zcut=depth,
-                                                            up=False)
+                        if path is not None:
+                            self.linear2gcode(path, zcut=depth, up=False, emitter=gc)
 
                         # Ignore multi-pass for points.
                         elif type(geo) == Point:
-                            self.gcode += self.point2gcode(geo)
+                            self.point2gcode(geo, emitter=gc)
                             break  # Ignoring ...
 
                         else:
@@ -334,25 +430,17 @@ class CNCjob(Geometry):
                         # Reverse coordinates if not a loop so we can continue
                         # cutting without returning to the beginhing.
                         if type(geo) == LineString:
-                            geo.coords = list(geo.coords)[::-1]
-                            reverse = True
-
-                    # If geometry is reversed, revert.
-                    if reverse:
-                        if type(geo) == LineString:
-                            geo.coords = list(geo.coords)[::-1]
+                            path = path.reversed()
 
                     # Lift the tool
-                    self.gcode += "G00 Z%.4f\n" % self.z_move
-                    # self.gcode += "( End of path. )\n"
+                    gc.write("G00 Z%.4f\n" % self.z_move)
+                    # gc.write("( End of path. )\n")
 
                 # Did deletion at the beginning.
                 # Delete from index, update current location and continue.
                 #rti.delete(hits[0], geo.coords[0])
                 #rti.delete(hits[0], geo.coords[-1])
 
-                current_pt = geo.coords[-1]
-
                 # Next
                 pt, geo = storage.nearest(current_pt)
 
@@ -362,9 +450,14 @@ class CNCjob(Geometry):
         log.debug("%s paths traced." % path_count)
 
         # Finish
-        self.gcode += "G00 Z%.4f\n" % self.z_move  # Stop cutting
-        self.gcode += "G00 X0Y0\n"
-        self.gcode += "M05\n"  # Spindle stop
+        gc.write("G00 Z%.4f\n" % self.z_move)  # Stop cutting
+        gc.write("G00 X0Y0\n")
+        gc.write("M05\n")  # Spindle stop
+
+        if output is None:
+            self._gcode = gc
+        else:
+            gc.flush()
 
     @staticmethod
     def codes_split(gline):
@@ -388,93 +481,19 @@ class CNCjob(Geometry):
 
     def gcode_parse(self):
         """
-        G-Code parser (from self.gcode). Generates dictionary with
-        single-segment LineString's and "kind" indicating cut or travel,
-        fast or feedrate speed.
-        """
-
-        kind = ["C", "F"]  # T=travel, C=cut, F=fast, S=slow
-
-        # Results go here
-        geometry = []        
-
-        # Last known instruction
-        current = {'X': 0.0, 'Y': 0.0, 'Z': 0.0, 'G': 0}
+        G-Code parser (from self.gcode). Generates the paths
+        of the job and their "kind", indicating cut or travel, fast or
+        feedrate speed.
 
-        # Current path: temporary storage until tool is
-        # lifted or lowered.
-        path = [(0, 0)]
-
-        # Process every instruction
-        for line in StringIO(self.gcode):
-
-            gobj = self.codes_split(line)
-
-            ## Units
-            if 'G' in gobj and (gobj['G'] == 20.0 or gobj['G'] == 21.0):
-                self.units = {20.0: "IN", 21.0: "MM"}[gobj['G']]
-                continue
+        The paths are kept in ``self.toolpaths``, see ``parse_gcode()``,
+        and ``gcode_parsed`` is a view over them.
+        """
 
-            ## Changing height
-            if 'Z' in gobj:
-                if ('X' in gobj or 'Y' in gobj) and gobj['Z'] != current['Z']:
-                    log.warning("Non-orthogonal motion: From %s" % str(current))
-                    log.warning("  To: %s" % str(gobj))
-                current['Z'] = gobj['Z']
-                # Store the path into geometry and reset path
-                if len(path) > 1:
-                    geometry.append({"geom": LineString(path),
-                                     "kind": kind})
-                    path = [path[-1]]  # Start with the last point of last path.
+        self.toolpaths, units = parse_gcode(self._gcode.chunks(), self.steps_per_circ, self.arc_tolerance())
+        if units is not None:
+            self.units = units
 
-            if 'G' in gobj:
-                current['G'] = int(gobj['G'])
-                
-            if 'X' in gobj or 'Y' in gobj:
-                
-                if 'X' in gobj:
-                    x = gobj['X']
-                else:
-                    x = current['X']
-                
-                if 'Y' in gobj:
-                    y = gobj['Y']
-                else:
-                    y = current['Y']
-
-                kind = ["C", "F"]  # T=travel, C=cut, F=fast, S=slow
-
-                if current['Z'] > 0:
-                    kind[0] = 'T'
-                if current['G'] > 0:
-                    kind[1] = 'S'
-                   
-                arcdir = [None, None, "cw", "ccw"]
-                if current['G'] in [0, 1]:  # line
-                    path.append((x, y))
-
-                if current['G'] in [2, 3]:  # arc
-                    center = [gobj['I'] + current['X'], gobj['J'] + current['Y']]
-                    radius = sqrt(gobj['I']**2 + gobj['J']**2)
-                    start = arctan2(-gobj['J'], -gobj['I'])
-                    stop = arctan2(-center[1] + y, -center[0] + x)
-                    path += arc(center, radius, start, stop,
-                                arcdir[current['G']],
-                                self.steps_per_circ)
-
-            # Update current instruction
-            for code in gobj:
-                current[code] = gobj[code]
-
-        # There might not be a change in height at the
-        # end, therefore, see here too if there is
-        # a final path.
-        if len(path) > 1:
-            geometry.append({"geom": LineString(path),
-                             "kind": kind})
-
-        self.gcode_parsed = geometry
-        return geometry
+        return self.gcode_parsed
 
     # def plot(self, tooldia=None, dpi=75, margin=0.1,
     #          color={"T": ["#F0E24D", "#B5AB3A"], "C": ["#5E6CFF", "#4650BD"]},
@@ -525,46 +544,119 @@ class CNCjob(Geometry):
         :param tool_tolerance: Tolerance when drawing the toolshape.
         :return: None
         """
-        path_num = 0
-
         if tooldia is None:
             tooldia = self.tooldia
-        
+
+        paths = self.toolpaths
+        kinds = [KINDS[k][0] for k in paths.kinds.tolist()]
+
         if tooldia == 0:
-            for geo in self.gcode_parsed:
-                obj.add_shape(shape=geo['geom'], color=color[geo['kind'][0]][1], visible=visible)
+            for geom, kind in zip(paths.linestrings(), kinds):
+                obj.add_shape(shape=geom, color=color[kind][1], visible=visible)
         else:
-            text = []
-            pos = []
-            for geo in self.gcode_parsed:
-                path_num += 1
+            for geom, kind in zip(paths.linestrings(), kinds):
+                poly = geom.buffer(tooldia / 2.0).simplify(tool_tolerance)
+                obj.add_shape(shape=poly, color=color[kind][1], face_color=color[kind][0],
+                              visible=visible, layer=1 if kind == 'C' else 2)
 
-                text.append(str(path_num))
-                pos.append(geo['geom'].coords[0])
+            text = [str(path_num) for path_num in range(1, len(paths) + 1)]
+            pos = [tuple(pt) for pt in paths.starts().tolist()]
+            obj.annotation.set(text=text, pos=pos, visible=obj.options['plot'])
 
-                poly = geo['geom'].buffer(tooldia / 2.0).simplify(tool_tolerance)
-                obj.add_shape(shape=poly, color=color[geo['kind'][0]][1], face_color=color[geo['kind'][0]][0],
-                              visible=visible, layer=1 if geo['kind'][0] == 'C' else 2)
+    @property
+    def solid_geometry(self):
+        """
+        Union of the paths, made from ``toolpaths`` on first access
+        after ``create_geometry()``, or whatever was assigned.
+        """
+        if self._solid_geometry is None and getattr(self, 'toolpaths', None) is not None:
+            self._solid_geometry = self.toolpath_geometry()
+            self._geometry_from_toolpaths = True
+        return self._solid_geometry
 
-            obj.annotation.set(text=text, pos=pos, visible=obj.options['plot'])
+    @solid_geometry.setter
+    def solid_geometry(self, geometry):
+        self._solid_geometry = geometry
+        self._geometry_from_toolpaths = False
 
     def create_geometry(self):
-        # TODO: This takes forever. Too much data?
-#        self.solid_geometry = cascaded_union([geo['geom'] for geo in self.gcode_parsed])
-        self.solid_geometry = unary_union([geo['geom'] for geo in self.gcode_parsed])
+        """
+        Makes ``solid_geometry`` follow ``toolpaths``. The union is not
+        made until ``solid_geometry`` is accessed, and ``bounds()`` does
+        not need it.
+
+        :return: None
+        """
+        self._solid_geometry = None
+
+    def toolpath_geometry(self):
+        """
+        Union of all paths, split in spatial tiles that are united in
+        ``self.pool`` with ``tiled_line_union()``.
+
+        :return: The union.
+        :rtype: BaseGeometry
+        """
+        return tiled_line_union(self.toolpaths.linestrings(), self.toolpaths.bounds(), self.pool)
+
+    def bounds(self):
+        """
+        Returns coordinates of rectangular bounds
+        of geometry: (xmin, ymin, xmax, ymax).
+
+        Unless ``solid_geometry`` was assigned, taken from the
+        coordinates of the paths without making their union.
+        """
+        if self._solid_geometry is not None and not self._geometry_from_toolpaths:
+            return Geometry.bounds(self)
+
+        if self.toolpaths is None or self.toolpaths.bounds() is None:
+            return 0, 0, 0, 0
+        return self.toolpaths.bounds()
+
+    def size(self):
+        """
+        Returns (width, height) of rectangular
+        bounds of geometry, see ``bounds()``.
+        """
+        bounds = self.bounds()
+        return bounds[2] - bounds[0], bounds[3] - bounds[1]
+
+    def to_dict(self):
+        """
+        Returns a respresentation of the object as a dictionary.
+        Attributes to include are listed in ``self.ser_attrs``.
+
+        ``solid_geometry`` is saved as None while it follows
+        ``toolpaths``, and made again from them when needed.
+
+        :return: A dictionary-encoded copy of the object.
+        :rtype: dict
+        """
+        d = {}
+        for attr in self.ser_attrs:
+            if attr == 'solid_geometry' and (self._solid_geometry is None or self._geometry_from_toolpaths):
+                d[attr] = None
+            else:
+                d[attr] = getattr(self, attr)
+        return d
 
     def linear2gcode(self, linear, tolerance=0, down=True, up=True,
                      zcut=None, ztravel=None, downrate=None,
-                     feedrate=None, cont=False):
+                     feedrate=None, cont=False, emitter=None):
         """
         Generates G-code to cut along the linear feature.
 
-        :param linear: The path to cut along.
-        :type: Shapely.LinearRing or Shapely.Linear String
+        :param linear: The path to cut along, or its ``PathCode``.
+        :type: Shapely.LinearRing, Shapely.LineString or PathCode
         :param tolerance: All points in the simplified object will be within the
-            tolerance distance of the original geometry.
+            tolerance distance of the original geometry. Not applied
+            to a ``PathCode``.
         :type tolerance: float
-        :return: G-code to cut along the linear feature.
+        :param emitter: Where to write the G-code. If None, it is returned.
+        :type emitter: GCodeEmitter
+        :return: G-code to cut along the linear feature, or None if
+            written to ``emitter``.
         :rtype: str
         """
 
@@ -580,58 +672,66 @@ class CNCjob(Geometry):
         if feedrate is None:
             feedrate = self.feedrate
 
-        t = "G0%d " + CNCjob.defaults["coordinate_format"] + "\n"
-
-        # Simplify paths?
-        if tolerance > 0:
-            target_linear = linear.simplify(tolerance)
+        if isinstance(linear, PathCode):
+            path = linear
         else:
-            target_linear = linear
-
-        gcode = ""
+            # Simplify paths?
+            if tolerance > 0:
+                linear = linear.simplify(tolerance)
+            path = PathCode(linear.coords, CNCjob.defaults["coordinate_format"])
 
-        path = list(target_linear.coords)
+        gc = emitter if emitter is not None else GCodeEmitter()
 
         # Move fast to 1st point
         if not cont:
-            gcode += t % (0, path[0][0], path[0][1])  # Move to first point
+            gc.write(path.rapid)  # Move to first point
 
         # Move down to cutting depth
         if down:
             # Different feedrate for vertical cut?
             if self.zdownrate is not None:
-                gcode += "F%.2f\n" % downrate
-                gcode += "G01 Z%.4f\n" % zcut       # Start cutting
-                gcode += "F%.2f\n" % feedrate       # Restore feedrate
+                gc.write("F%.2f\n" % downrate)
+                gc.write("G01 Z%.4f\n" % zcut)       # Start cutting
+                gc.write("F%.2f\n" % feedrate)       # Restore feedrate
             else:
-                gcode += "G01 Z%.4f\n" % zcut       # Start cutting
+                gc.write("G01 Z%.4f\n" % zcut)       # Start cutting
 
         # Cutting...
-        for pt in path[1:]:
-            gcode += t % (1, pt[0], pt[1])    # Linear motion to point
+        gc.write(path.feed)    # Linear motion to each point
 
         # Up to travelling height.
         if up:
-            gcode += "G00 Z%.4f\n" % ztravel  # Stop cutting
+            gc.write("G00 Z%.4f\n" % ztravel)  # Stop cutting
+
+        if emitter is None:
+            return gc.getvalue()
+
+    def point2gcode(self, point, emitter=None):
+        """
+        Generates G-code to drill at a point.
 
-        return gcode
+        :param point: Where to drill.
+        :type point: Shapely.Point
+        :param emitter: Where to write the G-code. If None, it is returned.
+        :type emitter: GCodeEmitter
+        :return: G-code, or None if written to ``emitter``.
+        :rtype: str
+        """
+        gc = emitter if emitter is not None else GCodeEmitter()
 
-    def point2gcode(self, point):
-        gcode = ""
-        #t = "G0%d X%.4fY%.4f\n"
-        t = "G0%d " + CNCjob.defaults["coordinate_format"] + "\n"
-        path = list(point.coords)
-        gcode += t % (0, path[0][0], path[0][1])  # Move to first point
+        gc.write(PathCode(point.coords, CNCjob.defaults["coordinate_format"]).rapid)  # Move to first point
 
         if self.zdownrate is not None:
-            gcode += "F%.2f\n" % self.zdownrate
-            gcode += "G01 Z%.4f\n" % self.z_cut       # Start cutting
-            gcode += "F%.2f\n" % self.feedrate
+            gc.write("F%.2f\n" % self.zdownrate)
+            gc.write("G01 Z%.4f\n" % self.z_cut)       # Start cutting
+            gc.write("F%.2f\n" % self.feedrate)
         else:
-            gcode += "G01 Z%.4f\n" % self.z_cut       # Start cutting
+            gc.write("G01 Z%.4f\n" % self.z_cut)       # Start cutting
 
-        gcode += "G00 Z%.4f\n" % self.z_move      # Stop cutting
-        return gcode
+        gc.write("G00 Z%.4f\n" % self.z_move)      # Stop cutting
+
+        if emitter is None:
+            return gc.getvalue()
 
     def scale(self, factor):
         """
@@ -645,8 +745,7 @@ class CNCjob(Geometry):
         :rtype: None
         """
 
-        for g in self.gcode_parsed:
-            g['geom'] = affinity.scale(g['geom'], factor, factor, origin=(0, 0))
+        self.toolpaths.scale(factor, factor)
 
         self.create_geometry()
 
@@ -661,8 +760,7 @@ class CNCjob(Geometry):
         """
         dx, dy = vect
 
-        for g in self.gcode_parsed:
-            g['geom'] = affinity.translate(g['geom'], xoff=dx, yoff=dy)
+        self.toolpaths.translate(dx, dy)
 
         self.create_geometry()
 
@@ -689,20 +787,15 @@ class CNCjob(Geometry):
 
         # Seperate the list of cuts and travels into 2 distinct lists
         # This way we can add different formatting / colors to both
-        cuts = []
-        travels = []
-        for g in self.gcode_parsed:
-            if g['kind'][0] == 'C': cuts.append(g)
-            if g['kind'][0] == 'T': travels.append(g)
-
-        # Used to determine the overall board size
-        self.solid_geometry = unary_union([geo['geom'] for geo in self.gcode_parsed])
+        cuts = self.toolpaths.linestrings(self.toolpaths.of_kind('C'))
+        travels = self.toolpaths.linestrings(self.toolpaths.of_kind('T'))
 
-        # Convert the cuts and travels into single geometry objects we can render as svg xml
+        # Convert the cuts and travels into single geometry objects we can render as svg xml.
+        # The lines are drawn the same whether or not they are united.
         if travels:
-            travelsgeom = unary_union([geo['geom'] for geo in travels])
+            travelsgeom = MultiLineString(travels)
         if cuts:
-            cutsgeom = unary_union([geo['geom'] for geo in cuts])
+            cutsgeom = MultiLineString(cuts)
 
         # Render the SVG Xml
         # The scale factor affects the size of the lines, and the stroke color adds different formatting for each set
@@ -0,0 +1,386 @@
+############################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# http://flatcam.org                                       #
+# MIT Licence                                              #
+############################################################
+
+import time
+from math import floor, hypot, inf, sqrt
+
+import numpy as np
+
+from .utils import setup_log
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+log = setup_log("fcCamlib.drillorder")
+
+
+def travel(points, order, start=(0, 0)):
+    """
+    Length of the path from ``start`` through ``points`` in the
+    given order.
+
+    :param points: (n, 2) array of coordinates.
+    :param order: Indexes into ``points``.
+    :param start: Where the path starts.
+    :rtype: float
+    """
+    if len(order) == 0:
+        return 0.0
+    path = np.vstack([np.asarray(start, dtype=float).reshape(1, 2), points[order]])
+    return float(np.hypot(*np.diff(path, axis=0).T).sum())
+
+
+def nearest_neighbours(points, k, deadline=None):
+    """
+    The ``k`` nearest other points of each point, closest first.
+
+    :param points: (n, 2) array of coordinates.
+    :param k: Number of neighbours.
+    :param deadline: ``time.perf_counter()`` value to give up at.
+    :return: (n, k') array of indexes, with k' = min(k, n - 1), or
+        None if ``deadline`` was reached first.
+    """
+    k = min(k, len(points) - 1)
+    if k <= 0:
+        return np.empty((len(points), 0), dtype=np.intp)
+
+    if deadline is not None and time.perf_counter() > deadline:
+        return None
+
+    if cKDTree is not None:
+        return cKDTree(points).query(points, k=k + 1)[1][:, 1:]
+
+    # Without SciPy, by rows of the distance matrix.
+    result = np.empty((len(points), k), dtype=np.intp)
+    for first in range(0, len(points), 1024):
+        if deadline is not None and time.perf_counter() > deadline:
+            return None
+        block = points[first:first + 1024]
+        dist = np.hypot(block[:, None, 0] - points[None, :, 0], block[:, None, 1] - points[None, :, 1])
+        dist[np.arange(len(block)), np.arange(first, first + len(block))] = np.inf
+        nearest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        by_dist = np.take_along_axis(dist, nearest, axis=1).argsort(axis=1)
+        result[first:first + len(block)] = np.take_along_axis(nearest, by_dist, axis=1)
+    return result
+
+
+class _Grid:
+    """
+    Points in square cells, for nearest point queries without SciPy.
+    Cells hold about 4 points each.
+    """
+
+    def __init__(self, points, indexes):
+        self.xs = points[:, 0].tolist()
+        self.ys = points[:, 1].tolist()
+
+        xy = points[indexes]
+        self.x0, self.y0 = xy.min(axis=0).tolist()
+        width, height = (xy.max(axis=0) - xy.min(axis=0)).tolist()
+        self.size = max(2 * sqrt(width * height / len(indexes)), width / 1024, height / 1024, 1e-9)
+
+        self.cells = {}
+        cells = np.floor((xy - (self.x0, self.y0)) / self.size).astype(np.intp).tolist()
+        for i, cell in zip(indexes.tolist(), cells):
+            self.cells.setdefault(tuple(cell), []).append(i)
+
+    def cell(self, x, y):
+        return floor((x - self.x0) / self.size), floor((y - self.y0) / self.size)
+
+    def remove(self, i):
+        key = self.cell(self.xs[i], self.ys[i])
+        cell = self.cells[key]
+        cell.remove(i)
+        if len(cell) == 0:
+            del self.cells[key]
+
+    def nearest(self, x, y):
+        """
+        Closest point to (x, y), searching rings of cells outwards
+        until no closer point can be in the next ring. Scans all the
+        cells instead once the ring has more cells than the grid has
+        left.
+
+        :return: Index of the point, or None if the grid is empty.
+        """
+        xs, ys = self.xs, self.ys
+        best, best_d = None, inf
+        cx, cy = self.cell(x, y)
+        r = 0
+        while len(self.cells) > 0:
+            if 8 * r >= len(self.cells):
+                ring = self.cells.values()
+            elif r == 0:
+                ring = [self.cells.get((cx, cy), ())]
+            else:
+                ring = [self.cells.get((cx + dx, cy + dy), ())
+                        for dx in range(-r, r + 1) for dy in ((-r, r) if abs(dx) < r else range(-r, r + 1))]
+            for cell in ring:
+                for i in cell:
+                    d = hypot(xs[i] - x, ys[i] - y)
+                    if d < best_d:
+                        best, best_d = i, d
+            # Points beyond this ring are at least r cells away.
+            if 8 * r >= len(self.cells) or (best is not None and best_d <= r * self.size):
+                break
+            r += 1
+        return best
+
+
+def nearest_neighbour_order(points, start=(0, 0)):
+    """
+    Greedy order: from ``start``, always go to the closest point not
+    visited yet. Candidates come from a KD-tree of the remaining
+    points that is rebuilt whenever half of them have been visited,
+    or from a grid of them, likewise rebuilt, without SciPy.
+
+    :param points: (n, 2) array of coordinates.
+    :param start: Where the path starts.
+    :return: Array of indexes into ``points``.
+    """
+    n = len(points)
+    order = np.empty(n, dtype=np.intp)
+    visited = np.zeros(n, dtype=bool)
+    current = np.asarray(start, dtype=float)
+
+    if cKDTree is None:
+        x, y = current.tolist()
+        i = 0
+        while i < n:
+            remaining = np.flatnonzero(~visited)
+            grid = _Grid(points, remaining)
+            rebuild_at = i + len(remaining) // 2 + 1
+            while i < n and i < rebuild_at:
+                nxt = grid.nearest(x, y)
+                grid.remove(nxt)
+                visited[nxt] = True
+                order[i] = nxt
+                x, y = grid.xs[nxt], grid.ys[nxt]
+                i += 1
+        return order
+
+    i = 0
+    while i < n:
+        remaining = np.flatnonzero(~visited)
+        tree = cKDTree(points[remaining])
+        rebuild_at = i + len(remaining) // 2 + 1
+        while i < n and i < rebuild_at:
+            k = 8
+            while True:
+                kk = min(k, len(remaining))
+                _, idx = tree.query(current, k=kk)
+                idx = np.atleast_1d(idx)
+                candidates = remaining[idx]
+                free = candidates[~visited[candidates]]
+                if len(free) > 0 or kk == len(remaining):
+                    break
+                k *= 4
+            nxt = int(free[0])
+            visited[nxt] = True
+            order[i] = nxt
+            current = points[nxt]
+            i += 1
+    return order
+
+
+def improve_order(points, order, start=(0, 0), deadline=None, neighbours=8):
+    """
+    Shortens the path given by ``order`` with 2-opt and Or-opt moves
+    (segments of 1 to 3 points moved elsewhere, possibly reversed).
+    Only moves that join a point to one of its ``neighbours`` nearest
+    points are tried. Points whose surroundings changed are queued
+    to be looked at again, until no move improves the path or
+    ``deadline`` is reached. The path is open: it starts at
+    ``start`` and ends anywhere.
+
+    :param points: (n, 2) array of coordinates.
+    :param order: Initial order, i.e. from ``nearest_neighbour_order()``.
+    :param start: Where the path starts.
+    :param deadline: ``time.perf_counter()`` value to stop at.
+    :param neighbours: Candidate neighbours per point.
+    :return: Array of indexes into ``points``.
+    """
+    n = len(points)
+    if n < 3:
+        return order
+
+    near = nearest_neighbours(points, neighbours, deadline)
+    if near is None:
+        log.debug("No time left in the budget to improve the drill order.")
+        return order
+    near = near.tolist()
+
+    # The start is node n, fixed at position 0.
+    xs = points[:, 0].tolist() + [float(start[0])]
+    ys = points[:, 1].tolist() + [float(start[1])]
+    tour = [n] + list(order)
+    pos = [0] * (n + 1)
+    for p, node in enumerate(tour):
+        pos[node] = p
+    last = n  # Position of the last node
+
+    def d(a, b):
+        return hypot(xs[a] - xs[b], ys[a] - ys[b])
+
+    def d_next(p):
+        """Length of the edge after position p."""
+        return d(tour[p], tour[p + 1]) if p < last else 0.0
+
+    def two_opt_gain(p, q):
+        """Gain of reversing tour[p + 1:q + 1], p < q."""
+        a, b, c = tour[p], tour[p + 1], tour[q]
+        if q < last:
+            e = tour[q + 1]
+            return d(a, b) + d(c, e) - d(a, c) - d(b, e)
+        return d(a, b) - d(a, c)
+
+    def reverse(p, q):
+        tour[p + 1:q + 1] = tour[p + 1:q + 1][::-1]
+        for k in range(p + 1, q + 1):
+            pos[tour[k]] = k
+
+    def move_segment(i, length, p, reverse_segment):
+        """Moves tour[i:i + length] after position p (outside it)."""
+        seg = tour[i:i + length]
+        if reverse_segment:
+            seg.reverse()
+        if p < i:
+            tour[p + 1:i + length] = seg + tour[p + 1:i]
+            lo, hi = p + 1, i + length
+        else:
+            tour[i:p + 1] = tour[i + length:p + 1] + seg
+            lo, hi = i, p + 1
+        for k in range(lo, hi):
+            pos[tour[k]] = k
+
+    def try_two_opt(a):
+        i = pos[a]
+        for c in near[a]:
+            j = pos[c]
+            # New edge a-c replacing the edges after a and after c.
+            p, q = (i, j) if i < j else (j, i)
+            if q > p + 1 and two_opt_gain(p, q) > 1e-9:
+                reverse(p, q)
+                return [tour[p], tour[p + 1], tour[q]] + ([tour[q + 1]] if q < last else [])
+            # New edge a-c replacing the edges before a and before c.
+            p, q = (i - 1, j - 1) if i < j else (j - 1, i - 1)
+            if p >= 0 and q > p + 1 and two_opt_gain(p, q) > 1e-9:
+                reverse(p, q)
+                return [tour[p], tour[p + 1], tour[q]] + ([tour[q + 1]] if q < last else [])
+        return None
+
+    def try_or_opt(a):
+        for length in (1, 2, 3):
+            for i in range(max(pos[a] - length + 1, 1), pos[a] + 1):
+                if i + length - 1 > last:
+                    break
+                first, end = tour[i], tour[i + length - 1]
+                prev = tour[i - 1]
+                removed = d(prev, first) + d_next(i + length - 1)
+                if i + length - 1 < last:
+                    removed -= d(prev, tour[i + length])
+                if removed <= 1e-9:
+                    continue
+
+                for c in near[first] + near[end]:
+                    pc = pos[c]
+                    if i <= pc < i + length:
+                        continue
+                    # Insert after c, or after its predecessor.
+                    for p in (pc, pc - 1):
+                        if p < 0 or i - 1 <= p < i + length:
+                            continue
+                        u = tour[p]
+                        v = tour[p + 1] if p < last else None
+                        base = d(u, v) if v is not None else 0.0
+                        for rev in (False, True):
+                            head, tail = (end, first) if rev else (first, end)
+                            added = d(u, head) + (d(tail, v) if v is not None else 0.0) - base
+                            if removed - added > 1e-9:
+                                touched = [prev, first, end, u] + ([v] if v is not None else [])
+                                if i + length - 1 < last:
+                                    touched.append(tour[i + length])
+                                move_segment(i, length, p, rev)
+                                return touched
+        return None
+
+    queue = list(reversed(tour[1:]))
+    queued = [True] * (n + 1)
+    steps = 0
+    while queue:
+        steps += 1
+        if deadline is not None and steps % 64 == 0 and time.perf_counter() > deadline:
+            log.debug("Drill order improvement stopped by the time budget.")
+            break
+
+        a = queue.pop()
+        queued[a] = False
+        touched = try_two_opt(a) or try_or_opt(a)
+        if touched:
+            for t in touched:
+                if t != n and not queued[t]:
+                    queued[t] = True
+                    queue.append(t)
+
+    return np.array(tour[1:], dtype=np.intp)
+
+
+class DrillOrder:
+    """
+    Sequences the holes of a tool to shorten rapid travel between
+    them. The method is one of the keys in ``methods``, functions
+    taking (points, start, deadline) and returning the order as
+    indexes into points. More methods can be added to ``methods``.
+
+    ``defaults["time_budget"]`` is the time in seconds after which
+    improvement of the order of a tool stops. It counts from the start
+    of ``order()``. The greedy construction is always completed.
+    """
+
+    defaults = {
+        "time_budget": 1.0,
+        "neighbours": 8
+    }
+
+    methods = {
+        # Order of the file
+        "file": lambda points, start, deadline: np.arange(len(points)),
+        # Greedy construction only
+        "nearest": lambda points, start, deadline: nearest_neighbour_order(points, start),
+        # Greedy construction then 2-opt and Or-opt
+        "optimized": lambda points, start, deadline: improve_order(
+            points, nearest_neighbour_order(points, start), start, deadline,
+            DrillOrder.defaults["neighbours"])
+    }
+
+    def __init__(self, method="file"):
+        if method not in self.methods:
+            raise ValueError("Unknown drill order method: %s" % method)
+        self.method = method
+
+    def order(self, points, start=(0, 0)):
+        """
+        Drilling order of the given holes.
+
+        :param points: (n, 2) array of hole coordinates.
+        :param start: Where the tool is before the first hole.
+        :return: (order, travel before, travel after), where order is
+            an array of indexes into ``points`` and the travels are the
+            lengths of the path from ``start`` in file order and in the
+            new order.
+        :rtype: tuple
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        deadline = time.perf_counter() + self.defaults["time_budget"]
+        order = self.methods[self.method](points, start, deadline)
+
+        before = travel(points, np.arange(len(points)), start)
+        after = travel(points, order, start)
+        if after > before:  # Never worse than the file.
+            order, after = np.arange(len(points)), before
+        return order, before, after
@@ -0,0 +1,300 @@
+############################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# http://flatcam.org                                       #
+# MIT Licence                                              #
+############################################################
+
+from collections.abc import Sequence
+
+import numpy as np
+from shapely.geometry import Point
+
+
+class DrillTable:
+    """
+    Drill holes of an Excellon object stored by column: x and y
+    coordinates and the index of the tool in ``tool_names``, one
+    NumPy array each. Appending grows the arrays geometrically, so it
+    is amortized O(1).
+
+    Transformations act on all holes in a single array operation and
+    the holes of a tool are found with ``by_tool()``.
+    """
+
+    def __init__(self):
+        self._xy = np.empty((0, 2))
+        self._tool = np.empty(0, dtype=np.int32)
+        self._n = 0
+
+        # Index in this list is what is stored in the tool column.
+        self.tool_names = []
+        self._tool_ids = {}
+
+        # Cache of by_tool(), cleared on any change.
+        self._groups = None
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def xy(self):
+        """
+        (n, 2) array of hole coordinates. A view: modifying it
+        modifies the table.
+        """
+        return self._xy[:self._n]
+
+    @property
+    def x(self):
+        return self._xy[:self._n, 0]
+
+    @property
+    def y(self):
+        return self._xy[:self._n, 1]
+
+    @property
+    def tool(self):
+        """
+        Array of indexes in ``tool_names``, one per hole.
+        """
+        return self._tool[:self._n]
+
+    def tool_id(self, name):
+        """
+        Index of a tool name in ``tool_names``, which is added if
+        missing.
+
+        :param name: Tool name, a key in ``Excellon.tools``.
+        :type name: str
+        :rtype: int
+        """
+        try:
+            return self._tool_ids[name]
+        except KeyError:
+            self._tool_ids[name] = len(self.tool_names)
+            self.tool_names.append(name)
+            return self._tool_ids[name]
+
+    def _reserve(self, n):
+        if n <= len(self._tool):
+            return
+        size = max(n, 2 * len(self._tool), 64)
+        xy = np.empty((size, 2))
+        xy[:self._n] = self.xy
+        tool = np.empty(size, dtype=np.int32)
+        tool[:self._n] = self.tool
+        self._xy, self._tool = xy, tool
+
+    def append(self, x, y, tool):
+        """
+        Adds a hole.
+
+        :param x: X coordinate.
+        :param y: Y coordinate.
+        :param tool: Tool name.
+        :type tool: str
+        :return: None
+        """
+        self._reserve(self._n + 1)
+        self._xy[self._n] = x, y
+        self._tool[self._n] = self.tool_id(tool)
+        self._n += 1
+        self._groups = None
+
+    def extend(self, xy, tool):
+        """
+        Adds holes.
+
+        :param xy: (n, 2) array-like of coordinates.
+        :param tool: Tool name for all of them, or a sequence of
+            tool names, one per hole.
+        :return: None
+        """
+        xy = np.asarray(xy, dtype=float).reshape(-1, 2)
+        if isinstance(tool, str):
+            ids = np.full(len(xy), self.tool_id(tool), dtype=np.int32)
+        else:
+            ids = np.fromiter((self.tool_id(t) for t in tool), dtype=np.int32, count=len(xy))
+
+        self._reserve(self._n + len(xy))
+        self._xy[self._n:self._n + len(xy)] = xy
+        self._tool[self._n:self._n + len(xy)] = ids
+        self._n += len(xy)
+        self._groups = None
+
+    def extend_table(self, other):
+        """
+        Adds all holes of another table, matching tools by name.
+
+        :param other: Table to copy the holes from.
+        :type other: DrillTable
+        :return: None
+        """
+        remap = np.array([self.tool_id(name) for name in other.tool_names] or [0], dtype=np.int32)
+        n = len(other)
+        self._reserve(self._n + n)
+        self._xy[self._n:self._n + n] = other.xy
+        self._tool[self._n:self._n + n] = remap[other.tool]
+        self._n += n
+        self._groups = None
+
+    def by_tool(self):
+        """
+        Indexes of the holes of each tool, in the order they were
+        added. Computed with a single stable sort and cached until the
+        table changes.
+
+        :return: Tool name -> array of indexes. Tools without holes
+            are not included.
+        :rtype: dict
+        """
+        if self._groups is None:
+            order = np.argsort(self.tool, kind='stable')
+            counts = np.bincount(self.tool, minlength=len(self.tool_names))
+            ends = np.cumsum(counts)
+            self._groups = {name: order[end - count:end]
+                            for name, count, end in zip(self.tool_names, counts, ends)
+                            if count > 0}
+        return self._groups
+
+    def points(self, tool=None):
+        """
+        Coordinates of the holes of a tool, or of all holes.
+
+        :param tool: Tool name or None for all.
+        :return: (n, 2) array. A copy unless ``tool`` is None.
+        :rtype: numpy.ndarray
+        """
+        if tool is None:
+            return self.xy
+        idx = self.by_tool().get(tool)
+        if idx is None:
+            return np.empty((0, 2))
+        return self.xy[idx]
+
+    def translate(self, dx, dy):
+        self.xy[:] += (dx, dy)
+
+    def scale(self, xfactor, yfactor, origin=(0, 0)):
+        """
+        Scales the coordinates around ``origin``. Negative factors
+        mirror.
+        """
+        xy = self.xy
+        xy -= origin
+        xy *= (xfactor, yfactor)
+        xy += origin
+
+    def copy(self):
+        table = DrillTable()
+        table._xy = self.xy.copy()
+        table._tool = self.tool.copy()
+        table._n = self._n
+        table.tool_names = list(self.tool_names)
+        table._tool_ids = dict(self._tool_ids)
+        return table
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def records(self):
+        """
+        The holes as ``{'point': Point, 'tool': str}`` dictionaries,
+        the form ``Excellon.drills`` used to have.
+
+        :return: Generator of dictionaries.
+        """
+        names = self.tool_names
+        for (x, y), t in zip(self.xy.tolist(), self.tool.tolist()):
+            yield {'point': Point(x, y), 'tool': names[t]}
+
+    @classmethod
+    def from_records(cls, drills):
+        """
+        Table from ``{'point': Point, 'tool': str}`` dictionaries.
+        """
+        table = cls()
+        drills = list(drills)
+        table.extend([(d['point'].x, d['point'].y) for d in drills],
+                     [d['tool'] for d in drills])
+        return table
+
+    def to_dict(self):
+        """
+        JSON serializable representation, see ``from_dict()``.
+        """
+        return {
+            "x": self.x.tolist(),
+            "y": self.y.tolist(),
+            "tool": self.tool.tolist(),
+            "tool_names": self.tool_names
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        table = cls()
+        for name in d["tool_names"]:
+            table.tool_id(name)
+        n = len(d["x"])
+        table._reserve(n)
+        table._xy[:n, 0] = d["x"]
+        table._xy[:n, 1] = d["y"]
+        table._tool[:n] = d["tool"]
+        table._n = n
+        return table
+
+
+class DrillView(Sequence):
+    """
+    Read-mostly list of ``{'point': Point, 'tool': str}``
+    dictionaries over a ``DrillTable``, for code written against the
+    old ``Excellon.drills``. The dictionaries are created on access:
+    modifying them does not modify the table, use the table instead.
+    ``append()`` and ``extend()`` add to the table.
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    def __len__(self):
+        return len(self.table)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("drill index out of range")
+        x, y = self.table.xy[index].tolist()
+        return {'point': Point(x, y), 'tool': self.table.tool_names[self.table.tool[index]]}
+
+    def __iter__(self):
+        return self.table.records()
+
+    def append(self, drill):
+        self.table.append(drill['point'].x, drill['point'].y, drill['tool'])
+
+    def extend(self, drills):
+        self.table.extend_table(as_table(drills))
+
+    def __deepcopy__(self, memo):
+        return DrillView(self.table.copy())
+
+    def __repr__(self):
+        return "<DrillView of %d drills>" % len(self)
+
+
+def as_table(drills):
+    """
+    ``DrillTable`` from any of the values accepted by
+    ``Excellon.drills``: a table, a view or an iterable of
+    ``{'point': Point, 'tool': str}``. Tables are not copied.
+
+    :rtype: DrillTable
+    """
+    if isinstance(drills, DrillTable):
+        return drills
+    if isinstance(drills, DrillView):
+        return drills.table
+    return DrillTable.from_records(drills)
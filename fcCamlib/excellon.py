@@ -8,10 +8,14 @@
 
 import re
 
+import numpy as np
 from shapely.geometry import Point
 
+from .drills import DrillTable, DrillView, as_table
 from .geometry import Geometry
-from .utils import setup_log
+from .parsestats import ParseStats
+from .reader import lines, mapped
+from .utils import setup_log, translate_many
 
 log = setup_log("fcCamlib.excellon")
 
@@ -30,7 +34,12 @@ class Excellon(Geometry):
     Others            Not supported (Ignored).
     ================  ====================================
 
-    * ``drills`` (list): Each is a dictionary:
+    * ``drill_table`` (DrillTable): Coordinates and tool of each
+      hole, stored by column.
+
+    * ``drills`` (DrillView): The holes as a list of dictionaries,
+      for compatibility. Can be set to a list of them, which is
+      converted to a ``DrillTable``:
 
     ================  ====================================
     Key               Value
@@ -56,7 +65,7 @@ class Excellon(Geometry):
         
         self.tools = {}
         
-        self.drills = []
+        self.drill_table = DrillTable()
 
         ## IN|MM -> Units are inherited from Geometry
         #self.units = units
@@ -70,6 +79,15 @@ class Excellon(Geometry):
         # from Geometry.
         self.ser_attrs += ['tools', 'drills', 'zeros']
 
+        # Attributes saved in the parse cache along with solid_geometry.
+        self.cache_attrs = ['units', 'tools', 'drills', 'zeros']
+
+        # solid_geometry is rebuilt from the drills instead.
+        self.cache_geometry = False
+
+        # ParseStats of the last parse, if enabled.
+        self.parse_stats = None
+
         #### Patterns ####
         # Regex basics:
         # ^ - beginning
@@ -139,28 +157,72 @@ class Excellon(Geometry):
         # Parse coordinates
         self.leadingzeros_re = re.compile(r'^[-\+]?(0*)(\d*)')
         
+    @property
+    def drills(self):
+        return DrillView(self.drill_table)
+
+    @drills.setter
+    def drills(self, drills):
+        self.drill_table = as_table(drills)
+
     def parse_file(self, filename):
         """
-        Reads the specified file as array of lines as
-        passes it to ``parse_lines()``.
+        Reads the specified file line by line, through a memory
+        map, and passes the lines to ``parse_lines()``.
 
         :param filename: The file to be read and parsed.
         :type filename: str
         :return: None
         """
-        with open(filename, 'r') as efile:
-            estr = efile.readlines()
-        self.parse_lines(estr)
+        with mapped(filename) as buf:
+            self.parse_lines(lines(buf), source=filename)
 
-    def parse_lines(self, elines):
+    def statement_kind(self, eline):
+        """
+        Name of the kind of an Excellon statement for the parse
+        statistics. Does not know whether the statement is in the
+        header, so it is only approximately what ``parse_lines()``
+        makes of it.
+
+        :param eline: Line of Excellon code.
+        :type eline: str
+        :rtype: str
+        """
+        eline = eline.strip(' \r\n')
+
+        if self.hbegin_re.search(eline) or self.hend_re.search(eline):
+            return "header"
+        if self.meas_re.match(eline) or self.units_re.match(eline):
+            return "units"
+        if self.toolset_re.search(eline) and 'C' in eline:
+            return "tool_def"
+        if self.toolsel_re.search(eline):
+            return "tool_change"
+        if self.coordsperiod_re.search(eline) or self.coordsnoperiod_re.search(eline):
+            return "drill"
+        if self.comm_re.search(eline):
+            return "comment"
+        return "other"
+
+    def parse_lines(self, elines, source=None):
         """
         Main Excellon parser.
 
+        If ``ParseStats`` is enabled, its report is left in
+        ``self.parse_stats``.
+
         :param elines: List of strings, each being a line of Excellon code.
         :type elines: list
+        :param source: Name of the input for the parse statistics.
+        :type source: str
         :return: None
         """
 
+        stats = ParseStats.create(source or "<lines>", "excellon")
+        self.parse_stats = stats
+        if stats is not None:
+            elines = stats.timed(elines, self.statement_kind)
+
         # State variables
         current_tool = ""
         in_header = False
@@ -233,7 +295,7 @@ class Excellon(Geometry):
                             log.error("Missing coordinates")
                             continue
 
-                        self.drills.append({'point': Point((x, y)), 'tool': current_tool})
+                        self.drill_table.append(x, y, current_tool)
                         log.debug("{:15} {:8} {:8}".format(eline, x, y))
                         continue
 
@@ -256,7 +318,7 @@ class Excellon(Geometry):
                             log.error("Missing coordinates")
                             continue
 
-                        self.drills.append({'point': Point((x, y)), 'tool': current_tool})
+                        self.drill_table.append(x, y, current_tool)
                         log.debug("{:15} {:8} {:8}".format(eline, x, y))
                         continue
 
@@ -299,6 +361,10 @@ class Excellon(Geometry):
         except Exception as e:
             log.error("PARSING FAILED. Line %d: %s" % (line_num, eline))
             raise
+
+        finally:
+            if stats is not None:
+                stats.finish()
         
     def parse_number(self, number_str):
         """
@@ -334,20 +400,73 @@ class Excellon(Geometry):
             else:
                 return float(number_str) / 1000  # Metric is 000.000
 
+    @property
+    def solid_geometry(self):
+        """
+        Circles of the holes, built from ``drill_table`` on first
+        access after ``create_geometry()``, or whatever was assigned.
+        """
+        if self._solid_geometry is None:
+            self._solid_geometry = self.drill_geometry()
+            self._geometry_from_drills = True
+        return self._solid_geometry
+
+    @solid_geometry.setter
+    def solid_geometry(self, geometry):
+        self._solid_geometry = geometry
+        self._geometry_from_drills = False
+
     def create_geometry(self):
         """
-        Creates circles of the tool diameter at every point
-        specified in ``self.drills``.
+        Makes ``solid_geometry`` follow ``drill_table``. The circles
+        are not created until ``solid_geometry`` is accessed, i.e. for
+        plotting or export, so transformations do not pay for them.
 
         :return: None
         """
-        self.solid_geometry = []
+        self._solid_geometry = None
+
+    def drill_geometry(self):
+        """
+        Circles of the tool diameter at every point specified in
+        ``self.drill_table``. One circle is made per diameter and
+        copied to each of its holes with a vectorized translation.
+
+        :return: List of polygons.
+        :rtype: list
+        """
+        geometry = []
+        templates = {}
+
+        for tool, idx in self.drill_table.by_tool().items():
+            tooldia = self.tools[tool]['C']
+            if tooldia not in templates:
+                templates[tooldia] = Point(0, 0).buffer(tooldia / 2.0)
+            geometry += translate_many(templates[tooldia], self.drill_table.xy[idx])
+
+        return geometry
+
+    def bounds(self):
+        """
+        Returns coordinates of rectangular bounds
+        of geometry: (xmin, ymin, xmax, ymax).
+
+        Unless ``solid_geometry`` was assigned, computed from the
+        hole coordinates and tool diameters without creating the
+        circles.
+        """
+        if self._solid_geometry is not None and not self._geometry_from_drills:
+            return Geometry.bounds(self)
+
+        if len(self.drill_table) == 0:
+            return 0, 0, 0, 0
 
-        for drill in self.drills:
-            # poly = drill['point'].buffer(self.tools[drill['tool']]["C"]/2.0)
-            tooldia = self.tools[drill['tool']]['C']
-            poly = drill['point'].buffer(tooldia / 2.0)
-            self.solid_geometry.append(poly)
+        radius = np.array([self.tools[name]['C'] / 2.0 if name in self.tools else 0.0
+                           for name in self.drill_table.tool_names])
+        r = radius[self.drill_table.tool]
+        x, y = self.drill_table.x, self.drill_table.y
+        return (float((x - r).min()), float((y - r).min()),
+                float((x + r).max()), float((y + r).max()))
 
     def scale(self, factor):
         """
@@ -361,8 +480,7 @@ class Excellon(Geometry):
         """
 
         # Drills
-        for drill in self.drills:
-            drill['point'] = affinity.scale(drill['point'], factor, factor, origin=(0, 0))
+        self.drill_table.scale(factor, factor)
 
         self.create_geometry()
 
@@ -378,8 +496,7 @@ class Excellon(Geometry):
         dx, dy = vect
 
         # Drills
-        for drill in self.drills:
-            drill['point'] = affinity.translate(drill['point'], xoff=dx, yoff=dy)
+        self.drill_table.translate(dx, dy)
 
         # Recreate geometry
         self.create_geometry()
@@ -398,8 +515,7 @@ class Excellon(Geometry):
         xscale, yscale = {"X": (1.0, -1.0), "Y": (-1.0, 1.0)}[axis]
 
         # Modify data
-        for drill in self.drills:
-            drill['point'] = affinity.scale(drill['point'], xscale, yscale, origin=(px, py))
+        self.drill_table.scale(xscale, yscale, origin=(px, py))
 
         # Recreate geometry
         self.create_geometry()
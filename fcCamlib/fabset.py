@@ -0,0 +1,121 @@
+############################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# http://flatcam.org                                       #
+# MIT Licence                                              #
+############################################################
+
+import os
+import re
+import traceback
+
+from .excellon import Excellon
+from .geometry import Geometry
+from .gerber import Gerber
+from .parsecache import ParseCache
+from .utils import setup_log
+
+log = setup_log("fcCamlib.fabset")
+
+# Used when the contents of a file do not tell.
+GERBER_EXTENSIONS = {'.gbr', '.ger', '.pho', '.art',
+                     '.gtl', '.gbl', '.gts', '.gbs', '.gto', '.gbo', '.gtp', '.gbp',
+                     '.gko', '.gm1', '.gml', '.g1', '.g2', '.g3', '.g4'}
+EXCELLON_EXTENSIONS = {'.drl', '.drd', '.xln', '.exc', '.ncd', '.tap', '.txt'}
+
+_excellon_re = re.compile(r'^(?:M48|T\d+C\d*\.?\d*)', re.MULTILINE)
+_gerber_re = re.compile(r'^(?:%FS|%MO|%AD|G04)', re.MULTILINE)
+
+
+def detect_kind(filename):
+    """
+    Whether a file is Gerber or Excellon, by the first statements
+    in it or else by its extension.
+
+    :param filename: Path to the file.
+    :type filename: str
+    :return: "gerber", "excellon" or None if unknown.
+    :rtype: str
+    """
+    try:
+        with open(filename, 'r', errors='replace') as f:
+            head = f.read(8192)
+    except OSError:
+        return None
+
+    if _gerber_re.search(head):
+        return "gerber"
+    if _excellon_re.search(head):
+        return "excellon"
+
+    ext = os.path.splitext(filename)[1].lower()
+    if ext in GERBER_EXTENSIONS:
+        return "gerber"
+    if ext in EXCELLON_EXTENSIONS:
+        return "excellon"
+    return None
+
+
+def parse_params(kind, units):
+    """
+    Parameters that affect the result of parsing a file of the given
+    kind with the current class defaults. Used both as the parse cache
+    key and to configure ``parse_layer()`` in a worker process, which
+    might not see the defaults of the parent process.
+
+    :param kind: "gerber" or "excellon".
+    :type kind: str
+    :param units: Units of the new object, "IN" or "MM".
+    :type units: str
+    :rtype: dict
+    """
+    if kind == "gerber":
+        return {
+            "steps_per_circle": Gerber.defaults["steps_per_circle"],
+            "use_buffer_for_union": Gerber.defaults["use_buffer_for_union"],
+            "units": units,
+            "arc_tolerance": Geometry.defaults["arc_tolerance"] * (25.4 if units.upper() == "MM" else 1),
+            "follow": False
+        }
+    return {
+        "zeros": Excellon.defaults["zeros"],
+        "units": units
+    }
+
+
+def parse_layer(job):
+    """
+    Process pool worker. Parses one file of a fabrication set.
+
+    :param job: (filename, kind, params) where params come from
+        ``parse_params()``.
+    :type job: tuple
+    :return: (filename, data, error). ``data`` is the parsed object
+        serialized with ``ParseCache.dumps()``, or None if parsing
+        failed, in which case ``error`` holds the traceback.
+    :rtype: tuple
+    """
+    filename, kind, params = job
+
+    try:
+        if kind == "gerber":
+            Gerber.defaults["use_buffer_for_union"] = params["use_buffer_for_union"]
+            obj = Gerber(steps_per_circle=params["steps_per_circle"])
+        else:
+            obj = Excellon(zeros=params["zeros"])
+        obj.units = params["units"]
+
+        # arc_tolerance() scales the default by the units of the object.
+        tolerance = params.get("arc_tolerance")
+        if tolerance is not None:
+            Geometry.defaults["arc_tolerance"] = tolerance / (25.4 if obj.units.upper() == "MM" else 1)
+
+        if kind == "gerber":
+            obj.parse_file(filename, follow=params["follow"])
+        else:
+            obj.parse_file(filename)
+            obj.create_geometry()
+
+        return filename, ParseCache.dumps(obj), None
+
+    except Exception:
+        return filename, None, traceback.format_exc()
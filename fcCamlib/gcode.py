@@ -0,0 +1,400 @@
+############################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# http://flatcam.org                                       #
+# MIT Licence                                              #
+############################################################
+
+import numpy as np
+
+from .reader import CHUNK_SIZE
+from .toolpath import Toolpaths, kind_code
+from .utils import arcs, setup_log
+
+log = setup_log("fcCamlib.gcode")
+
+# Column of each letter in the table made by tokenize().
+COLUMNS = "GXYZIJF"
+_column_of = np.full(256, -1, dtype=np.intp)
+_column_of[[ord(letter) for letter in COLUMNS]] = np.arange(len(COLUMNS))
+
+
+class GCodeEmitter:
+    """
+    Accumulates G-code as a list of pre-formatted chunks instead of
+    growing a string, so appending costs no copies. With a ``file``,
+    chunks are written out whenever ``buffer_size`` characters have
+    accumulated, and memory use does not grow with the program.
+
+    Example::
+
+        gc = GCodeEmitter()
+        gc.write("G20\\n")
+        gcode = gc.getvalue()
+    """
+
+    def __init__(self, file=None, buffer_size=1 << 16):
+        """
+        :param file: Text file object to write to, or None to keep
+            the G-code in memory, see ``getvalue()``.
+        :param buffer_size: Characters held before writing to ``file``.
+        :type buffer_size: int
+        """
+        self.file = file
+        self.buffer_size = buffer_size
+        self._chunks = []
+        self._size = 0
+
+    def write(self, chunk):
+        """
+        Appends a chunk of G-code. Chunks are not separated: each
+        is expected to end in a newline.
+
+        :param chunk: G-code.
+        :type chunk: str
+        :return: None
+        """
+        self._chunks.append(chunk)
+        if self.file is not None:
+            self._size += len(chunk)
+            if self._size >= self.buffer_size:
+                self.flush()
+
+    def writelines(self, lines):
+        """
+        Appends each chunk of an iterable of G-code, i.e. the lines
+        yielded by ``lines()`` of another emitter.
+
+        :param lines: Iterable of str.
+        :return: None
+        """
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        """
+        Writes the pending chunks to ``file``. Does nothing without one.
+        """
+        if self.file is None:
+            return
+        self.file.write("".join(self._chunks))
+        self._chunks = []
+        self._size = 0
+
+    def getvalue(self):
+        """
+        The G-code written so far, as a single string. Only for
+        in-memory emitters.
+
+        :rtype: str
+        """
+        if self.file is not None:
+            raise ValueError("G-code was written to a file.")
+        value = "".join(self._chunks)
+        self._chunks = [value]
+        return value
+
+    def chunks(self):
+        """
+        The chunks of G-code written so far, each ending at the end of
+        a line. Only for in-memory emitters.
+
+        :return: Iterator of str.
+        """
+        if self.file is not None:
+            raise ValueError("G-code was written to a file.")
+        return iter(self._chunks)
+
+    def lines(self):
+        """
+        Yields the G-code written so far one line at a time, each with
+        its newline, without joining the chunks into a single string.
+        Only for in-memory emitters.
+
+        :return: Generator of str.
+        """
+        if self.file is not None:
+            raise ValueError("G-code was written to a file.")
+        partial = ""
+        for chunk in self._chunks:
+            start = 0
+            end = chunk.find("\n")
+            while end >= 0:
+                if partial:
+                    yield partial + chunk[start:end + 1]
+                    partial = ""
+                else:
+                    yield chunk[start:end + 1]
+                start = end + 1
+                end = chunk.find("\n", start)
+            partial += chunk[start:]
+        if partial:
+            yield partial
+
+
+class PathCode:
+    """
+    G-code for the moves along a path, formatted once and reused, i.e.
+    by every pass of a multi-depth cut: the rapid move to its first
+    point and the linear moves through the rest.
+    """
+
+    def __init__(self, coords, coordinate_format):
+        """
+        :param coords: (n, 2) array-like of coordinates, n > 0.
+        :param coordinate_format: Format of a point, i.e. "X%.4fY%.4f".
+        :type coordinate_format: str
+        """
+        self.coords = np.asarray(coords, dtype=float)[:, :2]
+        self.coordinate_format = coordinate_format
+        self.start = tuple(self.coords[0].tolist())
+        self.end = tuple(self.coords[-1].tolist())
+
+        flat = tuple(self.coords.ravel().tolist())
+        self.rapid = ("G00 " + coordinate_format + "\n") % flat[:2]
+        self.feed = ("G01 " + coordinate_format + "\n") * (len(self.coords) - 1) % flat[2:]
+
+        self._reversed = None
+
+    def reversed(self):
+        """
+        The same path in the opposite direction. Formatted on first
+        use only.
+
+        :rtype: PathCode
+        """
+        if self._reversed is None:
+            self._reversed = PathCode(self.coords[::-1], self.coordinate_format)
+            self._reversed._reversed = self
+        return self._reversed
+
+
+def _tokenize_block(buf):
+    """
+    ``tokenize()`` for a block of whole lines, see there.
+
+    :param buf: G-code.
+    :type buf: bytes
+    :return: (table, units)
+    """
+    if not buf.endswith(b'\n'):
+        buf += b'\n'
+    b = np.frombuffer(buf, dtype=np.uint8)
+
+    newline = b == ord('\n')
+    line = np.cumsum(newline, dtype=np.intp) - newline
+    line_start = np.flatnonzero(np.concatenate([[True], newline[:-1]]))
+
+    upper = (b >= ord('A')) & (b <= ord('Z'))
+    digit = (b >= ord('0')) & (b <= ord('9'))
+    dot = b == ord('.')
+    minus = b == ord('-')
+    number = digit | dot | minus | (b == ord('+'))
+    space = (b == ord(' ')) | ((b >= ord('\t')) & (b <= ord('\r')) & ~newline)
+
+    def in_line(mask):
+        # Count of mask up to each character, from the start of its line.
+        count = np.cumsum(mask, dtype=np.int32)
+        return count - (count[line_start] - mask[line_start])[line]
+
+    # Words are a letter followed by a number, possibly with spaces.
+    # Parsing of a line stops at anything else.
+    stop = ~(upper | number | space | newline)
+    stop |= number & (in_line(upper) == 0)
+    stop[:-1] |= upper[:-1] & (upper[1:] | newline[1:] | stop[1:])
+    words = in_line(stop) == 0
+
+    letters = np.flatnonzero(upper & words)
+    word = np.cumsum(upper & words, dtype=np.intp) - 1
+    n_words = len(letters)
+
+    # value = mantissa / 10 ** decimals, exact as long as the
+    # mantissa has at most 15 digits.
+    digits = np.flatnonzero(digit & words)
+    dword = word[digits]
+    n_digits = np.bincount(dword, minlength=n_words)
+    first_digit = np.cumsum(n_digits) - n_digits
+    power = n_digits[dword] - 1 - (np.arange(len(digits)) - first_digit[dword])
+    mantissa = np.bincount(dword, weights=(b[digits] - ord('0')) * 10.0 ** power, minlength=n_words)
+
+    dots = np.flatnonzero(dot & words)
+    dot_at = np.full(n_words, len(b))
+    np.minimum.at(dot_at, word[dots], dots)
+    decimals = np.bincount(dword, weights=digits > dot_at[dword], minlength=n_words)
+
+    value = mantissa / 10.0 ** decimals
+    value[word[np.flatnonzero(minus & words)]] *= -1
+    value[n_digits == 0] = np.nan
+
+    ## One row per line with words in COLUMNS.
+    column = _column_of[b[letters]]
+    known = column >= 0
+    rows, row = np.unique(line[letters[known]], return_inverse=True)
+    table = np.full((len(rows), len(COLUMNS)), np.nan)
+    table[row, column[known]] = value[known]
+
+    units = None
+    unit_rows = (table[:, 0] == 20.0) | (table[:, 0] == 21.0)
+    if unit_rows.any():
+        units = "IN" if table[unit_rows][-1, 0] == 20.0 else "MM"
+        table = table[~unit_rows]
+
+    return table, units
+
+
+def _blocks(chunks, size=CHUNK_SIZE):
+    """
+    Joins G-code chunks into blocks of about ``size`` characters that
+    end at the end of a line. Longer chunks are split.
+
+    :param chunks: Iterable of str, each ending at the end of a line
+        except maybe the last.
+    :return: Generator of bytes.
+    """
+    pending = []
+    length = 0
+    for chunk in chunks:
+        while len(chunk) > size:
+            cut = chunk.rfind("\n", 0, size) + 1 or chunk.find("\n", size) + 1 or len(chunk)
+            pending.append(chunk[:cut])
+            yield "".join(pending).encode('latin-1', 'replace')
+            pending = []
+            length = 0
+            chunk = chunk[cut:]
+        pending.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield "".join(pending).encode('latin-1', 'replace')
+            pending = []
+            length = 0
+    if length > 0:
+        yield "".join(pending).encode('latin-1', 'replace')
+
+
+def tokenize(chunks):
+    """
+    Reads the words of a G-code program, i.e. "G01 X1.0Y2.0", into a
+    table with one row per line with words and one column per letter
+    in ``COLUMNS``. Letters missing from a line are NaN. Other letters
+    are ignored, and so are lines setting units (G20, G21), whose
+    units are returned instead. Words are only read at the beginning
+    of a line, up to anything else, like a comment.
+
+    The program is read in blocks of about ``CHUNK_SIZE`` characters,
+    each tokenized with array operations on its bytes.
+
+    :param chunks: Iterable of str, each ending at the end of a line,
+        i.e. ``GCodeEmitter.chunks()``.
+    :return: (table, units): (n, len(COLUMNS)) array and "IN", "MM"
+        or None if the program does not set units.
+    :rtype: tuple
+    """
+    tables = [np.empty((0, len(COLUMNS)))]
+    units = None
+    for block in _blocks(chunks):
+        table, block_units = _tokenize_block(block)
+        tables.append(table)
+        units = block_units or units
+    return np.concatenate(tables), units
+
+
+def _modal(column, default):
+    """
+    Value in effect at each row of a column of ``tokenize()``: the
+    last one given at or before the row, or ``default``.
+    """
+    given = ~np.isnan(column)
+    last = np.maximum.accumulate(np.where(given, np.arange(len(column)), -1))
+    return np.where(last >= 0, column[np.maximum(last, 0)], default)
+
+
+def parse_gcode(lines, steps_per_circ=20, tolerance=None):
+    """
+    Parses a G-code program into the paths followed by the tool on
+    the XY plane. A path ends where the Z coordinate is set, and the
+    next one starts where it ended. The kind, Z and feedrate of a path
+    are those of the last move before it ended. The kind is travel
+    ("T") above Z = 0, cut ("C") otherwise, fast ("F") with G00, slow
+    ("S") otherwise.
+
+    The program is read with ``tokenize()``; positions, paths and
+    arcs (G02, G03) are then worked out for the whole program with
+    array operations.
+
+    :param lines: Iterable of lines of G-code.
+    :param steps_per_circ: Segments per circle for arcs, if no
+        ``tolerance``.
+    :param tolerance: Maximum chordal error of arcs.
+    :return: (toolpaths, units), see ``tokenize()`` for units.
+    :rtype: tuple
+    """
+    table, units = tokenize(lines)
+    g, x, y, z, i, j, f = table.T
+    n = len(table)
+    if n == 0:
+        return Toolpaths(), units
+
+    mode = _modal(g, 0).astype(int)
+    x_at, y_at, z_at = _modal(x, 0.0), _modal(y, 0.0), _modal(z, 0.0)
+    moves = ~np.isnan(x) | ~np.isnan(y)
+
+    z_set = np.flatnonzero(~np.isnan(z))
+    z_prev = np.concatenate([[0.0], z_at[:-1]])
+    skewed = np.count_nonzero(moves[z_set] & (z[z_set] != z_prev[z_set]))
+    if skewed:
+        log.warning("Non-orthogonal motion in %d lines." % skewed)
+
+    ## Points of each row, one per line and steps + 1 per arc.
+    line_rows = np.flatnonzero(moves & (mode >= 0) & (mode <= 1))
+    arc_rows = np.flatnonzero(moves & (mode >= 2) & (mode <= 3))
+
+    x_from = np.concatenate([[0.0], x_at[:-1]])
+    y_from = np.concatenate([[0.0], y_at[:-1]])
+    ai = np.nan_to_num(i[arc_rows])
+    aj = np.nan_to_num(j[arc_rows])
+    centers = np.column_stack([x_from[arc_rows] + ai, y_from[arc_rows] + aj])
+    arc_points, arc_counts = arcs(centers, np.sqrt(ai ** 2 + aj ** 2),
+                                  np.arctan2(-aj, -ai),
+                                  np.arctan2(y_at[arc_rows] - centers[:, 1], x_at[arc_rows] - centers[:, 0]),
+                                  np.where(mode[arc_rows] == 2, -1, 1),
+                                  steps_per_circ, tolerance)
+
+    counts = np.zeros(n, dtype=np.intp)
+    counts[line_rows] = 1
+    counts[arc_rows] = arc_counts
+
+    # Position of the first point of each row in the sequence of all
+    # points, which starts at (0, 0).
+    first = np.ones(n + 1, dtype=np.intp)
+    first[1:] += np.cumsum(counts)
+
+    points = np.empty((first[-1], 2))
+    points[0] = 0, 0
+    points[first[line_rows], 0] = x_at[line_rows]
+    points[first[line_rows], 1] = y_at[line_rows]
+    arc_start = np.cumsum(arc_counts) - arc_counts
+    points[np.arange(len(arc_points)) + np.repeat(first[arc_rows] - arc_start, arc_counts)] = arc_points
+
+    ## Paths. Each path goes from the last point before the previous
+    # Z change to the last point before the next one.
+    ends = np.concatenate([first[z_set], [len(points)]])
+    starts = np.concatenate([[1], ends[:-1]]) - 1
+
+    # Kind of the last move before each end.
+    last_move = np.maximum.accumulate(np.where(moves, np.arange(n), -1))
+    kind_rows = np.concatenate([[-1], last_move])[np.concatenate([z_set, [n]])]
+    row = np.maximum(kind_rows, 0)
+    kinds = np.where(kind_rows >= 0, 2 * (z_at[row] > 0) + (mode[row] > 0), kind_code("CF"))
+
+    # Z and feedrate of that move.
+    z_path = np.where(kind_rows >= 0, z_at[row], 0.0)
+    feeds = np.where(kind_rows >= 0, _modal(f, np.nan)[row], np.nan)
+
+    keep = ends - starts > 1
+    starts, ends, kinds, z_path, feeds = starts[keep], ends[keep], kinds[keep], z_path[keep], feeds[keep]
+
+    lengths = ends - starts
+    offsets = np.zeros(len(lengths) + 1, dtype=np.intp)
+    offsets[1:] = np.cumsum(lengths)
+    index = np.arange(offsets[-1]) - np.repeat(offsets[:-1] - starts, lengths)
+
+    return Toolpaths(points[index], offsets, kinds, z_path, feeds), units
@@ -6,15 +6,20 @@
 # MIT Licence                                              #
 ############################################################
 
+import numpy as np
 from shapely import affinity
 from shapely.geometry import Polygon, LineString, Point, LinearRing
-from shapely.geometry import MultiPoint, MultiPolygon
+from shapely.geometry import JOIN_STYLE, MultiPoint, MultiPolygon
 from shapely.geometry import box as shply_box
 from shapely.geometry.base import BaseGeometry
 from shapely.ops import unary_union
+from shapely.prepared import prep
 from shapely.wkt import loads as sloads
 from shapely.wkt import dumps as sdumps
 
+from .fcTree import FlatCAMRTreeStorage
+from .isolation import parallel_buffers
+from .tiling import tiled_buffer
 from .utils import setup_log
 
 log = setup_log("fcCamlib.geometry")
@@ -26,7 +31,8 @@ class Geometry:
     """
 
     defaults = {
-        "init_units": 'in'
+        "init_units": 'in',
+        "arc_tolerance": 0.0001     # Inches. Max. chordal error of arcs.
     }
 
     def __init__(self):
@@ -42,6 +48,26 @@ class Geometry:
         # Flattened geometry (list of paths only)
         self.flat_geometry = []
 
+        # multiprocessing.Pool for tiled buffers, see buffer().
+        self.pool = None
+
+        # Buffers of solid_geometry, see offset_ladder():
+        # (solid_geometry, {join_style: {offset: buffer}})
+        self._ladder = None
+
+    def arc_tolerance(self):
+        """
+        Maximum chordal error when approximating arcs with
+        straight segments, in the units of this object.
+
+        :return: Tolerance
+        :rtype: float
+        """
+        tolerance = Geometry.defaults["arc_tolerance"]
+        if tolerance and self.units.upper() == "MM":
+            return tolerance * 25.4
+        return tolerance
+
     def add_circle(self, origin, radius):
         """
         Adds a circle to the object.
@@ -353,7 +379,62 @@ class Geometry:
         :return: The buffered geometry.
         :rtype: Shapely.MultiPolygon or Shapely.Polygon
         """
-        return self.solid_geometry.buffer(offset)
+        return self.buffer(offset)
+
+    def buffer(self, distance, **kwargs):
+        """
+        Buffer of self.solid_geometry. Large geometry is buffered
+        by tiles, in self.pool if set. See ``tiled_buffer()``.
+
+        :param distance: Buffer distance. Negative shrinks.
+        :type distance: float
+        :param kwargs: Keyword arguments of Shapely's buffer().
+        :return: The buffered geometry.
+        :rtype: Shapely.MultiPolygon or Shapely.Polygon
+        """
+        return tiled_buffer(self.solid_geometry, distance, self.pool, **kwargs)
+
+    def offset_ladder(self, offsets, join_style=JOIN_STYLE.round, pool=None):
+        """
+        Buffers of self.solid_geometry at several offsets.
+
+        The buffers are kept for the current self.solid_geometry
+        (transformations assign a new one) and join style, so asking
+        again, like isolating with one more pass, only computes the
+        offsets not asked for before. Those are computed from the
+        geometry, at once in ``pool`` if there are several (see
+        ``parallel_buffers()``), or one after the other with buffer().
+        Buffering the previous buffer instead is exact for round joins,
+        but slower: it carries all of the vertices of its arcs.
+
+        :param offsets: Buffer distances.
+        :type offsets: list
+        :param join_style: Shapely join style.
+        :param pool: multiprocessing.Pool
+        :return: Generator of (index in offsets, buffer), the ones
+            already computed first, then in order of completion.
+        """
+        geometry = self.solid_geometry
+        if self._ladder is None or self._ladder[0] is not geometry:
+            self._ladder = (geometry, {})
+        rungs = self._ladder[1].setdefault(join_style, {})
+
+        missing = []
+        for i, offset in enumerate(offsets):
+            if offset in rungs:
+                yield i, rungs[offset]
+            else:
+                missing.append(i)
+
+        if pool is not None and len(missing) > 1:
+            computed = ((missing[j], geom) for j, geom in
+                        parallel_buffers(geometry, [offsets[i] for i in missing], pool, join_style=join_style))
+        else:
+            computed = ((i, self.buffer(offsets[i], join_style=join_style)) for i in missing)
+
+        for i, geom in computed:
+            rungs[offsets[i]] = geom
+            yield i, geom
 
     def import_svg(self, filename, flip=True):
         """
@@ -481,13 +562,13 @@ class Geometry:
 
         # current can be a MultiPolygon
         try:
-            for p in current:
+            for p in current.geoms:
                 geoms.insert(p.exterior)
                 for i in p.interiors:
                     geoms.insert(i)
 
         # Not a Multipolygon. Must be a Polygon
-        except TypeError:
+        except AttributeError:
             geoms.insert(current.exterior)
             for i in current.interiors:
                 geoms.insert(i)
@@ -500,13 +581,13 @@ class Geometry:
 
                 # current can be a MultiPolygon
                 try:
-                    for p in current:
+                    for p in current.geoms:
                         geoms.insert(p.exterior)
                         for i in p.interiors:
                             geoms.insert(i)
 
                 # Not a Multipolygon. Must be a Polygon
-                except TypeError:
+                except AttributeError:
                     geoms.insert(current.exterior)
                     for i in current.interiors:
                         geoms.insert(i)
@@ -638,6 +719,22 @@ class Geometry:
         # 10 times the tool diameter
         max_walk = max_walk or 10 * tooldia
 
+        # The tool stays within the boundary when its center stays
+        # within the boundary shrunk by the tool radius. Prepared once
+        # for the many walks tested against it.
+        margin = boundary.buffer(-tooldia / 2)
+        margin_bounds = margin.bounds
+        prepared_margin = prep(margin)
+
+        def can_walk(walk_path):
+            if walk_path.length >= max_walk:
+                return False
+            xmin, ymin, xmax, ymax = walk_path.bounds
+            if not (xmin >= margin_bounds[0] and ymin >= margin_bounds[1] and
+                    xmax <= margin_bounds[2] and ymax <= margin_bounds[3]):
+                return False
+            return prepared_margin.covers(walk_path)
+
         # Assuming geolist is a flat list of flat elements
 
         ## Index first and last points in paths
@@ -662,8 +759,11 @@ class Geometry:
         current_pt = (0, 0)
         pt, geo = storage.nearest(current_pt)
         storage.remove(geo)
-        geo = LineString(geo)
-        current_pt = geo.coords[-1]
+
+        # Coordinates of the path being joined, in pieces. The
+        # LineString is made once, when the tool has to lift.
+        path = [np.asarray(geo.coords)]
+        current_pt = tuple(path[-1][-1].tolist())
         try:
             while True:
                 path_count += 1
@@ -671,46 +771,35 @@ class Geometry:
 
                 pt, candidate = storage.nearest(current_pt)
                 storage.remove(candidate)
-                candidate = LineString(candidate)
+                coords = np.asarray(candidate.coords)
 
                 # If last point in geometry is the nearest
                 # then reverse coordinates.
                 # but prefer the first one if last == first
-                if pt != candidate.coords[0] and pt == candidate.coords[-1]:
-                    candidate.coords = list(candidate.coords)[::-1]
+                if pt != tuple(coords[0].tolist()) and pt == tuple(coords[-1].tolist()):
+                    coords = coords[::-1]
 
                 # Straight line from current_pt to pt.
                 # Is the toolpath inside the geometry?
                 walk_path = LineString([current_pt, pt])
-                walk_cut = walk_path.buffer(tooldia / 2)
 
-                if walk_cut.within(boundary) and walk_path.length < max_walk:
+                if can_walk(walk_path):
                     #log.debug("Walk to path #%d is inside. Joining." % path_count)
 
                     # Completely inside. Append...
-                    geo.coords = list(geo.coords) + list(candidate.coords)
-                    # try:
-                    #     last = optimized_paths[-1]
-                    #     last.coords = list(last.coords) + list(geo.coords)
-                    # except IndexError:
-                    #     optimized_paths.append(geo)
+                    path.append(coords)
 
                 else:
 
                     # Have to lift tool. End path.
                     #log.debug("Path #%d not within boundary. Next." % path_count)
-                    #optimized_paths.append(geo)
-                    optimized_paths.insert(geo)
-                    geo = candidate
-
-                current_pt = geo.coords[-1]
+                    optimized_paths.insert(LineString(np.concatenate(path)))
+                    path = [coords]
 
-                # Next
-                #pt, geo = storage.nearest(current_pt)
+                current_pt = tuple(path[-1][-1].tolist())
 
         except StopIteration:  # Nothing left in storage.
-            #pass
-            optimized_paths.insert(geo)
+            optimized_paths.insert(LineString(np.concatenate(path)))
 
         return optimized_paths
 
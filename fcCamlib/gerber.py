@@ -9,16 +9,22 @@
 import re
 import sys
 import traceback
+from itertools import count
 
 from numpy import arctan2, sqrt, pi, sin, cos
 from shapely import affinity
 from shapely.geometry import Polygon, LineString, Point, MultiPolygon
 from shapely.geometry import box as shply_box
 from shapely.ops import unary_union
+from shapely.prepared import prep
+from rtree import index as rtindex
 
 from .aperture import ApertureMacro
 from .geometry import Geometry
-from .utils import arc, setup_log
+from .parsestats import ParseStats
+from .reader import gerber_statements, mapped
+from .union import parallel_union
+from .utils import arc, arc_resolution, contour_polygons, setup_log, translate_many
 
 
 log = setup_log("fcCamlib.gerber")
@@ -53,6 +59,53 @@ def parse_gerber_number(strnumber, frac_digits):
     return int(strnumber) * (10 ** (-frac_digits))
 
 
+#### Token kinds produced by Gerber.tokenize() ####
+TK_UNKNOWN = 0
+TK_IGNORE = 1          # Comments, end of file.
+TK_LINEAR = 2          # Coordinates, linear or flash.
+TK_ARC = 3             # Coordinates, circular interpolation.
+TK_OPCODE = 4          # Operation code alone (D01/D02/D03).
+TK_INTERP = 5          # Interpolation mode alone (G01/G02/G03).
+TK_APERTURE = 6        # Aperture selection (Dnn).
+TK_QUADRANT = 7        # G74/G75
+TK_REGION_ON = 8       # G36
+TK_REGION_OFF = 9      # G37
+TK_APERTURE_DEF = 10   # %ADD
+TK_MACRO_START = 11    # %AM
+TK_MACRO_BODY = 12     # Continuation of %AM
+TK_POLARITY = 13       # %LP
+TK_FORMAT = 14         # %FS
+TK_UNITS = 15          # %MO or G70/G71
+TK_ABSREL = 16         # G90/G91
+TK_STEP_REPEAT = 17    # %SR
+
+# Names of the token kinds in parse statistics.
+TK_NAMES = {
+    TK_UNKNOWN: "unknown",
+    TK_IGNORE: "ignored",
+    TK_LINEAR: "linear",
+    TK_ARC: "arc",
+    TK_OPCODE: "opcode",
+    TK_INTERP: "interpolation",
+    TK_APERTURE: "aperture",
+    TK_QUADRANT: "quadrant",
+    TK_REGION_ON: "region_on",
+    TK_REGION_OFF: "region_off",
+    TK_APERTURE_DEF: "aperture_def",
+    TK_MACRO_START: "macro",
+    TK_MACRO_BODY: "macro_body",
+    TK_POLARITY: "polarity",
+    TK_FORMAT: "format",
+    TK_UNITS: "units",
+    TK_ABSREL: "absolute",
+    TK_STEP_REPEAT: "step_repeat"
+}
+
+# Statements starting with any of these are tried as coordinate
+# data blocks first.
+_COORD_LEADS = frozenset('XYIJDG')
+
+
 class Gerber (Geometry):
     """
     **ATTRIBUTES**
@@ -90,6 +143,9 @@ class Gerber (Geometry):
 
     """
 
+    # use_buffer_for_union: How to join all the polygons at the end
+    # of parsing. True: buffer and un-buffer, False: unary_union(),
+    # "parallel": parallel_union() in ``self.pool``.
     defaults = {
         "steps_per_circle": 40,
         "use_buffer_for_union": True
@@ -131,6 +187,10 @@ class Gerber (Geometry):
         self.ser_attrs += ['int_digits', 'frac_digits', 'apertures',
                            'aperture_macros', 'solid_geometry']
 
+        # Attributes saved in the parse cache along with solid_geometry.
+        self.cache_attrs = ['units', 'int_digits', 'frac_digits', 'apertures',
+                            'aperture_macros']
+
         #### Parser patterns ####
         # FS - Format Specification
         # The format of X and Y must be the same!
@@ -205,15 +265,28 @@ class Gerber (Geometry):
         # Absolute/Relative G90/1 (OBSOLETE)
         self.absrel_re = re.compile(r'^G9([01])\*$')
 
+        # SR - Step and repeat
+        # Opens a block with X by Y copies spaced by I and J (in units),
+        # or closes the current block if there are no parameters.
+        self.sr_re = re.compile(r'^%SR(?:X(\d+)Y(\d+)I(\d*\.?\d+)J(\d*\.?\d+))?\*%$')
+
         # Aperture macros
         self.am1_re = re.compile(r'^%AM([^\*]+)\*([^%]+)?(%)?$')
         self.am2_re = re.compile(r'(.*)%$')
 
+        # Coordinate data block in the standard order. Used by
+        # the tokenizer before trying lin_re, circ_re, etc.
+        self.coord_re = re.compile(r'^(?:G0?([123]))?(?:X([\+-]?\d+))?(?:Y([\+-]?\d+))?' +
+                                   r'(?:I([\+-]?\d+))?(?:J([\+-]?\d+))?(?:D(0?[123]))?\*$')
+
         # How to discretize a circle.
         self.steps_per_circ = steps_per_circle or Gerber.defaults['steps_per_circle']
 
         self.use_buffer_for_union = self.defaults["use_buffer_for_union"]
 
+        # ParseStats of the last parse, if enabled.
+        self.parse_stats = None
+
     def scale(self, factor):
         """
         Scales the objects' geometry on the XY plane by a given factor.
@@ -384,58 +457,269 @@ class Gerber (Geometry):
         :return: None
         """
 
-        with open(filename, 'r') as gfile:
+        # The file is memory-mapped and decoded a chunk at a time
+        # instead of line by line.
+        with mapped(filename) as buf:
+            self.parse_lines(gerber_statements(buf), follow=follow, source=filename)
+
+    def tokenize(self, glines):
+        """
+        Classifies Gerber statements by their leading code and yields
+        one ``(kind, statement, data)`` tuple per statement, where
+        ``kind`` is one of the ``TK_*`` constants and ``data`` holds the
+        already extracted fields:
+
+        * ``TK_LINEAR``: ``(x, y, d)``
+        * ``TK_ARC``: ``(mode, x, y, i, j, d)``
+        * ``TK_OPCODE``, ``TK_INTERP``: ``int``
+        * ``TK_APERTURE``: aperture id ``str``
+        * ``TK_QUADRANT``: ``'SINGLE'`` or ``'MULTI'``
+        * ``TK_APERTURE_DEF``: ``(id, type, parameters)``
+        * ``TK_MACRO_START``: ``(name, content, finished)``
+        * ``TK_MACRO_BODY``: ``(content, finished)``
+        * ``TK_POLARITY``: ``'D'`` or ``'C'``
+        * ``TK_FORMAT``: ``(int_digits, frac_digits)``
+        * ``TK_UNITS``: ``'IN'`` or ``'MM'``
+        * ``TK_ABSREL``: ``True`` for absolute.
+        * ``TK_STEP_REPEAT``: ``(x_repeats, y_repeats, x_step, y_step)``
+          or ``None`` for the end of the block.
+        * ``TK_REGION_ON``, ``TK_REGION_OFF``, ``TK_IGNORE``,
+          ``TK_UNKNOWN``: ``None``
+
+        Coordinates are ``str`` as in the file, or ``None`` if missing.
+        Modes and operation codes are ``int`` or ``None``.
+
+        Coordinate blocks in the standard (G, X, Y, I, J, D) order are
+        handled by a single pattern. Anything else goes through
+        ``classify()``.
 
-            def line_generator():
-                for line in gfile:
-                    line = line.strip(' \r\n')
-                    while len(line) > 0:
+        :param glines: Gerber code as list of strings, each element being
+            one statement.
+        :type glines: list
+        :return: Generator of tokens.
+        """
+        coord_match = self.coord_re.match
+        in_macro = False
 
-                        # If ends with '%' leave as is.
-                        if line[-1] == '%':
-                            yield line
-                            break
+        for gline in glines:
+            gline = gline.strip(' \r\n')
 
-                        # Split after '*' if any.
-                        starpos = line.find('*')
-                        if starpos > -1:
-                            cleanline = line[:starpos + 1]
-                            yield cleanline
-                            line = line[starpos + 1:]
+            ### Aperture macro body
+            if in_macro:
+                match = self.am2_re.search(gline)
+                if match:
+                    in_macro = False
+                    yield TK_MACRO_BODY, gline, (match.group(1), True)
+                else:
+                    yield TK_MACRO_BODY, gline, (gline, False)
+                continue
 
-                        # Otherwise leave as is.
-                        else:
-                            # yield cleanline
-                            yield line
-                            break
+            lead = gline[:1]
+
+            ### Coordinates, operation codes and interpolation modes
+            if lead in _COORD_LEADS:
+                match = coord_match(gline)
+                if match:
+                    g, x, y, i, j, d = match.groups()
+
+                    if i is None and j is None:
+                        if x is not None or y is not None:
+                            if g is None or g == '1':
+                                yield TK_LINEAR, gline, (x, y, None if d is None else int(d))
+                                continue
+                        elif g is None:
+                            if d is not None:
+                                yield TK_OPCODE, gline, int(d)
+                                continue
+                        elif d is None:
+                            yield TK_INTERP, gline, int(g)
+                            continue
+
+                    # Arcs only take D01 and D02, and not G01.
+                    if g != '1' and (d is None or d in ('01', '02')) and \
+                            (x is not None or y is not None or i is not None or j is not None):
+                        yield TK_ARC, gline, (None if g is None else int(g), x, y, i, j,
+                                              None if d is None else int(d))
+                        continue
+
+                ### Tool change, D12* or G54D12*
+                else:
+                    match = self.tool_re.search(gline)
+                    if match:
+                        yield TK_APERTURE, gline, match.group(1)
+                        continue
+
+            ### Extended codes
+            elif lead == '%':
+                code = gline[1:3]
+                if code == 'AD':
+                    match = self.ad_re.search(gline)
+                    if match:
+                        yield TK_APERTURE_DEF, gline, match.groups()
+                        continue
+                elif code == 'LP':
+                    match = self.lpol_re.search(gline)
+                    if match:
+                        yield TK_POLARITY, gline, match.group(1)
+                        continue
+                elif code == 'SR':
+                    match = self.sr_re.search(gline)
+                    if match:
+                        yield TK_STEP_REPEAT, gline, self.step_repeat_data(match)
+                        continue
+
+            kind, data = self.classify(gline)
+            if kind == TK_MACRO_START and not data[2]:
+                in_macro = True
+            yield kind, gline, data
+
+    def classify(self, gline):
+        """
+        Classifies a single Gerber statement by trying every pattern in
+        turn. Slow, but handles any statement the fast paths in
+        ``tokenize()`` do not. Macro continuation lines are not
+        recognized here.
+
+        :param gline: Gerber statement, stripped.
+        :type gline: str
+        :return: (kind, data) as described in ``tokenize()``.
+        :rtype: tuple
+        """
+
+        match = self.am1_re.search(gline)
+        if match:
+            return TK_MACRO_START, (match.group(1), match.group(2), match.group(3) is not None)
+
+        match = self.lin_re.search(gline)
+        if match:
+            d = match.group(4)
+            return TK_LINEAR, (match.group(2), match.group(3), None if d is None else int(d))
+
+        match = self.circ_re.search(gline)
+        if match:
+            mode, x, y, i, j, d = match.groups()
+            return TK_ARC, (None if mode is None else int(mode), x, y, i, j,
+                            None if d is None else int(d))
+
+        match = self.opcode_re.search(gline)
+        if match:
+            return TK_OPCODE, int(match.group(1))
+
+        match = self.quad_re.search(gline)
+        if match:
+            return TK_QUADRANT, 'SINGLE' if match.group(1) == '4' else 'MULTI'
+
+        if self.regionon_re.search(gline):
+            return TK_REGION_ON, None
+
+        if self.regionoff_re.search(gline):
+            return TK_REGION_OFF, None
+
+        match = self.ad_re.search(gline)
+        if match:
+            return TK_APERTURE_DEF, match.groups()
+
+        match = self.interp_re.search(gline)
+        if match:
+            return TK_INTERP, int(match.group(1))
+
+        match = self.tool_re.search(gline)
+        if match:
+            return TK_APERTURE, match.group(1)
+
+        match = self.lpol_re.search(gline)
+        if match:
+            return TK_POLARITY, match.group(1)
+
+        match = self.sr_re.search(gline)
+        if match:
+            return TK_STEP_REPEAT, self.step_repeat_data(match)
+
+        match = self.fmt_re.search(gline)
+        if match:
+            return TK_FORMAT, (int(match.group(3)), int(match.group(4)))
+
+        match = self.mode_re.search(gline)
+        if match:
+            return TK_UNITS, match.group(1)
+
+        match = self.units_re.search(gline)
+        if match:
+            return TK_UNITS, {'0': 'IN', '1': 'MM'}[match.group(1)]
+
+        match = self.absrel_re.search(gline)
+        if match:
+            return TK_ABSREL, {'0': True, '1': False}[match.group(1)]
+
+        if self.comm_re.search(gline) or self.eof_re.search(gline):
+            return TK_IGNORE, None
+
+        return TK_UNKNOWN, None
 
-            self.parse_lines(line_generator(), follow=follow)
+    @staticmethod
+    def step_repeat_data(match):
+        """
+        Token data for a match of ``sr_re``.
+
+        :return: ``(x_repeats, y_repeats, x_step, y_step)`` or ``None``
+            if the statement only closes the current block.
+        :rtype: tuple
+        """
+        if match.group(1) is None:
+            return None
+        return (int(match.group(1)), int(match.group(2)),
+                float(match.group(3)), float(match.group(4)))
 
     #@profile
-    def parse_lines(self, glines, follow=False):
+    def parse_lines(self, glines, follow=False, source=None):
         """
         Main Gerber parser. Reads Gerber and populates ``self.paths``, ``self.apertures``,
         ``self.flashes``, ``self.regions`` and ``self.units``.
 
+        Statements are classified once by ``tokenize()`` and dispatched
+        here by token kind.
+
+        If ``ParseStats`` is enabled, its report is left in
+        ``self.parse_stats``.
+
         :param glines: Gerber code as list of strings, each element being
             one line of the source file.
         :type glines: list
         :param follow: If true, will not create polygons, just lines
             following the gerber path.
         :type follow: bool
+        :param source: Name of the input for the parse statistics.
+        :type source: str
         :return: None
         :rtype: None
         """
 
+        stats = ParseStats.create(source or "<lines>", "gerber")
+        self.parse_stats = stats
+
         # Coordinates of the current path, each is [x, y]
         path = []
 
         # Polygons are stored here until there is a change in polarity.
-        # Only then they are combined via cascaded_union and added or
-        # subtracted from solid_geometry. This is ~100 times faster than
-        # applyng a union for every new polygon.
+        # Then they are pushed to ``layers`` as they are and the next
+        # layer starts. All the layers are resolved and joined only
+        # once, at the end.
         poly_buffer = []
 
+        # Stack of (polarity, [polygon, ...]) in order of appearance.
+        layers = []
+
+        # Open step and repeat block: (x_repeats, y_repeats, x_step,
+        # y_step) and the index in ``layers`` where the block starts.
+        step_repeat = None
+        step_repeat_start = 0
+
+        # Offsets of the copies of dark step and repeat blocks, by the
+        # id of the list in ``layers`` holding the joined block. The
+        # copies are only made when the layers are joined, see
+        # expand_instances().
+        instances = {}
+
         last_path_aperture = None
         current_aperture = None
 
@@ -467,72 +751,141 @@ class Gerber (Geometry):
         # If a region is being defined
         making_region = False
 
+        arcdir = [None, None, "cw", "ccw"]
+
+        # Same as parse_gerber_number(), computed once per format.
+        scale = 10 ** (-self.frac_digits)
+
+        # Max. chordal error for arcs and circles. Depends on units.
+        tolerance = self.arc_tolerance()
+
+        # Flashes are collected per aperture id and drawn in one batch
+        # as translated copies of the aperture's shape, which is built
+        # only once, at the origin.
+        flashes = {}
+        flash_templates = {}
+
+        def add_flash(aperture_id, x, y):
+            if aperture_id not in flash_templates:
+                flash_templates[aperture_id] = Gerber.create_flash_template(self.apertures[aperture_id],
+                                                                            tolerance)
+                flashes[aperture_id] = []
+            flashes[aperture_id].append((x, y))
+
+        def flush_flashes():
+            with ParseStats.phase_of(stats, "flashes"):
+                for aperture_id, locations in flashes.items():
+                    template = flash_templates[aperture_id]
+                    if template is None or template.is_empty or len(locations) == 0:
+                        continue
+                    poly_buffer.extend(translate_many(template, locations))
+                    del locations[:]
+
+        # Closed contours of regions. Made into polygons in one batch
+        # before the current layer is pushed.
+        region_contours = []
+
+        def flush_regions():
+            with ParseStats.phase_of(stats, "regions"):
+                if len(region_contours) > 0:
+                    poly_buffer.extend(contour_polygons(region_contours))
+                    del region_contours[:]
+
+        def push_layer():
+            """
+            Moves the contents of ``poly_buffer``, if any, to a new
+            layer with the current polarity.
+            """
+            nonlocal poly_buffer
+
+            if len(poly_buffer) > 0:
+                if stats is not None:
+                    stats.buffer_size(len(poly_buffer))
+                layers.append((current_polarity, poly_buffer))
+                poly_buffer = []
+
+        def end_step_repeat():
+            """
+            Closes the open step and repeat block. Its shapes, drawn
+            once, are replaced by translated copies for every position
+            in the block. The path, flashes and regions must have been
+            flushed.
+            """
+            push_layer()
+            block = layers[step_repeat_start:]
+            del layers[step_repeat_start:]
+
+            x_repeats, y_repeats, x_step, y_step = step_repeat
+            offsets = [(ix * x_step, iy * y_step)
+                       for iy in range(y_repeats) for ix in range(x_repeats)]
+            log.debug("Step and repeat: %d layers, %d copies." % (len(block), len(offsets)))
+
+            # Dark only: join the block once and keep it with the
+            # offsets of its copies. This is much less to join at the
+            # end than copies of every shape, and no copy is made until
+            # it is needed.
+            if not follow and all(polarity == 'D' for polarity, _ in block):
+                geos = [geo for _, buf in block for geo in buf]
+                if len(geos) == 0:
+                    return
+                instance = [unary_union(geos)]
+                instances[id(instance)] = offsets
+                layers.append(('D', instance))
+                return
+
+            # Clear shapes in a copy affect what is under it, including
+            # the copies before it, so keep the order: copy by copy.
+            block_copies = [[translate_many(geo, offsets) for geo in buf] for _, buf in block]
+            for n in range(len(offsets)):
+                for (polarity, _), copies in zip(block, block_copies):
+                    layers.append((polarity, [geo_copies[n] for geo_copies in copies]))
+
+        def expand_instances():
+            """
+            Replaces the joined dark step and repeat blocks in
+            ``layers`` by their copies.
+            """
+            for n, (polarity, buf) in enumerate(layers):
+                if id(buf) in instances:
+                    layers[n] = (polarity, translate_many(buf[0], instances[id(buf)]))
+
+        def path_geometry():
+            """
+            Geometry for the current path drawn with the
+            last used aperture.
+            """
+            width = self.apertures[last_path_aperture]["size"]
+            if follow:
+                return LineString(path)
+            return LineString(path).buffer(width / 2)
+
         #### Parsing starts here ####
         line_num = 0
         gline = ""
         try:
-            for gline in glines:
-                line_num += 1
+            tokens = self.tokenize(glines)
+            if stats is not None:
+                tokens = stats.timed(tokens, lambda token: TK_NAMES[token[0]], "tokenize")
 
-                ### Cleanup
-                gline = gline.strip(' \r\n')
+            for kind, gline, data in tokens:
+                line_num += 1
 
                 #log.debug("%3s %s" % (line_num, gline))
 
-                ### Aperture Macros
-                # Having this at the beggining will slow things down
-                # but macros can have complicated statements than could
-                # be caught by other patterns.
-                if current_macro is None:  # No macro started yet
-                    match = self.am1_re.search(gline)
-                    # Start macro if match, else not an AM, carry on.
-                    if match:
-                        log.debug("Starting macro. Line %d: %s" % (line_num, gline))
-                        current_macro = match.group(1)
-                        self.aperture_macros[current_macro] = ApertureMacro(name=current_macro)
-                        if match.group(2):  # Append
-                            self.aperture_macros[current_macro].append(match.group(2))
-                        if match.group(3):  # Finish macro
-                            #self.aperture_macros[current_macro].parse_content()
-                            current_macro = None
-                            log.debug("Macro complete in 1 line.")
-                        continue
-                else:  # Continue macro
-                    log.debug("Continuing macro. Line %d." % line_num)
-                    match = self.am2_re.search(gline)
-                    if match:  # Finish macro
-                        log.debug("End of macro. Line %d." % line_num)
-                        self.aperture_macros[current_macro].append(match.group(1))
-                        #self.aperture_macros[current_macro].parse_content()
-                        current_macro = None
-                    else:  # Append
-                        self.aperture_macros[current_macro].append(gline)
-                    continue
-
                 ### G01 - Linear interpolation plus flashes
                 # Operation code (D0x) missing is deprecated... oh well I will support it.
-                # REGEX: r'^(?:G0?(1))?(?:X(-?\d+))?(?:Y(-?\d+))?(?:D0([123]))?\*$'
-                match = self.lin_re.search(gline)
-                if match:
-                    # Dxx alone?
-                    # if match.group(1) is None and match.group(2) is None and match.group(3) is None:
-                    #     try:
-                    #         current_operation_code = int(match.group(4))
-                    #     except:
-                    #         pass  # A line with just * will match too.
-                    #     continue
-                    # NOTE: Letting it continue allows it to react to the
-                    #       operation code.
+                if kind == TK_LINEAR:
+                    x, y, d = data
 
                     # Parse coordinates
-                    if match.group(2) is not None:
-                        current_x = parse_gerber_number(match.group(2), self.frac_digits)
-                    if match.group(3) is not None:
-                        current_y = parse_gerber_number(match.group(3), self.frac_digits)
+                    if x is not None:
+                        current_x = int(x) * scale
+                    if y is not None:
+                        current_y = int(y) * scale
 
                     # Parse operation code
-                    if match.group(4) is not None:
-                        current_operation_code = int(match.group(4))
+                    if d is not None:
+                        current_operation_code = d
 
                     # Pen down: add segment
                     if current_operation_code == 1:
@@ -544,22 +897,14 @@ class Gerber (Geometry):
 
                             ## --- BUFFERED ---
                             if making_region:
-                                if follow:
-                                    geo = Polygon()
-                                else:
-                                    geo = Polygon(path)
+                                if not follow:
+                                    region_contours.append(path)
                             else:
                                 if last_path_aperture is None:
                                     log.warning("No aperture defined for curent path. (%d)" % line_num)
-                                width = self.apertures[last_path_aperture]["size"]  # TODO: WARNING this should fail!
-                                #log.debug("Line %d: Setting aperture to %s before buffering." % (line_num, last_path_aperture))
-                                if follow:
-                                    geo = LineString(path)
-                                else:
-                                    geo = LineString(path).buffer(width / 2)
-
-                            if not geo.is_empty:
-                                poly_buffer.append(geo)
+                                geo = path_geometry()  # TODO: WARNING this should fail!
+                                if not geo.is_empty:
+                                    poly_buffer.append(geo)
 
                         path = [[current_x, current_y]]  # Start new path
 
@@ -570,13 +915,7 @@ class Gerber (Geometry):
                         # Create path draw so far.
                         if len(path) > 1:
                             # --- Buffered ----
-                            width = self.apertures[last_path_aperture]["size"]
-
-                            if follow:
-                                geo = LineString(path)
-                            else:
-                                geo = LineString(path).buffer(width / 2)
-
+                            geo = path_geometry()
                             if not geo.is_empty:
                                 poly_buffer.append(geo)
 
@@ -587,36 +926,18 @@ class Gerber (Geometry):
                         # Draw the flash
                         if follow:
                             continue
-                        flash = Gerber.create_flash_geometry(Point([current_x, current_y]),
-                                                             self.apertures[current_aperture])
-                        if not flash.is_empty:
-                            poly_buffer.append(flash)
+                        add_flash(current_aperture, current_x, current_y)
 
                     continue
 
                 ### G02/3 - Circular interpolation
                 # 2-clockwise, 3-counterclockwise
-                match = self.circ_re.search(gline)
-                if match:
-                    arcdir = [None, None, "cw", "ccw"]
-
-                    mode, x, y, i, j, d = match.groups()
-                    try:
-                        x = parse_gerber_number(x, self.frac_digits)
-                    except:
-                        x = current_x
-                    try:
-                        y = parse_gerber_number(y, self.frac_digits)
-                    except:
-                        y = current_y
-                    try:
-                        i = parse_gerber_number(i, self.frac_digits)
-                    except:
-                        i = 0
-                    try:
-                        j = parse_gerber_number(j, self.frac_digits)
-                    except:
-                        j = 0
+                if kind == TK_ARC:
+                    mode, x, y, i, j, d = data
+                    x = current_x if x is None else int(x) * scale
+                    y = current_y if y is None else int(y) * scale
+                    i = 0 if i is None else int(i) * scale
+                    j = 0 if j is None else int(j) * scale
 
                     if quadrant_mode is None:
                         log.error("Found arc without preceding quadrant specification G74 or G75. (%d)" % line_num)
@@ -628,11 +949,11 @@ class Gerber (Geometry):
                         log.error(gline)
                         continue
                     elif mode is not None:
-                        current_interpolation_mode = int(mode)
+                        current_interpolation_mode = mode
 
                     # Set operation code if provided
                     if d is not None:
-                        current_operation_code = int(d)
+                        current_operation_code = d
 
                     # Nothing created! Pen Up.
                     if current_operation_code == 2:
@@ -642,12 +963,7 @@ class Gerber (Geometry):
                                 log.warning("No aperture defined for curent path. (%d)" % line_num)
 
                             # --- BUFFERED ---
-                            width = self.apertures[last_path_aperture]["size"]
-
-                            if follow:
-                                buffered = LineString(path)
-                            else:
-                                buffered = LineString(path).buffer(width / 2)
+                            buffered = path_geometry()
                             if not buffered.is_empty:
                                 poly_buffer.append(buffered)
 
@@ -675,7 +991,7 @@ class Gerber (Geometry):
 
                         this_arc = arc(center, radius, start, stop,
                                        arcdir[current_interpolation_mode],
-                                       self.steps_per_circ)
+                                       self.steps_per_circ, tolerance)
 
                         # The last point in the computed arc can have
                         # numerical errors. The exact final point is the
@@ -683,12 +999,10 @@ class Gerber (Geometry):
                         this_arc[-1] = (x, y)
 
                         # Last point in path is current point
-                        # current_x = this_arc[-1][0]
-                        # current_y = this_arc[-1][1]
                         current_x, current_y = x, y
 
                         # Append
-                        path += this_arc
+                        path.extend(this_arc.tolist())
 
                         last_path_aperture = current_aperture
 
@@ -730,70 +1044,73 @@ class Gerber (Geometry):
                                 log.debug("########## ACCEPTING ARC ############")
                                 this_arc = arc(center, radius, start, stop,
                                                arcdir[current_interpolation_mode],
-                                               self.steps_per_circ)
+                                               self.steps_per_circ, tolerance)
 
                                 # Replace with exact values
                                 this_arc[-1] = (x, y)
 
-                                # current_x = this_arc[-1][0]
-                                # current_y = this_arc[-1][1]
                                 current_x, current_y = x, y
 
-                                path += this_arc
+                                path.extend(this_arc.tolist())
                                 last_path_aperture = current_aperture
                                 valid = True
                                 break
 
-                        if valid:
-                            continue
-                        else:
+                        if not valid:
                             log.warning("Invalid arc in line %d." % line_num)
+                            log.warning("Line ignored (%d): %s" % (line_num, gline))
+
+                    continue
+
+                ### Tool/aperture change
+                # Example: D12*
+                if kind == TK_APERTURE:
+                    current_aperture = data
+                    log.debug("Line %d: Aperture change to (%s)" % (line_num, data))
+                    log.debug(self.apertures[current_aperture])
+
+                    # Take care of the current path with the previous tool
+                    if len(path) > 1:
+                        # --- Buffered ----
+                        geo = path_geometry()
+                        if not geo.is_empty:
+                            poly_buffer.append(geo)
+
+                        path = [path[-1]]
+
+                    continue
 
                 ### Operation code alone
                 # Operation code alone, usually just D03 (Flash)
-                # self.opcode_re = re.compile(r'^D0?([123])\*$')
-                match = self.opcode_re.search(gline)
-                if match:
-                    current_operation_code = int(match.group(1))
+                if kind == TK_OPCODE:
+                    current_operation_code = data
                     if current_operation_code == 3:
 
                         ## --- Buffered ---
-                        try:
-                            log.debug("Bare op-code %d." % current_operation_code)
-                            # flash = Gerber.create_flash_geometry(Point(path[-1]),
-                            #                                      self.apertures[current_aperture])
-                            if follow:
-                                continue
-                            flash = Gerber.create_flash_geometry(Point(current_x, current_y),
-                                                                 self.apertures[current_aperture])
-                            if not flash.is_empty:
-                                poly_buffer.append(flash)
-                        except IndexError:
+                        if follow:
+                            continue
+                        if current_x is None or current_y is None:
                             log.warning("Line %d: %s -> Nothing there to flash!" % (line_num, gline))
+                            continue
+                        add_flash(current_aperture, current_x, current_y)
 
                     continue
 
-                ### G74/75* - Single or multiple quadrant arcs
-                match = self.quad_re.search(gline)
-                if match:
-                    if match.group(1) == '4':
-                        quadrant_mode = 'SINGLE'
-                    else:
-                        quadrant_mode = 'MULTI'
+                ### G01/2/3* - Interpolation mode change
+                # Can occur along with coordinates and operation code but
+                # sometimes by itself (handled here).
+                # Example: G01*
+                if kind == TK_INTERP:
+                    current_interpolation_mode = data
                     continue
 
                 ### G36* - Begin region
-                if self.regionon_re.search(gline):
+                if kind == TK_REGION_ON:
                     if len(path) > 1:
                         # Take care of what is left in the path
 
                         ## --- Buffered ---
-                        width = self.apertures[last_path_aperture]["size"]
-
-                        if follow:
-                            geo = LineString(path)
-                        else:
-                            geo = LineString(path).buffer(width/2)
+                        geo = path_geometry()
                         if not geo.is_empty:
                             poly_buffer.append(geo)
 
@@ -803,155 +1120,132 @@ class Gerber (Geometry):
                     continue
 
                 ### G37* - End region
-                if self.regionoff_re.search(gline):
+                if kind == TK_REGION_OFF:
                     making_region = False
 
                     # Only one path defines region?
                     # This can happen if D02 happened before G37 and
                     # is not and error.
                     if len(path) < 3:
-                        # print "ERROR: Path contains less than 3 points:"
-                        # print path
-                        # print "Line (%d): " % line_num, gline
-                        # path = []
-                        #path = [[current_x, current_y]]
                         continue
 
-                    # For regions we may ignore an aperture that is None
-                    # self.regions.append({"polygon": Polygon(path),
-                    #                      "aperture": last_path_aperture})
-
                     # --- Buffered ---
-                    if follow:
-                        region = Polygon()
-                    else:
-                        region = Polygon(path)
-                    if not region.is_valid:
-                        if not follow:
-                            region = region.buffer(0)
-                    if not region.is_empty:
-                        poly_buffer.append(region)
+                    if not follow:
+                        region_contours.append(path)
 
                     path = [[current_x, current_y]]  # Start new path
                     continue
 
+                ### G74/75* - Single or multiple quadrant arcs
+                if kind == TK_QUADRANT:
+                    quadrant_mode = data
+                    continue
+
+                ### Aperture Macros
+                if kind == TK_MACRO_START:
+                    log.debug("Starting macro. Line %d: %s" % (line_num, gline))
+                    current_macro, content, finished = data
+                    self.aperture_macros[current_macro] = ApertureMacro(name=current_macro)
+                    if content:  # Append
+                        self.aperture_macros[current_macro].append(content)
+                    if finished:  # Finish macro
+                        current_macro = None
+                        log.debug("Macro complete in 1 line.")
+                    continue
+
+                if kind == TK_MACRO_BODY:
+                    log.debug("Continuing macro. Line %d." % line_num)
+                    content, finished = data
+                    self.aperture_macros[current_macro].append(content)
+                    if finished:
+                        log.debug("End of macro. Line %d." % line_num)
+                        current_macro = None
+                    continue
+
                 ### Aperture definitions %ADD...
-                match = self.ad_re.search(gline)
-                if match:
+                if kind == TK_APERTURE_DEF:
                     log.info("Found aperture definition. Line %d: %s" % (line_num, gline))
-                    self.aperture_parse(match.group(1), match.group(2), match.group(3))
-                    continue
+                    apid = self.aperture_parse(*data)
 
-                ### G01/2/3* - Interpolation mode change
-                # Can occur along with coordinates and operation code but
-                # sometimes by itself (handled here).
-                # Example: G01*
-                match = self.interp_re.search(gline)
-                if match:
-                    current_interpolation_mode = int(match.group(1))
+                    # Redefined aperture. Draw pending flashes with the old shape.
+                    if apid in flash_templates:
+                        flush_flashes()
+                        del flash_templates[apid]
+                        del flashes[apid]
                     continue
 
-                ### Tool/aperture change
-                # Example: D12*
-                match = self.tool_re.search(gline)
-                if match:
-                    current_aperture = match.group(1)
-                    log.debug("Line %d: Aperture change to (%s)" % (line_num, match.group(1)))
-                    log.debug(self.apertures[current_aperture])
+                ### Polarity change
+                # Example: %LPD*% or %LPC*%
+                # If polarity changes, creates geometry from current
+                # buffer, then adds or subtracts accordingly.
+                if kind == TK_POLARITY:
+                    if len(path) > 1 and current_polarity != data:
 
-                    # Take care of the current path with the previous tool
-                    if len(path) > 1:
                         # --- Buffered ----
-                        width = self.apertures[last_path_aperture]["size"]
-
-                        if follow:
-                            geo = LineString(path)
-                        else:
-                            geo = LineString(path).buffer(width / 2)
+                        geo = path_geometry()
                         if not geo.is_empty:
                             poly_buffer.append(geo)
 
                         path = [path[-1]]
 
+                    # --- Push layer ---
+                    flush_flashes()
+                    flush_regions()
+                    push_layer()
+
+                    current_polarity = data
                     continue
 
-                ### Polarity change
-                # Example: %LPD*% or %LPC*%
-                # If polarity changes, creates geometry from current
-                # buffer, then adds or subtracts accordingly.
-                match = self.lpol_re.search(gline)
-                if match:
-                    if len(path) > 1 and current_polarity != match.group(1):
+                ### Step and repeat
+                # Example: %SRX3Y2I5.0J4.0*% ... %SR*%
+                # A new block also closes the previous one.
+                if kind == TK_STEP_REPEAT:
+                    if len(path) > 1:
 
                         # --- Buffered ----
-                        width = self.apertures[last_path_aperture]["size"]
-
-                        if follow:
-                            geo = LineString(path)
-                        else:
-                            geo = LineString(path).buffer(width / 2)
+                        geo = path_geometry()
                         if not geo.is_empty:
                             poly_buffer.append(geo)
 
                         path = [path[-1]]
 
-                    # --- Apply buffer ---
-                    # If added for testing of bug #83
-                    # TODO: Remove when bug fixed
-                    if len(poly_buffer) > 0:
-                        if current_polarity == 'D':
-                            self.solid_geometry = self.solid_geometry.union(unary_union(poly_buffer))
-                        else:
-                            self.solid_geometry = self.solid_geometry.difference(unary_union(poly_buffer))
-                        poly_buffer = []
-
-                    current_polarity = match.group(1)
+                    flush_flashes()
+                    flush_regions()
+                    if step_repeat is not None:
+                        with ParseStats.phase_of(stats, "step_repeat"):
+                            end_step_repeat()
+                        step_repeat = None
+
+                    if data is not None and data[0] * data[1] > 1:
+                        push_layer()
+                        step_repeat = data
+                        step_repeat_start = len(layers)
                     continue
 
                 ### Number format
                 # Example: %FSLAX24Y24*%
                 # TODO: This is ignoring most of the format. Implement the rest.
-                match = self.fmt_re.search(gline)
-                if match:
-                    absolute = {'A': True, 'I': False}
-                    self.int_digits = int(match.group(3))
-                    self.frac_digits = int(match.group(4))
+                if kind == TK_FORMAT:
+                    self.int_digits, self.frac_digits = data
+                    scale = 10 ** (-self.frac_digits)
                     continue
 
-                ### Mode (IN/MM)
+                ### Mode (IN/MM) or Units (G70/1) OBSOLETE
                 # Example: %MOIN*%
-                match = self.mode_re.search(gline)
-                if match:
-                    #self.units = match.group(1)
-
-                    # Changed for issue #80
-                    self.convert_units(match.group(1))
-                    continue
-
-                ### Units (G70/1) OBSOLETE
-                match = self.units_re.search(gline)
-                if match:
-                    #self.units = {'0': 'IN', '1': 'MM'}[match.group(1)]
-
+                if kind == TK_UNITS:
                     # Changed for issue #80
-                    self.convert_units({'0': 'IN', '1': 'MM'}[match.group(1)])
+                    self.convert_units(data)
+                    tolerance = self.arc_tolerance()
                     continue
 
                 ### Absolute/relative coordinates G90/1 OBSOLETE
-                match = self.absrel_re.search(gline)
-                if match:
-                    absolute = {'0': True, '1': False}[match.group(1)]
+                if kind == TK_ABSREL:
+                    absolute = data
                     continue
 
                 #### Ignored lines
-                ## Comments
-                match = self.comm_re.search(gline)
-                if match:
-                    continue
-
-                ## EOF
-                match = self.eof_re.search(gline)
-                if match:
+                ## Comments, EOF
+                if kind == TK_IGNORE:
                     continue
 
                 ### Line did not match any pattern. Warn user.
@@ -961,35 +1255,69 @@ class Gerber (Geometry):
                 # EOF, create shapely LineString if something still in path
 
                 ## --- Buffered ---
-                width = self.apertures[last_path_aperture]["size"]
-                if follow:
-                    geo = LineString(path)
-                else:
-                    geo = LineString(path).buffer(width / 2)
+                geo = path_geometry()
                 if not geo.is_empty:
                     poly_buffer.append(geo)
 
+            flush_flashes()
+            flush_regions()
+            if step_repeat is not None:
+                with ParseStats.phase_of(stats, "step_repeat"):
+                    end_step_repeat()
+            push_layer()
+
             # --- Apply buffer ---
             if follow:
-                self.solid_geometry = poly_buffer
+                self.solid_geometry = [geo for _, buf in layers for geo in buf]
                 return
 
-            log.warn("Joining %d polygons." % len(poly_buffer))
-            if self.use_buffer_for_union:
-                log.debug("Union by buffer...")
-                new_poly = MultiPolygon(poly_buffer)
-                new_poly = new_poly.buffer(0.00000001)
-                new_poly = new_poly.buffer(-0.00000001)
-                log.warn("Union(buffer) done.")
-            else:
-                log.debug("Union by union()...")
-                new_poly = unary_union(poly_buffer)
-                new_poly = new_poly.buffer(0)
-                log.warn("Union done.")
-            if current_polarity == 'D':
-                self.solid_geometry = self.solid_geometry.union(new_poly)
-            else:
-                self.solid_geometry = self.solid_geometry.difference(new_poly)
+            if not self.solid_geometry.is_empty:
+                layers.insert(0, ('D', [self.solid_geometry]))
+            has_clear = any(polarity == 'C' for polarity, _ in layers)
+
+            # Copies of step and repeat blocks that do not overlap
+            # anything else are already joined. Keep them as they are.
+            # Whether they overlap is found from the bounds of the
+            # blocks, before making the copies.
+            if not has_clear and len(instances) > 0:
+                with ParseStats.phase_of(stats, "union"):
+                    rest = None
+                    poly_buffer = [geo for _, buf in layers if id(buf) not in instances for geo in buf]
+                    if len(poly_buffer) > 0:
+                        rest = self.union_polygons(poly_buffer)
+
+                    bounds = []
+                    for _, buf in layers:
+                        if id(buf) in instances and not buf[0].is_empty:
+                            xmin, ymin, xmax, ymax = buf[0].bounds
+                            bounds += [(xmin + x, ymin + y, xmax + x, ymax + y) for x, y in instances[id(buf)]]
+                    if rest is not None and not rest.is_empty:
+                        bounds.append(rest.bounds)
+                    disjoint = Gerber.bounds_disjoint(bounds)
+                if disjoint:
+                    log.debug("Step and repeat copies do not overlap. Not joined.")
+                    groups = [copy for _, buf in layers if id(buf) in instances
+                              for copy in translate_many(buf[0], instances[id(buf)])]
+                    if rest is not None:
+                        groups.append(rest)
+                    self.solid_geometry = MultiPolygon([poly for geo in groups
+                                                        for poly in getattr(geo, 'geoms', [geo])
+                                                        if not poly.is_empty])
+                    return
+
+            with ParseStats.phase_of(stats, "step_repeat"):
+                expand_instances()
+
+            with ParseStats.phase_of(stats, "polarity"):
+                poly_buffer = Gerber.resolve_polarity(layers)
+
+            if stats is not None:
+                stats.buffer_size(len(poly_buffer))
+
+            # The pieces left by clear layers are many and small,
+            # which is the worst case for the buffer trick.
+            with ParseStats.phase_of(stats, "union"):
+                self.solid_geometry = self.union_polygons(poly_buffer, allow_buffer=not has_clear)
 
         except Exception as err:
             ex_type, ex, tb = sys.exc_info()
@@ -999,51 +1327,163 @@ class Gerber (Geometry):
             log.error("PARSING FAILED. Line %d: %s" % (line_num, gline))
             raise GerberParseError("Line %d: %s" % (line_num, gline), repr(err))
 
+        finally:
+            if stats is not None:
+                stats.finish()
+
+    def union_polygons(self, polygons, allow_buffer=True):
+        """
+        Joins polygons with the method selected by
+        ``self.use_buffer_for_union``.
+
+        :param polygons: Polygons or multi-polygons to join.
+        :type polygons: list
+        :param allow_buffer: If False, use ``unary_union()`` instead
+            of the buffer method.
+        :type allow_buffer: bool
+        :return: The union.
+        :rtype: BaseGeometry
+        """
+        log.warn("Joining %d polygons." % len(polygons))
+        if self.use_buffer_for_union == "parallel":
+            log.debug("Union by parallel_union()...")
+            new_poly = parallel_union(polygons, self.pool)
+            new_poly = new_poly.buffer(0)
+            log.warn("Union(parallel) done.")
+        elif self.use_buffer_for_union and allow_buffer:
+            log.debug("Union by buffer...")
+            new_poly = MultiPolygon([poly for geo in polygons for poly in getattr(geo, 'geoms', [geo])])
+            new_poly = new_poly.buffer(0.00000001)
+            new_poly = new_poly.buffer(-0.00000001)
+            log.warn("Union(buffer) done.")
+        else:
+            log.debug("Union by union()...")
+            new_poly = unary_union(polygons)
+            new_poly = new_poly.buffer(0)
+            log.warn("Union done.")
+        return new_poly
+
     @staticmethod
-    def create_flash_geometry(location, aperture):
+    def bounds_disjoint(bounds):
+        """
+        Whether the given bounding boxes are pairwise disjoint, in
+        which case the geometries within them cannot overlap and need
+        no union. Touching boxes count as overlapping.
 
-        log.debug('Flashing @%s, Aperture: %s' % (location, aperture))
+        :param bounds: (xmin, ymin, xmax, ymax) of each geometry.
+        :type bounds: list
+        :rtype: bool
+        """
+        index = rtindex.Index()
+        for n, box in enumerate(bounds):
+            if next(iter(index.intersection(box)), None) is not None:
+                return False
+            index.insert(n, box)
+        return True
 
-        if type(location) == list:
-            location = Point(location)
+    @staticmethod
+    def resolve_polarity(layers):
+        """
+        Applies a stack of dark and clear layers in order and returns
+        the dark polygons that remain. They may overlap and still need
+        to be joined.
+
+        Dark polygons are kept separate in an R-tree. Each clear layer
+        is subtracted only from the polygons that touch it, so the
+        cost grows with the area it covers rather than with all of
+        the geometry drawn before it.
+
+        :param layers: List of (polarity, [geometry, ...]), polarity
+            being 'D' (dark) or 'C' (clear).
+        :type layers: list
+        :return: List of polygons.
+        :rtype: list
+        """
+
+        # Nothing to clear. Keep everything as it is.
+        if all(polarity == 'D' for polarity, _ in layers):
+            return [geo for _, geos in layers for geo in geos]
+
+        index = rtindex.Index()
+        pieces = {}
+        ids = count()
+
+        def add(geo):
+            for poly in getattr(geo, 'geoms', [geo]):
+                if isinstance(poly, Polygon) and not poly.is_empty:
+                    pid = next(ids)
+                    pieces[pid] = poly
+                    index.insert(pid, poly.bounds)
+
+        for polarity, geos in layers:
+            if polarity == 'D':
+                for geo in geos:
+                    add(geo)
+                continue
+
+            clear = geos[0] if len(geos) == 1 else unary_union(geos)
+            if clear.is_empty:
+                continue
+            clear_prep = prep(clear)
+
+            # Removed pieces stay in the index (deleting from an R-tree
+            # is slow) and are skipped here.
+            for pid in list(index.intersection(clear.bounds)):
+                piece = pieces.get(pid)
+                if piece is None or not clear_prep.intersects(piece):
+                    continue
+                del pieces[pid]
+                add(piece.difference(clear))
+
+        return list(pieces.values())
+
+    @staticmethod
+    def create_flash_template(aperture, tolerance=None):
+        """
+        Shape of the given aperture centered at the origin.
+
+        :param aperture: Aperture definition as in ``self.apertures``.
+        :type aperture: dict
+        :param tolerance: Maximum chordal error of round shapes. Uses
+            Shapely's default resolution if not given.
+        :type tolerance: float
+        :return: The shape or None if the aperture type is not supported.
+        :rtype: BaseGeometry
+        """
 
         if aperture['type'] == 'C':  # Circles
-            return location.buffer(aperture['size'] / 2)
+            radius = aperture['size'] / 2
+            return Point(0, 0).buffer(radius, arc_resolution(radius, tolerance))
 
         if aperture['type'] == 'R':  # Rectangles
-            loc = location.coords[0]
             width = aperture['width']
             height = aperture['height']
-            minx = loc[0] - width / 2
-            maxx = loc[0] + width / 2
-            miny = loc[1] - height / 2
-            maxy = loc[1] + height / 2
-            return shply_box(minx, miny, maxx, maxy)
+            return shply_box(-width / 2, -height / 2, width / 2, height / 2)
 
         if aperture['type'] == 'O':  # Obround
-            loc = location.coords[0]
             width = aperture['width']
             height = aperture['height']
             if width > height:
-                p1 = Point(loc[0] + 0.5 * (width - height), loc[1])
-                p2 = Point(loc[0] - 0.5 * (width - height), loc[1])
-                c1 = p1.buffer(height * 0.5)
-                c2 = p2.buffer(height * 0.5)
+                p1 = Point(0.5 * (width - height), 0)
+                p2 = Point(-0.5 * (width - height), 0)
+                resolution = arc_resolution(height * 0.5, tolerance)
+                c1 = p1.buffer(height * 0.5, resolution)
+                c2 = p2.buffer(height * 0.5, resolution)
             else:
-                p1 = Point(loc[0], loc[1] + 0.5 * (height - width))
-                p2 = Point(loc[0], loc[1] - 0.5 * (height - width))
-                c1 = p1.buffer(width * 0.5)
-                c2 = p2.buffer(width * 0.5)
+                p1 = Point(0, 0.5 * (height - width))
+                p2 = Point(0, -0.5 * (height - width))
+                resolution = arc_resolution(width * 0.5, tolerance)
+                c1 = p1.buffer(width * 0.5, resolution)
+                c2 = p2.buffer(width * 0.5, resolution)
             return unary_union([c1, c2]).convex_hull
 
         if aperture['type'] == 'P':  # Regular polygon
-            loc = location.coords[0]
             diam = aperture['diam']
             n_vertices = aperture['nVertices']
             points = []
             for i in range(0, n_vertices):
-                x = loc[0] + 0.5 * diam * (cos(2 * pi * i / n_vertices))
-                y = loc[1] + 0.5 * diam * (sin(2 * pi * i / n_vertices))
+                x = 0.5 * diam * (cos(2 * pi * i / n_vertices))
+                y = 0.5 * diam * (sin(2 * pi * i / n_vertices))
                 points.append((x, y))
             ply = Polygon(points)
             if 'rotation' in aperture:
@@ -1051,15 +1491,39 @@ class Gerber (Geometry):
             return ply
 
         if aperture['type'] == 'AM':  # Aperture Macro
-            loc = location.coords[0]
             flash_geo = aperture['macro'].make_geometry(aperture['modifiers'])
             if flash_geo.is_empty:
                 log.warning("Empty geometry for Aperture Macro: %s" % str(aperture['macro'].name))
-            return affinity.translate(flash_geo, xoff=loc[0], yoff=loc[1])
+            return flash_geo
 
         log.warning("Unknown aperture type: %s" % aperture['type'])
         return None
-    
+
+    @staticmethod
+    def create_flash_geometry(location, aperture, tolerance=None):
+        """
+        Shape of the given aperture flashed at ``location``.
+
+        :param location: Center of the flash.
+        :type location: Point or list
+        :param aperture: Aperture definition as in ``self.apertures``.
+        :type aperture: dict
+        :param tolerance: See ``create_flash_template()``.
+        :type tolerance: float
+        :return: The shape or None if the aperture type is not supported.
+        :rtype: BaseGeometry
+        """
+
+        if type(location) == list:
+            location = Point(location)
+
+        flash_geo = Gerber.create_flash_template(aperture, tolerance)
+        if flash_geo is None:
+            return None
+
+        loc = location.coords[0]
+        return affinity.translate(flash_geo, xoff=loc[0], yoff=loc[1])
+
     def create_geometry(self):
         """
         Geometry from a Gerber file is made up entirely of polygons.
@@ -0,0 +1,117 @@
+############################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# http://flatcam.org                                       #
+# MIT Licence                                              #
+############################################################
+
+from multiprocessing import shared_memory
+
+from shapely import wkb
+from shapely.geometry import MultiPolygon, Polygon
+
+from .tiling import tiled_buffer
+from .utils import setup_log
+
+log = setup_log("fcCamlib.isolation")
+
+# Geometry of the last job seen by this worker process, by the name
+# of its shared memory block, so it is read once per worker.
+_shared = {}
+
+
+def isolation_offsets(dia, passes, overlap):
+    """
+    Offset of each isolation pass from the copper.
+
+    :param dia: Tool diameter.
+    :param passes: Number of passes.
+    :type passes: int
+    :param overlap: Overlap between passes in fraction of tool diameter.
+    :return: List of offsets.
+    :rtype: list
+    """
+    return [(2 * i + 1) / 2.0 * dia - i * overlap * dia for i in range(passes)]
+
+
+def reverse_exteriors(geom):
+    """
+    The same polygons with their exteriors going the other way.
+
+    :param geom: Polygon or MultiPolygon
+    :rtype: Polygon or MultiPolygon
+    """
+    if type(geom) is MultiPolygon:
+        return MultiPolygon([Polygon(p.exterior.coords[::-1], p.interiors) for p in geom.geoms])
+    elif type(geom) is Polygon:
+        return Polygon(geom.exterior.coords[::-1], geom.interiors)
+    raise TypeError("Unexpected geometry: %s" % type(geom))
+
+
+def _load_shared(name, size):
+    """
+    Geometry from a shared memory block made by ``parallel_buffers()``.
+    """
+    geom = _shared.get(name)
+    if geom is None:
+        # Registers the block again with the resource tracker shared
+        # with the parent, which is a no-op. See parallel_buffers().
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            geom = wkb.loads(bytes(shm.buf[:size]))
+        finally:
+            shm.close()
+        _shared.clear()
+        _shared[name] = geom
+    return geom
+
+
+def _buffer_job(job):
+    """
+    Process pool worker. Buffers the shared geometry.
+
+    :param job: (name, size, index, distance, kwargs): Name and size
+        of the shared memory block holding the geometry as WKB, index
+        of the job, and the distance and keyword arguments of
+        ``buffer()``.
+    :type job: tuple
+    :return: (index, buffer as WKB)
+    :rtype: tuple
+    """
+    name, size, index, distance, kwargs = job
+    return index, tiled_buffer(_load_shared(name, size), distance, **kwargs).wkb
+
+
+def parallel_buffers(geometry, distances, pool, **kwargs):
+    """
+    Buffers of ``geometry`` at several distances, each an independent
+    job in ``pool``.
+
+    The geometry is written once as WKB to a shared memory block that
+    every worker reads, and the buffers are yielded as soon as they
+    are finished, so the first ones can be used while the others are
+    computed.
+
+    The workers must share the resource tracker of this process, so
+    the pool must be created after ``resource_tracker.ensure_running()``
+    (see ``App.new_pool()``). Otherwise the tracker of a worker unlinks
+    the block when the worker exits.
+
+    :param geometry: Shapely geometry.
+    :param distances: Buffer distances.
+    :type distances: list
+    :param pool: multiprocessing.Pool
+    :param kwargs: Keyword arguments of ``buffer()``.
+    :return: Generator of (index, buffer), in order of completion.
+    """
+    data = geometry.wkb
+    shm = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+    try:
+        shm.buf[:len(data)] = data
+        log.debug("parallel_buffers(): %d buffers of %d bytes of geometry." % (len(distances), len(data)))
+
+        jobs = [(shm.name, len(data), i, distance, kwargs) for i, distance in enumerate(distances)]
+        for i, result in pool.imap_unordered(_buffer_job, jobs):
+            yield i, wkb.loads(result)
+    finally:
+        shm.close()
+        shm.unlink()
@@ -0,0 +1,115 @@
+############################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# http://flatcam.org                                       #
+# MIT Licence                                              #
+############################################################
+
+import os
+import queue
+import traceback
+
+from shapely import wkb
+from shapely.geometry import LinearRing
+
+from .geometry import Geometry
+from .utils import setup_log
+
+log = setup_log("fcCamlib.ncc")
+
+
+def _clear(polygon, tooldia, overlap):
+    """
+    Paths clearing a polygon, or the traceback if it failed.
+
+    :return: (paths, error)
+    """
+    try:
+        return list(Geometry.clear_polygon(polygon, tooldia, overlap).get_objects()), None
+    except Exception:
+        return None, traceback.format_exc()
+
+
+def clear_polygon_job(job):
+    """
+    Process pool worker. Clears one polygon, see
+    ``Geometry.clear_polygon()``.
+
+    :param job: (index, polygon as WKB, tooldia, overlap)
+    :type job: tuple
+    :return: (index, paths, error). ``paths`` is a list of (WKB, is
+        a LinearRing) or None if clearing failed, in which case
+        ``error`` holds the traceback.
+    :rtype: tuple
+    """
+    index, polygon, tooldia, overlap = job
+    paths, error = _clear(wkb.loads(polygon), tooldia, overlap)
+    if paths is not None:
+        paths = [(path.wkb, type(path) is LinearRing) for path in paths]
+    return index, paths, error
+
+
+def _load_path(data, ring):
+    path = wkb.loads(data)
+    return LinearRing(path.coords) if ring else path
+
+
+def clear_polygons(polygons, tooldia, overlap, pool=None, window=None):
+    """
+    Clears each of the polygons, see ``Geometry.clear_polygon()``.
+    They are independent jobs in ``pool`` if given.
+
+    Only ``window`` jobs are in the pool at a time, and the next one
+    is sent when one finishes. Stopping the iteration (i.e. closing
+    the generator on cancel) stops sending them, leaving at most
+    ``window`` jobs to finish in the background.
+
+    :param polygons: Polygons to clear.
+    :type polygons: list
+    :param tooldia: Diameter of the tool.
+    :param overlap: Overlap of toolpasses.
+    :param pool: multiprocessing.Pool
+    :param window: Jobs in the pool at a time. Defaults to 2 per CPU.
+    :type window: int
+    :return: Generator of (index, paths, error) in order of
+        completion. ``paths`` is a list of LineString and LinearRing
+        or None if clearing failed, in which case ``error`` holds the
+        traceback.
+    """
+    if pool is None:
+        for i, polygon in enumerate(polygons):
+            paths, error = _clear(polygon, tooldia, overlap)
+            yield i, paths, error
+        return
+
+    if window is None:
+        window = 2 * (os.cpu_count() or 1)
+
+    log.debug("clear_polygons(): %d polygons, %d at a time." % (len(polygons), window))
+
+    # Filled by the pool's result thread.
+    finished = queue.Queue()
+
+    def submit(job):
+        pool.apply_async(clear_polygon_job, (job,), callback=finished.put,
+                         error_callback=lambda e: finished.put((job[0], None, repr(e))))
+
+    jobs = ((i, polygon.wkb, tooldia, overlap) for i, polygon in enumerate(polygons))
+    pending = 0
+    for job in jobs:
+        submit(job)
+        pending += 1
+        if pending == window:
+            break
+
+    while pending > 0:
+        i, paths, error = finished.get()
+        pending -= 1
+
+        job = next(jobs, None)
+        if job is not None:
+            submit(job)
+            pending += 1
+
+        if paths is not None:
+            paths = [_load_path(data, ring) for data, ring in paths]
+        yield i, paths, error
@@ -0,0 +1,370 @@
+############################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# http://flatcam.org                                       #
+# MIT Licence                                              #
+############################################################
+
+import hashlib
+import json
+import os
+
+from shapely import wkb
+from shapely.geometry import GeometryCollection
+from shapely.geometry.base import BaseGeometry
+
+from .aperture import ApertureMacro
+from .drills import DrillTable, DrillView
+from .parsestats import ParseStats
+from .utils import setup_log
+
+log = setup_log("fcCamlib.parsecache")
+
+
+class ParseCache:
+    """
+    Content addressed on-disk cache of parsed Gerber and Excellon
+    objects. Entries are keyed on the hash of the source file and
+    the parameters that affect the result of parsing, so an entry
+    never has to be invalidated, only evicted.
+
+    Each entry is a single file named after its key. It holds a
+    line of JSON with the attributes listed in the object's
+    ``cache_attrs`` followed by ``solid_geometry`` as WKB. Objects
+    with ``cache_geometry`` set to False rebuild their geometry from
+    the attributes with ``create_geometry()`` instead.
+
+    Least recently used entries are removed when the total size
+    goes above ``defaults["size"]`` (MB). Use is tracked with the
+    modification time of the entry files.
+    """
+
+    # Bump when the layout of entries or the parsed results change.
+    version = 4
+
+    defaults = {
+        "enabled": True,
+        "size": 256
+    }
+
+    def __init__(self, path):
+        """
+        :param path: Directory for the cache entries. Created if
+            it does not exist.
+        :type path: str
+        """
+        self.path = path
+
+    @staticmethod
+    def file_hash(filename):
+        """
+        SHA-1 of the contents of the given file.
+
+        :param filename: Path to the file.
+        :type filename: str
+        :return: Hex digest.
+        :rtype: str
+        """
+        h = hashlib.sha1()
+        with open(filename, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def key(self, filename, kind, **params):
+        """
+        Key for the result of parsing ``filename`` as ``kind``
+        with the given parameters.
+
+        :param filename: Source file.
+        :type filename: str
+        :param kind: "gerber" or "excellon".
+        :type kind: str
+        :param params: Anything that affects the parsed result, i.e.
+            steps per circle, units, etc. Must be JSON serializable.
+        :return: Hex digest.
+        :rtype: str
+        """
+        desc = {
+            "version": self.version,
+            "kind": kind,
+            "hash": self.file_hash(filename),
+            "params": params
+        }
+        return hashlib.sha1(json.dumps(desc, sort_keys=True).encode()).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.path, key + '.fcc')
+
+    def read(self, key):
+        """
+        Raw contents of the entry for ``key``, as produced by
+        ``dumps()``, and marks it as recently used.
+
+        :param key: Key from ``self.key()``.
+        :return: The entry or None if not found or disabled.
+        :rtype: bytes
+        """
+        if not self.defaults["enabled"]:
+            return None
+
+        path = self.entry_path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        # Mark as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return data
+
+    def load(self, key, obj):
+        """
+        Populates ``obj`` from the entry for ``key`` if there is one.
+
+        :param key: Key from ``self.key()``.
+        :param obj: Gerber or Excellon to populate.
+        :return: True if found and loaded, False otherwise.
+        :rtype: bool
+        """
+        data = self.read(key)
+        if data is None:
+            return False
+
+        try:
+            self.loads(data, obj)
+        except Exception as e:
+            log.warning("Discarding unreadable cache entry %s: %s" % (key, str(e)))
+            self.remove(key)
+            return False
+
+        log.debug("Cache hit: %s" % key)
+        return True
+
+    def load_or_parse(self, key, obj, parse):
+        """
+        Populates ``obj`` from the entry for ``key``, or else with
+        ``parse()`` and stores the result. The cache is not read while
+        parse statistics are enabled, since they need a real parse.
+
+        :param key: Key from ``self.key()``.
+        :param obj: Gerber or Excellon to populate.
+        :param parse: Callable that populates ``obj`` from its file.
+        :return: True if loaded from the cache, False if parsed.
+        :rtype: bool
+        """
+        if not ParseStats.defaults["enabled"] and self.load(key, obj):
+            return True
+
+        parse()
+        self.store(key, obj)
+        return False
+
+    def store(self, key, obj):
+        """
+        Saves the parsed state of ``obj`` under ``key`` and evicts
+        old entries if the cache grew above its size limit.
+
+        :param key: Key from ``self.key()``.
+        :param obj: Parsed Gerber or Excellon.
+        :return: None
+        """
+        if not self.defaults["enabled"]:
+            return
+
+        self.write(key, self.dumps(obj))
+
+    def write(self, key, data):
+        """
+        Saves an entry produced by ``dumps()`` under ``key`` and
+        evicts old entries if the cache grew above its size limit.
+
+        :param key: Key from ``self.key()``.
+        :param data: Entry contents.
+        :type data: bytes
+        :return: None
+        """
+        if not self.defaults["enabled"]:
+            return
+
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+
+        path = self.entry_path(key)
+        tmp_path = path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            log.warning("Could not write cache entry %s: %s" % (key, str(e)))
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        log.debug("Cache store: %s" % key)
+        self.evict()
+
+    @classmethod
+    def dumps(cls, obj):
+        """
+        Serializes the parsed state of a Gerber or Excellon: a line
+        of JSON with the attributes in ``obj.cache_attrs`` followed by
+        ``solid_geometry`` as WKB. This is also how parsed objects are
+        sent back from worker processes.
+
+        :param obj: Parsed Gerber or Excellon.
+        :rtype: bytes
+        """
+        header = {attr: getattr(obj, attr) for attr in obj.cache_attrs}
+        if not getattr(obj, "cache_geometry", True):
+            header["solid_is_list"] = None
+            geo = GeometryCollection()
+        elif isinstance(obj.solid_geometry, list):
+            header["solid_is_list"] = True
+            geo = GeometryCollection(obj.solid_geometry)
+        else:
+            header["solid_is_list"] = False
+            geo = obj.solid_geometry
+
+        return json.dumps(header, default=cls.encode).encode() + b'\n' + geo.wkb
+
+    @classmethod
+    def loads(cls, data, obj):
+        """
+        Populates ``obj`` from the output of ``dumps()``.
+
+        :param data: Serialized state.
+        :type data: bytes
+        :param obj: Gerber or Excellon to populate.
+        :return: None
+        """
+        header, geo = data.split(b'\n', 1)
+        header = json.loads(header.decode(), object_hook=cls.decode)
+        geo = wkb.loads(geo)
+
+        for attr in obj.cache_attrs:
+            setattr(obj, attr, header[attr])
+
+        if header["solid_is_list"] is None:
+            obj.create_geometry()
+        elif header["solid_is_list"]:
+            obj.solid_geometry = list(geo.geoms)
+        else:
+            obj.solid_geometry = geo
+
+    def entries(self):
+        """
+        Cache entries, most recently used first.
+
+        :return: List of (key, size in bytes, last use timestamp).
+        :rtype: list
+        """
+        if not os.path.isdir(self.path):
+            return []
+
+        entries = []
+        for name in os.listdir(self.path):
+            if not name.endswith('.fcc'):
+                continue
+            try:
+                st = os.stat(os.path.join(self.path, name))
+            except OSError:
+                continue
+            entries.append((name[:-4], st.st_size, st.st_mtime))
+
+        entries.sort(key=lambda e: e[2], reverse=True)
+        return entries
+
+    def size(self):
+        """
+        :return: Total size of the entries in bytes.
+        :rtype: int
+        """
+        return sum(e[1] for e in self.entries())
+
+    def remove(self, key):
+        try:
+            os.remove(self.entry_path(key))
+        except OSError:
+            pass
+
+    def evict(self):
+        """
+        Removes least recently used entries until the total size
+        is within ``defaults["size"]``.
+
+        :return: Number of entries removed.
+        :rtype: int
+        """
+        max_size = self.defaults["size"] * 1024 * 1024
+        entries = self.entries()
+        total = sum(e[1] for e in entries)
+        removed = 0
+        while total > max_size and len(entries) > 0:
+            key, size, _ = entries.pop()
+            self.remove(key)
+            total -= size
+            removed += 1
+
+        if removed > 0:
+            log.debug("Evicted %d cache entries." % removed)
+        return removed
+
+    def clear(self):
+        """
+        Removes all entries.
+
+        :return: Number of entries removed.
+        :rtype: int
+        """
+        entries = self.entries()
+        for key, _, _ in entries:
+            self.remove(key)
+        return len(entries)
+
+    @staticmethod
+    def encode(obj):
+        """
+        JSON encoder for the values found in ``cache_attrs``.
+        """
+        if isinstance(obj, ApertureMacro):
+            return {
+                "__class__": "ApertureMacro",
+                "__inst__": obj.to_dict()
+            }
+        if isinstance(obj, BaseGeometry):
+            return {
+                "__class__": "Shply",
+                "__inst__": obj.wkb_hex
+            }
+        if isinstance(obj, DrillView):
+            obj = obj.table
+        if isinstance(obj, DrillTable):
+            return {
+                "__class__": "DrillTable",
+                "__inst__": obj.to_dict()
+            }
+        raise TypeError("Cannot cache %s" % type(obj))
+
+    @staticmethod
+    def decode(d):
+        """
+        JSON decoder, inverse of ``encode()``.
+        """
+        if '__class__' in d and '__inst__' in d:
+            if d['__class__'] == "Shply":
+                return wkb.loads(d['__inst__'], hex=True)
+            if d['__class__'] == "ApertureMacro":
+                am = ApertureMacro()
+                am.from_dict(d['__inst__'])
+                return am
+            if d['__class__'] == "DrillTable":
+                return DrillTable.from_dict(d['__inst__'])
+        return d
@@ -0,0 +1,172 @@
+############################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# http://flatcam.org                                       #
+# MIT Licence                                              #
+############################################################
+
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+
+from .utils import setup_log
+
+log = setup_log("fcCamlib.parsestats")
+
+
+class ParseStats:
+    """
+    Opt-in instrumentation of the Gerber and Excellon parsers.
+
+    Records how many statements of each kind were found and how long
+    handling them took, the time spent in named phases (reading and
+    classifying statements, drawing flashes, the final union, etc.)
+    and the largest number of polygons held in the parser's buffer.
+
+    Parsers create one with ``ParseStats.create()``, which returns
+    None unless ``defaults["enabled"]`` is set, so the only cost when
+    disabled is a check for None in a handful of places. Statement
+    timing is done by wrapping the stream of statements with
+    ``timed()``, outside of the parser's main loop.
+
+    The time of a statement runs from the moment it was read until
+    the next one is requested. Phases timed with ``phase()`` during
+    the main loop are therefore also part of the time of the
+    statement that triggered them.
+    """
+
+    defaults = {
+        "enabled": False
+    }
+
+    # Report of the most recent parse.
+    last = None
+
+    def __init__(self, source, kind):
+        """
+        :param source: File name or description of the input.
+        :type source: str
+        :param kind: "gerber" or "excellon".
+        :type kind: str
+        """
+        self.source = source
+        self.kind = kind
+        self.counts = {}
+        self.times = {}
+        self.phases = {}
+        self.peak_buffer = 0
+        self.total = 0.0
+        self.start = perf_counter()
+
+    @classmethod
+    def create(cls, source, kind):
+        """
+        New instance if instrumentation is enabled, None otherwise.
+        """
+        if not cls.defaults["enabled"]:
+            return None
+        return cls(source, kind)
+
+    def timed(self, statements, kind_of, read_phase="read"):
+        """
+        Wraps an iterable of statements, counting them by kind and
+        timing their handling. Time spent producing the statements
+        goes to the phase ``read_phase``.
+
+        :param statements: Iterable of statements.
+        :param kind_of: Function of a statement returning the name of
+            its kind.
+        :param read_phase: Phase for the time spent in ``statements``.
+        :type read_phase: str
+        :return: Generator of the same statements.
+        """
+        counts = self.counts
+        times = self.times
+        read_time = 0.0
+
+        t = perf_counter()
+        for statement in statements:
+            t_start = perf_counter()
+            read_time += t_start - t
+
+            kind = kind_of(statement)
+            counts[kind] = counts.get(kind, 0) + 1
+
+            yield statement
+
+            t = perf_counter()
+            times[kind] = times.get(kind, 0.0) + t - t_start
+
+        read_time += perf_counter() - t
+        self.phases[read_phase] = self.phases.get(read_phase, 0.0) + read_time
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Context manager timing the enclosed block as phase ``name``.
+        Times accumulate over repeated uses of the same phase.
+        """
+        t = perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + perf_counter() - t
+
+    @staticmethod
+    def phase_of(stats, name):
+        """
+        ``stats.phase(name)`` or a context manager doing nothing if
+        ``stats`` is None.
+        """
+        if stats is None:
+            return nullcontext()
+        return stats.phase(name)
+
+    def buffer_size(self, size):
+        """
+        Records the current size of the parser's polygon buffer.
+        """
+        if size > self.peak_buffer:
+            self.peak_buffer = size
+
+    def finish(self):
+        """
+        Stops the clock, makes this the ``last`` report and logs it.
+        """
+        self.total = perf_counter() - self.start
+        ParseStats.last = self
+        log.info(self.format())
+
+    def report(self):
+        """
+        Structured report.
+
+        :return: Dictionary with the source, kind, total time,
+            statements (kind -> {"count", "time"}), phases (name ->
+            time) and the peak buffer size. Times in seconds.
+        :rtype: dict
+        """
+        return {
+            "source": self.source,
+            "kind": self.kind,
+            "total": self.total,
+            "statements": {k: {"count": self.counts[k], "time": self.times.get(k, 0.0)}
+                           for k in self.counts},
+            "phases": dict(self.phases),
+            "peak_buffer": self.peak_buffer
+        }
+
+    def format(self):
+        """
+        The report as text, statements and phases sorted by time.
+
+        :rtype: str
+        """
+        lines = ["Parse statistics for %s (%s): %.3f s" % (self.source, self.kind, self.total),
+                 "  %-16s %10s %10s" % ("Statement", "Count", "Time (s)")]
+        for kind in sorted(self.counts, key=lambda k: self.times.get(k, 0.0), reverse=True):
+            lines.append("  %-16s %10d %10.3f" % (kind, self.counts[kind], self.times.get(kind, 0.0)))
+        lines.append("  %-16s %21s" % ("Phase", "Time (s)"))
+        for name in sorted(self.phases, key=self.phases.get, reverse=True):
+            lines.append("  %-16s %21.3f" % (name, self.phases[name]))
+        if self.peak_buffer > 0:
+            lines.append("  Peak polygon buffer: %d" % self.peak_buffer)
+        return '\n'.join(lines)
@@ -0,0 +1,154 @@
+############################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# http://flatcam.org                                       #
+# MIT Licence                                              #
+############################################################
+
+import mmap
+import re
+from contextlib import contextmanager
+
+# Bytes decoded at a time by chunks().
+CHUNK_SIZE = 1 << 20
+
+_newline_re = re.compile(r'\r\n|\r|\n')
+
+
+@contextmanager
+def mapped(filename):
+    """
+    Memory-maps a file for reading. The contents are paged in by the
+    OS as they are accessed and are never copied as a whole.
+
+    :param filename: Path to the file.
+    :type filename: str
+    :return: Context manager giving a read-only ``mmap``, or an empty
+        ``bytes`` for an empty file, which cannot be mapped.
+    """
+    with open(filename, 'rb') as f:
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            yield b''
+            return
+
+        try:
+            yield buf
+        finally:
+            buf.close()
+
+
+def chunk_spans(buf, size=CHUNK_SIZE):
+    """
+    Splits ``buf`` in spans of about ``size`` bytes that end at the
+    end of a line, so no line is split across spans.
+
+    :param buf: File contents, i.e. from ``mapped()``.
+    :type buf: mmap.mmap or bytes
+    :param size: Approximate size of the spans.
+    :type size: int
+    :return: Generator of (start, end) offsets.
+    """
+    n = len(buf)
+    start = 0
+    while start < n:
+        end = start + size
+        if end >= n:
+            end = n
+        else:
+            cut = buf.rfind(b'\n', start, end)
+            if cut < 0:
+                cut = buf.rfind(b'\r', start, end)
+            if cut < 0:  # Very long line
+                cut = buf.find(b'\n', end)
+                if cut < 0:
+                    cut = n - 1
+            end = cut + 1
+        yield start, end
+        start = end
+
+
+def split_lines(text):
+    """
+    Like ``text.splitlines()``, but only LF, CRLF and CR end a line.
+    ``str.splitlines()`` also splits on characters such as form feed
+    or ``\\x85``, which are valid data in latin-1 text.
+
+    :param text: Text to split.
+    :type text: str
+    :return: Lines without line endings.
+    :rtype: list
+    """
+    lines = _newline_re.split(text)
+    if lines[-1] == '':
+        lines.pop()
+    return lines
+
+
+def chunks(buf):
+    """
+    Contents of ``buf`` as ``str``, one chunk of whole lines at a
+    time. With ``buf`` from ``mapped()``, memory use does not grow
+    with the size of the file.
+
+    :param buf: File contents, i.e. from ``mapped()``.
+    :type buf: mmap.mmap or bytes
+    :return: Generator of chunks.
+    """
+    for start, end in chunk_spans(buf):
+        yield buf[start:end].decode('latin-1')
+
+
+def lines(buf):
+    """
+    Lines in ``buf`` without line endings. Lines may end in LF,
+    CRLF or CR.
+
+    :param buf: File contents, i.e. from ``mapped()``.
+    :type buf: mmap.mmap or bytes
+    :return: Generator of lines.
+    """
+    for chunk in chunks(buf):
+        yield from split_lines(chunk)
+
+
+def gerber_statements(buf):
+    """
+    Gerber statements in ``buf``, as expected by
+    ``Gerber.parse_lines()``. Lines are stripped of spaces and split
+    after each ``*``, except that what is left of a line is kept whole
+    if it ends with ``%`` (extended codes).
+
+    :param buf: File contents, i.e. from ``mapped()``.
+    :type buf: mmap.mmap or bytes
+    :return: Generator of statements.
+    """
+    for chunk in chunks(buf):
+        for line in split_lines(chunk):
+            line = line.strip(' ')
+            if len(line) == 0:
+                continue
+
+            # Most lines are a single statement.
+            last = line[-1]
+            if last == '%' or (last == '*' and line.find('*') == len(line) - 1):
+                yield line
+                continue
+
+            while len(line) > 0:
+
+                # If ends with '%' leave as is.
+                if line[-1] == '%':
+                    yield line
+                    break
+
+                # Split after '*' if any.
+                starpos = line.find('*')
+                if starpos > -1:
+                    yield line[:starpos + 1]
+                    line = line[starpos + 1:]
+
+                # Otherwise leave as is.
+                else:
+                    yield line
+                    break
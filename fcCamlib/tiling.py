@@ -0,0 +1,162 @@
+############################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# http://flatcam.org                                       #
+# MIT Licence                                              #
+############################################################
+
+from math import ceil, sqrt
+
+import numpy as np
+from shapely import wkb
+from shapely.geometry import MultiPolygon, box
+from shapely.ops import unary_union
+
+try:
+    from shapely import bounds as bounds_all, get_num_coordinates, get_parts, get_type_id
+except ImportError:  # Shapely < 2
+    get_parts = None
+
+from .union import parallel_union
+from .utils import setup_log
+
+log = setup_log("fcCamlib.tiling")
+
+
+def _buffer_tile(job):
+    """
+    Process pool worker. Buffers the geometry around one tile and
+    clips the result to the tile.
+
+    :param job: (parts, tile, margin, distance, kwargs): Parts of the
+        geometry near the tile as WKB, the tile as (xmin, ymin, xmax,
+        ymax), the margin around the tile the buffer can reach, and
+        the distance and keyword arguments of ``buffer()``.
+    :type job: tuple
+    :return: Buffer within the tile, as WKB.
+    :rtype: bytes
+    """
+    parts, tile, margin, distance, kwargs = job
+    xmin, ymin, xmax, ymax = tile
+
+    around = box(xmin - margin, ymin - margin, xmax + margin, ymax + margin)
+
+    # Clipped before the union, which would otherwise go over the
+    # whole of large parts.
+    geom = unary_union([wkb.loads(p).intersection(around) for p in parts])
+
+    return geom.buffer(distance, **kwargs).intersection(box(*tile)).wkb
+
+
+def tile_grid(bounds, n_vertices, tile_vertices=4096):
+    """
+    Edges of a grid of square-ish tiles over ``bounds`` with about
+    ``tile_vertices`` vertices per tile if they were evenly spread.
+    The edges are a tiny bit off the bounds, so they are unlikely to
+    fall on coordinates.
+
+    :param bounds: (xmin, ymin, xmax, ymax)
+    :param n_vertices: Number of vertices of the geometry.
+    :type n_vertices: int
+    :param tile_vertices: Target number of vertices per tile.
+    :type tile_vertices: int
+    :return: (xs, ys) arrays of edges, or None if a single tile is
+        enough.
+    :rtype: tuple
+    """
+    side = int(ceil(sqrt(n_vertices / float(tile_vertices))))
+    if side < 2:
+        return None
+
+    xmin, ymin, xmax, ymax = bounds
+    margin = 1e-7 * max(xmax - xmin, ymax - ymin, 1.0)
+    xs = np.linspace(xmin - margin, xmax + margin * 1.618, side + 1)
+    ys = np.linspace(ymin - margin, ymax + margin * 1.618, side + 1)
+    return xs, ys
+
+
+def tiled_buffer(geometry, distance, pool=None, tile_vertices=4096, **kwargs):
+    """
+    ``geometry.buffer(distance, **kwargs)``, done by tiles.
+
+    The plane is divided into a grid of tiles sized for about
+    ``tile_vertices`` vertices each (see ``tile_grid()``). Each tile
+    is buffered with just the geometry within a margin around it
+    wider than the buffer can reach, so the result inside the tile
+    is the same as the buffer of the whole, and it is then clipped
+    to the tile. The tiles are buffered in the workers of ``pool``
+    and stitched back together. Only the pieces reaching the edge of
+    their tile are united.
+
+    The result matches the buffer of the whole within the tolerance
+    GEOS already applies to the input of buffers.
+
+    Without a pool, only negative distances are tiled: a single
+    process does not grow geometry faster by tiles, but it does
+    shrink it faster. Geometry too small to need more than one tile,
+    or any geometry with Shapely < 2, is buffered whole.
+
+    :param geometry: Shapely geometry.
+    :param distance: Buffer distance. Negative shrinks.
+    :type distance: float
+    :param pool: multiprocessing.Pool
+    :param tile_vertices: Target number of vertices per tile.
+    :type tile_vertices: int
+    :param kwargs: Keyword arguments of ``buffer()``.
+    :return: The buffered geometry.
+    :rtype: Polygon or MultiPolygon
+    """
+    if get_parts is None or (pool is None and distance >= 0) or geometry.is_empty:
+        return geometry.buffer(distance, **kwargs)
+
+    parts = get_parts(geometry)
+    n_vertices = int(get_num_coordinates(parts).sum())
+    part_bounds = bounds_all(parts)
+
+    # Mitred corners go up to mitre_limit times the distance away.
+    reach = abs(distance)
+    if kwargs.get("join_style") in (2, "mitre"):
+        reach *= max(kwargs.get("mitre_limit", 5.0), 1.0)
+    margin = 1.5 * reach
+    grow = reach if distance > 0 else 0.0
+
+    xmin, ymin = part_bounds[:, :2].min(axis=0) - grow
+    xmax, ymax = part_bounds[:, 2:].max(axis=0) + grow
+    grid = tile_grid((xmin, ymin, xmax, ymax), n_vertices, tile_vertices)
+    if grid is None:
+        return geometry.buffer(distance, **kwargs)
+    xs, ys = grid
+
+    wkbs = np.array([p.wkb for p in parts], dtype=object)
+    jobs = []
+    for x0, x1 in zip(xs[:-1], xs[1:]):
+        for y0, y1 in zip(ys[:-1], ys[1:]):
+            near = ((part_bounds[:, 0] <= x1 + margin) & (part_bounds[:, 2] >= x0 - margin) &
+                    (part_bounds[:, 1] <= y1 + margin) & (part_bounds[:, 3] >= y0 - margin))
+            if near.any():
+                jobs.append((list(wkbs[near]), (x0, y0, x1, y1), margin, distance, kwargs))
+
+    log.debug("tiled_buffer(): %d vertices in %d tiles." % (n_vertices, len(jobs)))
+
+    if pool is None:
+        results = map(_buffer_tile, jobs)
+    else:
+        results = pool.map(_buffer_tile, jobs)
+
+    inner, edge = [], []
+    eps = 1e-6 * max(xs[-1] - xs[0], ys[-1] - ys[0])
+    for job, result in zip(jobs, results):
+        x0, y0, x1, y1 = job[1]
+        pieces = get_parts(wkb.loads(result))
+        pieces = pieces[get_type_id(pieces) == 3]
+        b = bounds_all(pieces)
+        touching = ((b[:, 0] <= x0 + eps) | (b[:, 1] <= y0 + eps) |
+                    (b[:, 2] >= x1 - eps) | (b[:, 3] >= y1 - eps))
+        inner.extend(pieces[~touching])
+        edge.extend(pieces[touching])
+
+    log.debug("tiled_buffer(): Stitching %d of %d pieces." % (len(edge), len(inner) + len(edge)))
+
+    polygons = inner + list(get_parts(parallel_union(edge, pool)))
+    if len(polygons) == 1:
+        return polygons[0]
+    return MultiPolygon(polygons)
@@ -0,0 +1,245 @@
+############################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# http://flatcam.org                                       #
+# MIT Licence                                              #
+############################################################
+
+from collections.abc import Sequence
+
+import numpy as np
+from shapely.geometry import LineString
+
+try:
+    from shapely import linestrings
+except ImportError:  # Shapely < 2
+    linestrings = None
+
+# Kind of a path, by kind code: travel ("T") or cut ("C"), fast ("F")
+# or slow ("S"). The code is 2 * travel + slow.
+KINDS = ("CF", "CS", "TF", "TS")
+
+
+def kind_code(kind):
+    """
+    Kind code of a kind like ``["T", "F"]`` or "TF".
+
+    :rtype: int
+    """
+    return 2 * (kind[0] == "T") + (kind[1] == "S")
+
+
+class Toolpaths:
+    """
+    Paths of a CNC job stored in arrays: the vertices of all paths,
+    one after the other, in a single (n, 2) array, the offset of each
+    path in it, and the kind code (see ``KINDS``), Z and feedrate of
+    each path.
+
+    Path ``i`` is ``vertices[offsets[i]:offsets[i + 1]]``.
+
+    Transformations act on the vertex array in place and keep the
+    bounds, so ``bounds()`` does not go through the vertices again.
+    Shapely geometry is only made by ``linestrings()``.
+    """
+
+    def __init__(self, vertices=None, offsets=None, kinds=None, z=None, feeds=None):
+        """
+        :param vertices: (n, 2) array-like of coordinates.
+        :param offsets: Start of each path in ``vertices``, followed
+            by n.
+        :param kinds: Kind code of each path.
+        :param z: Z of each path, 0 if None.
+        :param feeds: Feedrate of each path, NaN if None or unknown.
+        """
+        if vertices is None:
+            vertices, offsets, kinds = np.empty((0, 2)), [0], []
+        self.vertices = np.asarray(vertices, dtype=float).reshape(-1, 2)
+        self.offsets = np.asarray(offsets, dtype=np.intp)
+        self.kinds = np.asarray(kinds, dtype=np.uint8)
+        self.z = np.zeros(len(self.kinds)) if z is None else np.asarray(z, dtype=float)
+        self.feeds = np.full(len(self.kinds), np.nan) if feeds is None else np.asarray(feeds, dtype=float)
+
+        # (xmin, ymin, xmax, ymax), computed on first use.
+        self._bounds = None
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def bounds(self):
+        """
+        Bounds of all paths: (xmin, ymin, xmax, ymax), or None without
+        vertices. Computed once and updated by transformations.
+
+        :rtype: tuple
+        """
+        if self._bounds is None and len(self.vertices) > 0:
+            self._bounds = np.concatenate([self.vertices.min(axis=0), self.vertices.max(axis=0)])
+        return None if self._bounds is None else tuple(self._bounds.tolist())
+
+    def starts(self):
+        """
+        First vertex of each path, as (m, 2) array.
+        """
+        return self.vertices[self.offsets[:-1]]
+
+    def of_kind(self, kind):
+        """
+        Indexes of the paths of a kind.
+
+        :param kind: "T" or "C" for travel or cut, or a full kind
+            like "TF".
+        :type kind: str
+        :rtype: numpy.ndarray
+        """
+        if len(kind) == 2:
+            return np.flatnonzero(self.kinds == kind_code(kind))
+        return np.flatnonzero((self.kinds >= 2) == (kind == "T"))
+
+    def linestrings(self, index=None):
+        """
+        Shapely geometry of paths, made at once with Shapely 2.
+
+        :param index: Indexes of the paths, or None for all.
+        :return: List of LineString.
+        :rtype: list
+        """
+        if index is None:
+            index = np.arange(len(self))
+        index = np.asarray(index, dtype=np.intp)
+        if linestrings is None:
+            return [LineString(self.path(i)) for i in index]
+        if len(index) == 0:
+            return []
+
+        lengths = self.offsets[index + 1] - self.offsets[index]
+        first = np.cumsum(lengths) - lengths
+        vertex = np.arange(int(lengths.sum())) + np.repeat(self.offsets[index] - first, lengths)
+        return list(linestrings(self.vertices[vertex], indices=np.repeat(np.arange(len(index)), lengths)))
+
+    def path(self, index):
+        """
+        Vertices of a path. A view: modifying it modifies the store.
+
+        :rtype: numpy.ndarray
+        """
+        return self.vertices[self.offsets[index]:self.offsets[index + 1]]
+
+    def kind(self, index):
+        """
+        Kind of a path as a list, i.e. ``["C", "F"]``.
+        """
+        return list(KINDS[self.kinds[index]])
+
+    def records(self):
+        """
+        The paths as ``{"geom": LineString, "kind": [..]}``
+        dictionaries, the form ``CNCjob.gcode_parsed`` used to have.
+
+        :return: Generator of dictionaries.
+        """
+        for i in range(len(self)):
+            yield {"geom": LineString(self.path(i)), "kind": self.kind(i)}
+
+    @classmethod
+    def from_records(cls, paths):
+        """
+        Store from ``{"geom": LineString, "kind": [..]}`` dictionaries.
+        """
+        paths = list(paths)
+        coords = [np.asarray(p["geom"].coords, dtype=float)[:, :2] for p in paths]
+        offsets = np.zeros(len(paths) + 1, dtype=np.intp)
+        offsets[1:] = np.cumsum([len(c) for c in coords])
+        vertices = np.concatenate(coords) if coords else np.empty((0, 2))
+        return cls(vertices, offsets, [kind_code(p["kind"]) for p in paths])
+
+    def translate(self, dx, dy):
+        self.vertices += (dx, dy)
+        if self._bounds is not None:
+            self._bounds += (dx, dy, dx, dy)
+
+    def scale(self, xfactor, yfactor, origin=(0, 0)):
+        """
+        Scales the vertices around ``origin``. Negative factors
+        mirror.
+        """
+        self.vertices -= origin
+        self.vertices *= (xfactor, yfactor)
+        self.vertices += origin
+        if self._bounds is not None:
+            corners = (self._bounds.reshape(2, 2) - origin) * (xfactor, yfactor) + origin
+            self._bounds = np.concatenate([corners.min(axis=0), corners.max(axis=0)])
+
+    def copy(self):
+        return Toolpaths(self.vertices.copy(), self.offsets.copy(), self.kinds.copy(),
+                         self.z.copy(), self.feeds.copy())
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def to_dict(self):
+        """
+        JSON serializable representation, see ``from_dict()``.
+        """
+        return {
+            "x": self.vertices[:, 0].tolist(),
+            "y": self.vertices[:, 1].tolist(),
+            "offsets": self.offsets.tolist(),
+            "kinds": self.kinds.tolist(),
+            "z": self.z.tolist(),
+            "feeds": [None if np.isnan(f) else f for f in self.feeds.tolist()]
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        feeds = d.get("feeds")
+        if feeds is not None:
+            feeds = [np.nan if f is None else f for f in feeds]
+        return cls(np.column_stack([d["x"], d["y"]]), d["offsets"], d["kinds"], d.get("z"), feeds)
+
+
+class ToolpathView(Sequence):
+    """
+    Read-only list of ``{"geom": LineString, "kind": [..]}``
+    dictionaries over ``Toolpaths``, for code written against the old
+    ``CNCjob.gcode_parsed``. The dictionaries are created on access:
+    modifying them does not modify the store, use the store instead.
+    """
+
+    def __init__(self, toolpaths):
+        self.toolpaths = toolpaths
+
+    def __len__(self):
+        return len(self.toolpaths)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("toolpath index out of range")
+        return {"geom": LineString(self.toolpaths.path(index)), "kind": self.toolpaths.kind(index)}
+
+    def __iter__(self):
+        return self.toolpaths.records()
+
+    def __deepcopy__(self, memo):
+        return ToolpathView(self.toolpaths.copy())
+
+    def __repr__(self):
+        return "<ToolpathView of %d paths>" % len(self)
+
+
+def as_toolpaths(paths):
+    """
+    ``Toolpaths`` from any of the values accepted by
+    ``CNCjob.gcode_parsed``: a store, a view, None or an iterable of
+    ``{"geom": LineString, "kind": [..]}``. Stores are not copied.
+
+    :rtype: Toolpaths or None
+    """
+    if paths is None or isinstance(paths, Toolpaths):
+        return paths
+    if isinstance(paths, ToolpathView):
+        return paths.toolpaths
+    return Toolpaths.from_records(paths)
@@ -0,0 +1,180 @@
+############################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# http://flatcam.org                                       #
+# MIT Licence                                              #
+############################################################
+
+import os
+from math import ceil, sqrt
+
+import numpy as np
+from shapely import wkb
+from shapely.ops import unary_union
+
+try:
+    from shapely import bounds as bounds_all, clip_by_rect, from_wkb, get_parts, get_type_id, is_empty
+    from shapely import multilinestrings
+except ImportError:  # Shapely < 2
+    clip_by_rect = None
+
+from .utils import setup_log
+
+log = setup_log("fcCamlib.union")
+
+
+def _union_wkb(wkbs):
+    """
+    Process pool worker. Union of the given geometries.
+
+    :param wkbs: Geometries as WKB.
+    :type wkbs: list
+    :return: Union as WKB.
+    :rtype: bytes
+    """
+    return unary_union([wkb.loads(w) for w in wkbs]).wkb
+
+
+def str_groups(geoms, n_groups):
+    """
+    Splits geometries into spatially compact groups of about the
+    same size by Sort-Tile-Recursive packing of their bounding box
+    centers. Neighbouring groups in the returned list are also
+    neighbours in space, which keeps the merges in
+    ``parallel_union()`` local.
+
+    :param geoms: Shapely geometries.
+    :type geoms: list
+    :param n_groups: Approximate number of groups.
+    :type n_groups: int
+    :return: List of lists of geometries.
+    :rtype: list
+    """
+    centers = []
+    for geo in geoms:
+        xmin, ymin, xmax, ymax = geo.bounds
+        centers.append(((xmin + xmax) / 2, (ymin + ymax) / 2, geo))
+
+    n_slices = max(int(ceil(sqrt(n_groups))), 1)
+    slice_size = int(ceil(len(centers) / float(n_slices)))
+    group_size = int(ceil(slice_size / float(n_slices)))
+
+    centers.sort(key=lambda c: c[0])
+    groups = []
+    for s in range(0, len(centers), slice_size):
+        vslice = sorted(centers[s:s + slice_size], key=lambda c: c[1])
+
+        # Alternate the direction so the last group of a slice is
+        # next to the first group of the following slice.
+        if (s // slice_size) % 2 == 1:
+            vslice.reverse()
+
+        for g in range(0, len(vslice), group_size):
+            groups.append([c[2] for c in vslice[g:g + group_size]])
+
+    return groups
+
+
+def parallel_union(geoms, pool=None, n_groups=None, min_group_size=64):
+    """
+    Union of many geometries split across a process pool. The
+    geometries are grouped with ``str_groups()``, each group is
+    united in a worker and the partial results are merged pairwise
+    in a reduction tree, also in the pool. Geometries travel to and
+    from the workers as WKB.
+
+    Falls back to a serial ``unary_union()`` if there is no pool or
+    too few geometries to be worth it.
+
+    :param geoms: Shapely geometries.
+    :type geoms: list
+    :param pool: multiprocessing.Pool
+    :param n_groups: Number of groups for the first level. Defaults
+        to 4 per CPU.
+    :type n_groups: int
+    :param min_group_size: Smallest number of geometries per group.
+    :type min_group_size: int
+    :return: The union.
+    :rtype: BaseGeometry
+    """
+    if n_groups is None:
+        n_groups = 4 * (os.cpu_count() or 1)
+    n_groups = min(n_groups, len(geoms) // min_group_size)
+
+    if pool is None or n_groups < 2:
+        log.debug("parallel_union(): Serial union of %d geometries." % len(geoms))
+        return unary_union(geoms)
+
+    groups = str_groups(geoms, n_groups)
+    log.debug("parallel_union(): %d geometries in %d groups." % (len(geoms), len(groups)))
+
+    parts = pool.map(_union_wkb, [[geo.wkb for geo in group] for group in groups])
+
+    # Reduction tree
+    while len(parts) > 1:
+        pairs = [parts[i:i + 2] for i in range(0, len(parts) - 1, 2)]
+        merged = pool.map(_union_wkb, pairs)
+        if len(parts) % 2 == 1:
+            merged.append(parts[-1])
+        parts = merged
+
+    return wkb.loads(parts[0])
+
+
+def tiled_line_union(lines, bounds, pool=None, n_tiles=None, min_tile_size=256):
+    """
+    Union (noding) of many lines, done by tiles. The bounds are
+    divided into a grid, the lines are clipped to each tile and each
+    tile is united in a worker of the pool. Unlike polygons, united
+    lines of neighbouring tiles do not need to be merged, so the
+    result is the collection of the lines of all tiles and no global
+    union is made.
+
+    Falls back to a serial ``unary_union()`` without a pool, with
+    Shapely < 2 or if there are too few lines to be worth it.
+
+    :param lines: LineStrings.
+    :type lines: list
+    :param bounds: (xmin, ymin, xmax, ymax) of all lines.
+    :param pool: multiprocessing.Pool
+    :param n_tiles: Approximate number of tiles. Defaults to 4 per CPU,
+        or none with a single CPU.
+    :type n_tiles: int
+    :param min_tile_size: Smallest average number of lines per tile.
+    :type min_tile_size: int
+    :return: The union.
+    :rtype: BaseGeometry
+    """
+    if n_tiles is None:
+        cpus = os.cpu_count() or 1
+        n_tiles = 4 * cpus if cpus > 1 else 1
+    n_tiles = min(n_tiles, len(lines) // min_tile_size)
+
+    if pool is None or n_tiles < 2 or clip_by_rect is None:
+        log.debug("tiled_line_union(): Serial union of %d lines." % len(lines))
+        return unary_union(lines)
+
+    lines = np.asarray(lines, dtype=object)
+    line_bounds = bounds_all(lines)
+
+    # Tile edges a tiny bit off the bounds, so they are unlikely to
+    # fall on coordinates and split a line along its length.
+    xmin, ymin, xmax, ymax = bounds
+    margin = 1e-7 * max(xmax - xmin, ymax - ymin, 1.0)
+    side = max(int(ceil(sqrt(n_tiles))), 1)
+    xs = np.linspace(xmin - margin, xmax + margin * 1.618, side + 1)
+    ys = np.linspace(ymin - margin, ymax + margin * 1.618, side + 1)
+
+    tiles = []
+    for x0, x1 in zip(xs[:-1], xs[1:]):
+        for y0, y1 in zip(ys[:-1], ys[1:]):
+            inside = ((line_bounds[:, 0] <= x1) & (line_bounds[:, 2] >= x0) &
+                      (line_bounds[:, 1] <= y1) & (line_bounds[:, 3] >= y0))
+            clipped = clip_by_rect(lines[inside], x0, y0, x1, y1)
+            clipped = clipped[~is_empty(clipped)]
+            if len(clipped) > 0:
+                tiles.append([geo.wkb for geo in clipped])
+
+    log.debug("tiled_line_union(): %d lines in %d tiles." % (len(lines), len(tiles)))
+
+    parts = get_parts(from_wkb(pool.map(_union_wkb, tiles)))
+    return multilinestrings(parts[get_type_id(parts) == 1])
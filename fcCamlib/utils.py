@@ -1,6 +1,16 @@
 import logging
+from itertools import chain
 
-from numpy import ceil, cos, pi, sin, sqrt
+import numpy as np
+from numpy import arccos, ceil, cos, pi, sin, sqrt
+from shapely import affinity
+from shapely.geometry import Polygon
+
+try:
+    from shapely import get_num_coordinates, transform
+    from shapely import buffer as buffer_all, is_empty, is_valid, linearrings, polygons
+except ImportError:  # Shapely < 2
+    transform = None
 
 
 def setup_log(name:str) -> logging.Logger:
@@ -15,9 +25,50 @@ def setup_log(name:str) -> logging.Logger:
     return log
 
 
-def arc(center, radius, start, stop, direction, steps_per_circ):
+def arc_steps(radius, angle, tolerance):
+    """
+    Smallest number of straight segments that approximate an arc
+    with a chordal error (maximum distance between the arc and the
+    segments) of at most ``tolerance``.
+
+    :param radius: Radius of the arc.
+    :type radius: float
+    :param angle: Angle spanned by the arc in radians.
+    :type angle: float
+    :param tolerance: Maximum chordal error, same units as ``radius``.
+    :type tolerance: float
+    :return: Number of segments.
+    :rtype: int
+    """
+    if radius <= tolerance:
+        return 1
+    max_step = 2 * arccos(1 - tolerance / radius)
+    return int(ceil(abs(angle) / max_step))
+
+
+def arc_resolution(radius, tolerance, default=16):
+    """
+    Segments per quarter circle for Shapely's ``buffer()`` so that
+    a circle of the given radius is within ``tolerance``.
+
+    :param radius: Radius of the circle.
+    :param tolerance: Maximum chordal error. If None, ``default``.
+    :param default: Resolution without a tolerance.
+    :return: Resolution (``quad_segs``) for ``buffer()``.
+    :rtype: int
     """
-    Creates a list of point along the specified arc.
+    if not tolerance:
+        return default
+    return max(arc_steps(radius, pi / 2, tolerance), 1)
+
+
+def arc(center, radius, start, stop, direction, steps_per_circ=None, tolerance=None):
+    """
+    Creates an array of points along the specified arc.
+
+    The number of segments is given by the maximum chordal error
+    ``tolerance`` when specified, otherwise by ``steps_per_circ``.
+    There are at least 2 segments.
 
     :param center: Coordinates of the center [x, y]
     :type center: list
@@ -32,29 +83,83 @@ def arc(center, radius, start, stop, direction, steps_per_circ):
     :param steps_per_circ: Number of straight line segments to
         represent a circle.
     :type steps_per_circ: int
-    :return: The desired arc, as list of tuples
-    :rtype: list
+    :param tolerance: Maximum distance between the arc and its
+        segments.
+    :type tolerance: float
+    :return: The desired arc, as (n, 2) array.
+    :rtype: numpy.ndarray
     """
-    # TODO: Resolution should be established by maximum error from the exact arc.
 
     da_sign = {"cw": -1.0, "ccw": 1.0}
-    points = []
     if direction == "ccw" and stop <= start:
         stop += 2 * pi
     if direction == "cw" and stop >= start:
         stop -= 2 * pi
     
     angle = abs(stop - start)
-        
-    #angle = stop-start
-    steps = max([int(ceil(angle / (2 * pi) * steps_per_circ)), 2])
-    delta_angle = da_sign[direction] * angle * 1.0 / steps
-    for i in range(steps + 1):
-        theta = start + delta_angle * i
-        points.append((center[0] + radius * cos(theta), center[1] + radius * sin(theta)))
+
+    if tolerance:
+        steps = arc_steps(radius, angle, tolerance)
+    else:
+        steps = int(ceil(angle / (2 * pi) * steps_per_circ))
+    steps = max(steps, 2)
+
+    theta = start + (da_sign[direction] * angle / steps) * np.arange(steps + 1)
+    points = np.empty((steps + 1, 2))
+    points[:, 0] = center[0] + radius * cos(theta)
+    points[:, 1] = center[1] + radius * sin(theta)
     return points
 
 
+def arcs(centers, radii, starts, stops, directions, steps_per_circ=None, tolerance=None):
+    """
+    Points along many arcs at once, computed like ``arc()`` for each
+    of them but in a few array operations.
+
+    :param centers: (n, 2) array of centers.
+    :param radii: Array of radii.
+    :param starts: Array of starting angles in radians.
+    :param stops: Array of end angles in radians.
+    :param directions: Array, -1 for CW and 1 for CCW arcs.
+    :param steps_per_circ: Number of straight line segments to
+        represent a circle.
+    :param tolerance: Maximum distance between the arcs and their
+        segments.
+    :return: (points, counts): All points, arc after arc, as (m, 2)
+        array and the number of points of each arc.
+    :rtype: tuple
+    """
+    centers = np.asarray(centers, dtype=float).reshape(-1, 2)
+    radii = np.asarray(radii, dtype=float)
+    starts = np.asarray(starts, dtype=float)
+    directions = np.asarray(directions, dtype=float)
+
+    stops = np.array(stops, dtype=float)
+    stops[(directions > 0) & (stops <= starts)] += 2 * pi
+    stops[(directions < 0) & (stops >= starts)] -= 2 * pi
+
+    angles = np.abs(stops - starts)
+
+    if tolerance:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            max_step = 2 * arccos(1 - tolerance / radii)
+            steps = np.where(radii <= tolerance, 1, ceil(angles / max_step))
+    else:
+        steps = ceil(angles / (2 * pi) * steps_per_circ)
+    steps = np.maximum(steps, 2).astype(np.intp)
+
+    counts = steps + 1
+    first = np.cumsum(counts) - counts
+    k = np.arange(int(counts.sum())) - np.repeat(first, counts)
+    theta = np.repeat(starts, counts) + np.repeat(directions * angles / steps, counts) * k
+    radius = np.repeat(radii, counts)
+
+    points = np.empty((len(theta), 2))
+    points[:, 0] = np.repeat(centers[:, 0], counts) + radius * cos(theta)
+    points[:, 1] = np.repeat(centers[:, 1], counts) + radius * sin(theta)
+    return points, counts
+
+
 def autolist(obj):
     try:
         _ = iter(obj)
@@ -65,3 +170,59 @@ def autolist(obj):
 
 def distance(pt1, pt2):
     return sqrt((pt1[0] - pt2[0]) ** 2 + (pt1[1] - pt2[1]) ** 2)
+
+
+def translate_many(geo, offsets):
+    """
+    Copies of a geometry translated by each of the given offsets.
+    Done in a single vectorized transform with Shapely 2.
+
+    :param geo: Geometry to copy.
+    :type geo: BaseGeometry
+    :param offsets: Sequence of (x, y) offsets.
+    :return: One geometry per offset.
+    :rtype: list
+    """
+    if transform is None:
+        return [affinity.translate(geo, xoff=x, yoff=y) for x, y in offsets]
+
+    offsets = np.asarray(offsets, dtype=float).reshape(-1, 2)
+    geoms = np.empty(len(offsets), dtype=object)
+    geoms[:] = [geo] * len(offsets)
+    n_coords = get_num_coordinates(geo)
+    return list(transform(geoms, lambda coords: coords + np.repeat(offsets, n_coords, axis=0)))
+
+
+def contour_polygons(contours):
+    """
+    Polygons having the given contours as exteriors, built all at
+    once with Shapely 2's array constructors. Validity is checked
+    for all of them in a single pass and only the invalid ones are
+    repaired, with ``buffer(0)``. Contours are closed if they are not
+    already. Degenerate contours and empty results are dropped.
+
+    :param contours: Lists of [x, y] points.
+    :type contours: list
+    :return: List of valid polygons.
+    :rtype: list
+    """
+    contours = [c for c in contours if len(c) >= (4 if c[0] == c[-1] else 3)]
+    if len(contours) == 0:
+        return []
+
+    if transform is None:
+        polys = [Polygon(c) for c in contours]
+        polys = [p if p.is_valid else p.buffer(0) for p in polys]
+        return [p for p in polys if not p.is_empty]
+
+    counts = np.fromiter(map(len, contours), dtype=np.intp, count=len(contours))
+    coords = np.fromiter(chain.from_iterable(chain.from_iterable(contours)),
+                         dtype=float, count=2 * int(counts.sum())).reshape(-1, 2)
+    rings = linearrings(coords, indices=np.repeat(np.arange(len(contours)), counts))
+    polys = polygons(rings)
+
+    invalid = ~is_valid(polys)
+    if invalid.any():
+        polys[invalid] = buffer_all(polys[invalid], 0)
+
+    return list(polys[~is_empty(polys)])
@@ -1,9 +1,9 @@
 import re
 
-from io import StringIO
 from PyQt6.QtWidgets import QLabel, QFileDialog, QGridLayout, QPushButton
 
 from fcCamlib.cncjob import CNCjob
+from fcCamlib.gcode import GCodeEmitter
 from FlatCAMObj import FlatCAMObj, ObjectDeleted
 from GUIElements import FCEntry, FCTextArea, FCCheckBox, LengthEntry
 
@@ -166,6 +166,13 @@ class FlatCAMCNCjob(FlatCAMObj, CNCjob):
 
         self.annotation = self.app.plotcanvas.new_text_group()
 
+        # For the union of the paths, see CNCjob.toolpath_geometry().
+        self.pool = self.app.pool
+        self.app.pool_recreated.connect(self.pool_recreated)
+
+    def pool_recreated(self, pool):
+        self.pool = pool
+
     def set_ui(self, ui):
         FlatCAMObj.set_ui(self, ui)
 
@@ -245,8 +252,13 @@ class FlatCAMCNCjob(FlatCAMObj, CNCjob):
         return
 
     def export_gcode(self, filename, preamble='', postamble=''):
+        """
+        Writes the G-code to a file. Lines are streamed from the job
+        through a buffered emitter, so the whole program is never
+        copied into a single string.
+        """
 
-        lines = StringIO(self.gcode)
+        lines = self.gcode_lines()
 
         ## Post processing
         # Dwell?
@@ -256,10 +268,11 @@ class FlatCAMCNCjob(FlatCAMObj, CNCjob):
 
         ## Write
         with open(filename, 'w') as f:
-            f.write(preamble + "\n")
-            for line in lines:
-                f.write(line)
-            f.write(postamble)
+            gc = GCodeEmitter(f)
+            gc.write(preamble + "\n")
+            gc.writelines(lines)
+            gc.write(postamble)
+            gc.flush()
 
         # Just for adding it to the recent files list.
         self.app.file_opened.emit("cncjob", filename)
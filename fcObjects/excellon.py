@@ -4,8 +4,9 @@ from PyQt6.QtWidgets import QLabel, QTableWidgetItem, QGridLayout, QPushButton
 from shapely.geometry import Point
 
 from fcCamlib.excellon import Excellon
+from fcCamlib.utils import translate_many
 from FlatCAMObj import FlatCAMObj, ObjectDeleted
-from GUIElements import FCTable, FCCheckBox, IntEntry, LengthEntry, OptionalInputSection
+from GUIElements import FCTable, FCCheckBox, IntEntry, LengthEntry, OptionalInputSection, RadioSet
 
 from .base import ObjectUI
 from .geometry import FlatCAMGeometry
@@ -122,6 +123,20 @@ class ExcellonObjectUI(ObjectUI):
         self.spindlespeed_entry = IntEntry(allow_empty=True)
         grid1.addWidget(self.spindlespeed_entry, 5, 1)
 
+        # Drill order
+        orderlabel = QLabel('Drill order:')
+        orderlabel.setToolTip(
+            "Order of the holes of each tool.\n"
+            "Nearest: always the closest hole next.\n"
+            "Optimized: nearest, then shortened\n"
+            "further for a limited time."
+        )
+        grid1.addWidget(orderlabel, 6, 0)
+        self.drillorder_radio = RadioSet([{'label': 'File', 'value': 'file'},
+                                          {'label': 'Nearest', 'value': 'nearest'},
+                                          {'label': 'Optimized', 'value': 'optimized'}])
+        grid1.addWidget(self.drillorder_radio, 6, 1)
+
         choose_tools_label = QLabel(
             "Select from the tools section above\n"
             "the tools you want to include."
@@ -188,7 +203,8 @@ class FlatCAMExcellon(FlatCAMObj, Excellon):
             "tooldia": 0.1,
             "toolchange": False,
             "toolchangez": 1.0,
-            "spindlespeed": None
+            "spindlespeed": None,
+            "drillorder": "file"
         })
 
         # TODO: Document this.
@@ -240,26 +256,24 @@ class FlatCAMExcellon(FlatCAMObj, Excellon):
                         except:
                             exc.app.log.warning("Failed to copy option.",option)
 
-                #deep copy of all drills,to avoid any references
-                for drill in exc.drills:
-                    point = Point(drill['point'].x,drill['point'].y)
-                    exc_final.drills.append({"point": point, "tool": drill['tool']})
+                #copy of all drills,to avoid any references
+                exc_final.drill_table.extend_table(exc.drill_table)
                 toolsrework=dict()
                 max_numeric_tool=0
-                for toolname in exc.tools.iterkeys():
+                for toolname in exc.tools.keys():
                     numeric_tool=int(toolname)
                     if numeric_tool>max_numeric_tool:
                         max_numeric_tool=numeric_tool
                     toolsrework[exc.tools[toolname]['C']]=toolname
 
                 #exc_final as last because names from final tools will be used
-                for toolname in exc_final.tools.iterkeys():
+                for toolname in exc_final.tools.keys():
                     numeric_tool=int(toolname)
                     if numeric_tool>max_numeric_tool:
                         max_numeric_tool=numeric_tool
                     toolsrework[exc_final.tools[toolname]['C']]=toolname
 
-                for toolvalues in toolsrework.iterkeys():
+                for toolvalues in toolsrework.keys():
                     if toolsrework[toolvalues] in exc_final.tools:
                         if exc_final.tools[toolsrework[toolvalues]]!={"C": toolvalues}:
                             exc_final.tools[str(max_numeric_tool+1)]={"C": toolvalues}
@@ -323,7 +337,8 @@ class FlatCAMExcellon(FlatCAMObj, Excellon):
             "tooldia": self.ui.tooldia_entry,
             "toolchange": self.ui.toolchange_cb,
             "toolchangez": self.ui.toolchangez_entry,
-            "spindlespeed": self.ui.spindlespeed_entry
+            "spindlespeed": self.ui.spindlespeed_entry,
+            "drillorder": self.ui.drillorder_radio
         })
 
         # Fill form fields
@@ -384,12 +399,12 @@ class FlatCAMExcellon(FlatCAMObj, Excellon):
 
             geo_obj.solid_geometry = []
 
-            for hole in self.drills:
-                if hole['tool'] in tools:
-                    geo_obj.solid_geometry.append(
-                        Point(hole['point']).buffer(self.tools[hole['tool']]["C"] / 2 -
-                                                    tooldia / 2).exterior
-                    )
+            groups = self.drill_table.by_tool()
+            for tool in tools:
+                if tool not in groups:
+                    continue
+                circle = Point(0, 0).buffer(self.tools[tool]["C"] / 2 - tooldia / 2).exterior
+                geo_obj.solid_geometry += translate_many(circle, self.drill_table.xy[groups[tool]])
 
         def geo_thread(app_obj):
             app_obj.new_object("geometry", outname, geo_init)
@@ -439,7 +454,9 @@ class FlatCAMExcellon(FlatCAMObj, Excellon):
             tools_csv = ','.join(tools)
             job_obj.generate_from_excellon_by_tool(self, tools_csv,
                                                    toolchange=self.options["toolchange"],
-                                                   toolchangez=self.options["toolchangez"])
+                                                   toolchangez=self.options["toolchangez"],
+                                                   drillorder=self.options["drillorder"])
+            app_obj.inform.emit("Drill travel: %.4f -> %.4f" % job_obj.drill_travel)
 
             app_obj.progress.emit(50)
             job_obj.gcode_parse()
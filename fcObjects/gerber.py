@@ -5,7 +5,11 @@ from PyQt6.QtWidgets import QLabel, QGridLayout, QPushButton
 from shapely.geometry import JOIN_STYLE, LineString, Polygon, MultiPolygon
 from shapely.ops import unary_union
 
+from fcCamlib.geometry import Geometry
 from fcCamlib.gerber import Gerber
+from fcCamlib.isolation import isolation_offsets, reverse_exteriors
+from fcCamlib.ncc import clear_polygons
+from fcCamlib.tiling import tiled_buffer
 from FlatCAMObj import FlatCAMObj, ObjectDeleted
 from GUIElements import FCEntry, FloatEntry, FCCheckBox, LengthEntry, IntEntry, RadioSet
 
@@ -305,6 +309,10 @@ class FlatCAMGerber(FlatCAMObj, Gerber):
         # from predecessors.
         self.ser_attrs += ['options', 'kind']
 
+        # For the "parallel" union and tiled buffers.
+        self.pool = self.app.pool
+        self.app.pool_recreated.connect(self.pool_recreated)
+
         # assert isinstance(self.ui, GerberObjectUI)
         # self.ui.plot_cb.stateChanged.connect(self.on_plot_cb_click)
         # self.ui.solid_cb.stateChanged.connect(self.on_solid_cb_click)
@@ -314,6 +322,9 @@ class FlatCAMGerber(FlatCAMObj, Gerber):
         # self.ui.generate_bb_button.clicked.connect(self.on_generatebb_button_click)
         # self.ui.generate_noncopper_button.clicked.connect(self.on_generatenoncopper_button_click)
 
+    def pool_recreated(self, pool):
+        self.pool = pool
+
     def set_ui(self, ui):
         """
         Maps options with GUI inputs.
@@ -438,7 +449,13 @@ class FlatCAMGerber(FlatCAMObj, Gerber):
     def on_iso_button_click(self, *args):
         self.app.report_usage("gerber_on_iso_button")
         self.read_form()
-        self.isolate()
+
+        # Passes are created and plotted as they are finished.
+        def job_thread(app_obj):
+            with app_obj.proc_container.new("Isolating."):
+                self.isolate()
+
+        self.app.worker_task.emit({'fcn': job_thread, 'params': [self.app]})
 
     def on_ncc_button_click(self, *args):
         self.app.report_usage("gerber_on_ncc_button")
@@ -477,22 +494,33 @@ class FlatCAMGerber(FlatCAMObj, Gerber):
             # Geometry object creating callback
             def geo_init(geo_obj, app_obj):
                 geo_obj.options["cnctooldia"] = tool
-                geo_obj.solid_geometry = []
-                for p in area.geoms:
-                    try:
-                        cp = self.clear_polygon(p, tool, over)
-                        geo_obj.solid_geometry.append(list(cp.get_objects()))
-                    except:
-                        self.app.log.warning("Polygon is ommited")
+                geo_obj.solid_geometry = [paths for paths in polygon_paths if paths is not None]
+
+            def cancelled():
+                if proc.cancelled:
+                    self.app.progress.emit(0)
+                    self.app.inform.emit("[warning] Clear non-copper areas cancelled.")
+                return proc.cancelled
+
+            # Empty area, eroded for each tool only when the tool gets to
+            # it, so nothing is computed after the area runs out or the
+            # job is cancelled. Erosions are tiled in the process pool.
+            empty_geo = Geometry()
+            empty_geo.solid_geometry = empty
+            empty_geo.pool = self.app.pool
 
             # Generate area for each tool
             offset = sum(tools)
-            for tool in tools:
+            for n, tool in enumerate(tools):
                 # Get remaining tools offset
                 offset -= tool
 
+                if cancelled():
+                    return
+
                 # Area to clear
-                area = empty.buffer(-offset).difference(cleared)
+                proc.set_status("Tool %s: Eroding the empty area." % repr(tool))
+                area = empty_geo.buffer(-offset).difference(cleared)
 
                 # Transform area to MultiPolygon
                 if type(area) is Polygon:
@@ -500,12 +528,36 @@ class FlatCAMGerber(FlatCAMObj, Gerber):
 
                 # Check if area not empty
                 if len(area.geoms) > 0:
-                    # Overall cleared area
-                    cleared = empty.buffer(-offset * (1 + over)).buffer(-tool / 2).buffer(tool / 2)
+                    # Polygons are independent jobs in the process pool.
+                    polygons = list(area.geoms)
+                    polygon_paths = [None] * len(polygons)
+                    results = clear_polygons(polygons, tool, over, self.app.pool)
+                    for done, (i, paths, error) in enumerate(results, 1):
+                        if paths is None:
+                            self.app.log.warning("Polygon is ommited:\n%s" % error)
+                        polygon_paths[i] = paths
+
+                        proc.set_status("Tool %s: %d of %d polygons." % (repr(tool), done, len(polygons)))
+                        self.app.progress.emit(int(100 * done / len(polygons)))
+
+                        if cancelled():
+                            results.close()
+                            return
+
+                    self.app.progress.emit(0)
 
                     # Create geometry object
                     name = self.options["name"] + "_ncc_" + repr(tool) + "D"
                     self.app.new_object("geometry", name, geo_init)
+
+                    # Overall cleared area, for the next tool. The erosion
+                    # by the offset and by the tool radius is one buffer.
+                    if n + 1 < len(tools):
+                        if cancelled():
+                            return
+                        proc.set_status("Tool %s: Computing the cleared area." % repr(tool))
+                        cleared = tiled_buffer(empty_geo.buffer(-offset * (1 + over) - tool / 2), tool / 2,
+                                               self.app.pool)
                 else:
                     return
 
@@ -567,57 +619,54 @@ class FlatCAMGerber(FlatCAMObj, Gerber):
         base_name = self.options["name"] + "_iso"
         base_name = outname or base_name
 
-        def generate_envelope(offset, invert):
-            # isolation_geometry produces an envelope that is going on the left of the geometry
+        def generate_envelopes():
+            # The buffers produce envelopes that are going on the left of the geometry
             # (the copper features). To leave the least amount of burrs on the features
             # the tool needs to travel on the right side of the features (this is called conventional milling)
             # the first pass is the one cutting all of the features, so it needs to be reversed
             # the other passes overlap preceding ones and cut the left over copper. It is better for them
-            # to cut on the right side of the left over copper i.e on the left side of the features. 
-            geom = self.isolation_geometry(offset)
-            if invert:
-                if type(geom) is MultiPolygon:
-                    pl = []
-                    for p in geom.geoms:
-                        pl.append(Polygon(p.exterior.coords[::-1], p.interiors))
-                    geom = MultiPolygon(pl)
-                elif type(geom) is Polygon:
-                    geom = Polygon(geom.exterior.coords[::-1], geom.interiors)
-                else:
-                    raise "Unexpected Geometry"
-            return geom
+            # to cut on the right side of the left over copper i.e on the left side of the features.
+            offsets = isolation_offsets(dia, passes, overlap)
+
+            # Passes isolated before come first. The others are independent
+            # jobs in the process pool and come back as soon as they are
+            # finished, in any order.
+            for i, geom in self.offset_ladder(offsets, pool=self.app.pool):
+                yield i, reverse_exteriors(geom) if i == 0 else geom
+
+        envelopes = generate_envelopes()
 
         if combine:
             iso_name = base_name
+            geoms = [None] * passes
+            for i, geom in envelopes:
+                geoms[i] = geom
 
             # TODO: This is ugly. Create way to pass data into init function.
             def iso_init(geo_obj, app_obj):
                 # Propagate options
                 geo_obj.options["cnctooldia"] = self.options["isotooldia"]
-                geo_obj.solid_geometry = []
-                for i in range(passes):
-                    offset = (2 * i + 1) / 2.0 * dia - i * overlap * dia
-                    geom = generate_envelope (offset, i == 0)
-                    geo_obj.solid_geometry.append(geom)
+                geo_obj.solid_geometry = geoms
                 app_obj.info("Isolation geometry created: %s" % geo_obj.options["name"])
 
             # TODO: Do something if this is None. Offer changing name?
             self.app.new_object("geometry", iso_name, iso_init)
 
         else:
-            for i in range(passes):
+            # Each pass becomes an object (and is plotted) while the
+            # next ones are computed.
+            for i, geom in envelopes:
 
-                offset = (2 * i + 1) / 2.0 * dia - i * overlap  * dia
                 if passes > 1:
                     iso_name = base_name + str(i + 1)
                 else:
                     iso_name = base_name
 
                 # TODO: This is ugly. Create way to pass data into init function.
-                def iso_init(geo_obj, app_obj):
+                def iso_init(geo_obj, app_obj, geom=geom):
                     # Propagate options
                     geo_obj.options["cnctooldia"] = self.options["isotooldia"]
-                    geo_obj.solid_geometry = generate_envelope (offset, i == 0)
+                    geo_obj.solid_geometry = geom
                     app_obj.info("Isolation geometry created: %s" % geo_obj.options["name"])
 
                 # TODO: Do something if this is None. Offer changing name?
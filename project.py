@@ -3,6 +3,8 @@ from shapely.wkt import loads as sloads
 from shapely.wkt import dumps as sdumps
 
 from fcCamlib.aperture import ApertureMacro
+from fcCamlib.drills import DrillTable, DrillView
+from fcCamlib.toolpath import Toolpaths, ToolpathView
 
 
 def to_dict(obj):
@@ -11,6 +13,8 @@ def to_dict(obj):
 
     * ApertureMacro
     * BaseGeometry
+    * DrillTable, DrillView
+    * Toolpaths, ToolpathView
 
     :param obj: Shapely geometry.
     :type obj: BaseGeometry
@@ -27,6 +31,20 @@ def to_dict(obj):
             "__class__": "Shply",
             "__inst__": sdumps(obj)
         }
+    if isinstance(obj, DrillView):
+        obj = obj.table
+    if isinstance(obj, DrillTable):
+        return {
+            "__class__": "DrillTable",
+            "__inst__": obj.to_dict()
+        }
+    if isinstance(obj, ToolpathView):
+        obj = obj.toolpaths
+    if isinstance(obj, Toolpaths):
+        return {
+            "__class__": "Toolpaths",
+            "__inst__": obj.to_dict()
+        }
     return obj
 
 
@@ -45,6 +63,10 @@ def dict2obj(d):
             am = ApertureMacro()
             am.from_dict(d['__inst__'])
             return am
+        if d['__class__'] == "DrillTable":
+            return DrillTable.from_dict(d['__inst__'])
+        if d['__class__'] == "Toolpaths":
+            return Toolpaths.from_dict(d['__inst__'])
         return d
     else:
         return d
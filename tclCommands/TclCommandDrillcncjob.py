@@ -1,6 +1,7 @@
 
 from collections import OrderedDict
 
+from fcCamlib.drillorder import DrillOrder
 from tclCommands.TclCommand import TclCommandSignaled
 
 
@@ -25,6 +26,7 @@ class TclCommandDrillcncjob(TclCommandSignaled):
         ('feedrate',float),
         ('spindlespeed',int),
         ('toolchange',bool),
+        ('drillorder',str),
         ('outname',str)
     ])
 
@@ -42,9 +44,11 @@ class TclCommandDrillcncjob(TclCommandSignaled):
             ('feedrate', 'Drilling feed rate.'),
             ('spindlespeed', 'Speed of the spindle in rpm (example: 4000).'),
             ('toolchange', 'Enable tool changes (example: True).'),
+            ('drillorder', 'Order of the holes of each tool: file, nearest or optimized.\n'
+                           'Defaults to the drill order option of the object.'),
             ('outname', 'Name of the resulting Geometry object.')
         ]),
-        'examples': []
+        'examples': ['drillcncjob board.drl -drillz -0.07 -travelz 0.1 -feedrate 3 -drillorder optimized']
     }
 
     def execute(self, args, unnamed_args):
@@ -69,6 +73,11 @@ class TclCommandDrillcncjob(TclCommandSignaled):
         if not isinstance(obj, FlatCAMExcellon):
             self.raise_tcl_error('Expected FlatCAMExcellon, got %s %s.' % (name, type(obj)))
 
+        drillorder = args["drillorder"] if "drillorder" in args else obj.options["drillorder"]
+        if drillorder not in DrillOrder.methods:
+            self.raise_tcl_error("Unknown drill order: %s. Expected one of: %s."
+                                 % (drillorder, ", ".join(DrillOrder.methods)))
+
         def job_init(job_obj, app):
             job_obj.z_cut = args["drillz"]
             job_obj.z_move = args["travelz"]
@@ -76,8 +85,13 @@ class TclCommandDrillcncjob(TclCommandSignaled):
             job_obj.spindlespeed = args["spindlespeed"] if "spindlespeed" in args else None
             toolchange = True if "toolchange" in args and args["toolchange"] == 1 else False
             tools = args["tools"] if "tools" in args else 'all'
-            job_obj.generate_from_excellon_by_tool(obj, tools, toolchange)
+            job_obj.generate_from_excellon_by_tool(obj, tools, toolchange, drillorder=drillorder)
             job_obj.gcode_parse()
             job_obj.create_geometry()
+            travel.append(job_obj.drill_travel)
 
+        travel = []
         self.app.new_object("cncjob", args['outname'], job_init)
+
+        if travel:
+            return "Drill travel (%s): %.4f -> %.4f" % ((drillorder,) + travel[0])
@@ -0,0 +1,67 @@
+from collections import OrderedDict
+import glob
+import os
+
+from tclCommands.TclCommand import TclCommandSignaled
+
+
+class TclCommandOpenFabricationSet(TclCommandSignaled):
+    """
+    Tcl shell command to open several Gerber and Excellon files
+    at once, parsing them in parallel.
+
+    example:
+        open_fabset board.GTL board.GBL board.GKO board.DRL
+        open_fabset /path/to/gerbers
+    """
+
+    # array of all command aliases, to be able use  old names for backward compatibility (add_poly, add_polygon)
+    aliases = ['open_fabset', 'open_fabrication_set']
+
+    # Dictionary of types from Tcl command, needs to be ordered.
+    # For positional arguments
+    arg_names = OrderedDict([
+        ('path', str)
+    ])
+
+    # Dictionary of types from Tcl command, needs to be ordered.
+    # For options like -optionname value
+    option_types = OrderedDict()
+
+    # array of mandatory options for current Tcl command: required = {'name','outname'}
+    required = ['path']
+
+    # structured help for current command, args needs to be ordered
+    help = {
+        'main': "Opens a set of Gerber and Excellon files, parsing them in parallel.\n"
+                "The kind of each file is detected from its contents and the objects\n"
+                "are named after the files.",
+        'args': OrderedDict([
+            ('path', 'Files to open, or a directory to open all the Gerber and\n'
+                     'Excellon files in it. More files can follow.')
+        ]),
+        'examples': ['open_fabset board.GTL board.GBL board.DRL', 'open_fabset /path/to/gerbers']
+    }
+
+    def execute(self, args, unnamed_args):
+        """
+        execute current TCL shell command
+
+        :param args: array of known named arguments and options
+        :param unnamed_args: array of other values which were passed into command
+            without -somename and  we do not have them in known arg_names
+        :return: None or exception
+        """
+
+        filenames = []
+        for path in [args['path']] + list(unnamed_args):
+            if os.path.isdir(path):
+                filenames += sorted(f for f in glob.glob(os.path.join(path, '*')) if os.path.isfile(f))
+            else:
+                filenames.append(path)
+
+        if len(filenames) == 0:
+            self.raise_tcl_error("No files to open.")
+
+        created = self.app.open_fabrication_set(filenames)
+        return "Opened: " + " ".join(created)
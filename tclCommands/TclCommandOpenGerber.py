@@ -56,7 +56,7 @@ class TclCommandOpenGerber(TclCommandSignaled):
             # Opening the file happens here
             self.app.progress.emit(30)
             try:
-                gerber_obj.parse_file(filename, follow=follow)
+                self.app.parse_gerber(gerber_obj, filename, follow=follow)
 
             except IOError:
                 app_obj.inform.emit("[error] Failed to open file: %s " % filename)
@@ -0,0 +1,70 @@
+from collections import OrderedDict
+import time
+
+from tclCommands.TclCommand import TclCommand
+
+
+class TclCommandParseCache(TclCommand):
+    """
+    Tcl shell command to inspect or clear the cache of parsed
+    Gerber and Excellon files.
+
+    example:
+        parse_cache
+        parse_cache clear
+    """
+
+    # List of all command aliases, to be able use old names for backward compatibility (add_poly, add_polygon)
+    aliases = ['parse_cache']
+
+    # Dictionary of types from Tcl command, needs to be ordered
+    arg_names = OrderedDict([
+        ('action', str)
+    ])
+
+    # Dictionary of types from Tcl command, needs to be ordered , this  is  for options  like -optionname value
+    option_types = OrderedDict()
+
+    # array of mandatory options for current Tcl command: required = {'name','outname'}
+    required = []
+
+    # structured help for current command, args needs to be ordered
+    help = {
+        'main': "Inspects or clears the cache of parsed Gerber and Excellon files.\n"
+                "The size limit (MB) is the system variable parsecache_size and the "
+                "cache can be turned off with parsecache_enabled.",
+        'args': OrderedDict([
+            ('action', 'info (default): list the entries, most recently used first.\n'
+                       'clear: remove all entries.\n'
+                       'evict: remove entries until within the size limit.'),
+        ]),
+        'examples': ['parse_cache', 'parse_cache clear']
+    }
+
+    def execute(self, args, unnamed_args):
+        """
+
+        :param args:
+        :param unnamed_args:
+        :return:
+        """
+
+        cache = self.app.parse_cache
+        action = args.get('action', 'info')
+
+        if action == 'clear':
+            return "Removed %d entries." % cache.clear()
+
+        if action == 'evict':
+            return "Removed %d entries." % cache.evict()
+
+        if action != 'info':
+            self.raise_tcl_error("Unknown action: %s" % action)
+
+        entries = cache.entries()
+        total = sum(e[1] for e in entries)
+        lines = ["%s  %10d  %s" % (key, size, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(used)))
+                 for key, size, used in entries]
+        lines.append("%d entries, %.1f of %d MB in %s" %
+                     (len(entries), total / 1024.0 / 1024.0, cache.defaults["size"], cache.path))
+        return '\n'.join(lines)
@@ -0,0 +1,66 @@
+from collections import OrderedDict
+
+from tclCommands.TclCommand import TclCommand
+from fcCamlib.parsestats import ParseStats
+
+
+class TclCommandParseStats(TclCommand):
+    """
+    Tcl shell command to show the parse statistics of a Gerber
+    or Excellon object.
+
+    example:
+        set_sys parsestats_enabled true
+        open_gerber board.gbr
+        parse_stats board.gbr
+    """
+
+    # List of all command aliases, to be able use old names for backward compatibility (add_poly, add_polygon)
+    aliases = ['parse_stats']
+
+    # Dictionary of types from Tcl command, needs to be ordered
+    arg_names = OrderedDict([
+        ('name', str)
+    ])
+
+    # Dictionary of types from Tcl command, needs to be ordered , this  is  for options  like -optionname value
+    option_types = OrderedDict()
+
+    # array of mandatory options for current Tcl command: required = {'name','outname'}
+    required = []
+
+    # structured help for current command, args needs to be ordered
+    help = {
+        'main': "Shows statement counts, time per statement kind and phase and the peak\n"
+                "polygon buffer size of the parse of a Gerber or Excellon object.\n"
+                "Statistics are only recorded while the system variable\n"
+                "parsestats_enabled is true. The parse cache is bypassed meanwhile.",
+        'args': OrderedDict([
+            ('name', 'Name of the object. The most recent parse if not given.'),
+        ]),
+        'examples': ['set_sys parsestats_enabled true', 'parse_stats', 'parse_stats board.gbr']
+    }
+
+    def execute(self, args, unnamed_args):
+        """
+
+        :param args:
+        :param unnamed_args:
+        :return:
+        """
+
+        if 'name' not in args:
+            if ParseStats.last is None:
+                return "Nothing parsed with parsestats_enabled set."
+            return ParseStats.last.format()
+
+        obj_name = args['name']
+        obj = self.app.collection.get_by_name(str(obj_name))
+        if obj is None:
+            self.raise_tcl_error("Object not found: %s" % obj_name)
+
+        stats = getattr(obj, 'parse_stats', None)
+        if stats is None:
+            return "No parse statistics for %s. Set parsestats_enabled and open it again." % obj_name
+
+        return stats.format()
@@ -0,0 +1,130 @@
+"""
+Gerber parser throughput.
+
+Times ``Gerber.parse_lines()`` on the same statements twice. Before:
+every statement goes through the chain of patterns the parser used
+to try in order, which ``Gerber.classify()`` keeps. After: the fast
+paths of ``Gerber.tokenize()``. Both run in follow mode, because
+without ``follow`` the time goes to buffering and joining the shapes
+rather than to parsing. Both must give the same geometry.
+
+Usage::
+
+    python tests/bench_gerber_parse.py [file.gbr]
+
+Without a file, a synthetic board with traces, arcs, pads and a
+copper pour is used.
+"""
+
+import logging
+import os
+import random
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fcCamlib.gerber import TK_MACRO_BODY, TK_MACRO_START, Gerber
+from fcCamlib.reader import gerber_statements, mapped
+
+
+def synthetic_board(n_traces=20000, seed=0):
+    """
+    Statements of a synthetic 4 x 4 in board.
+    """
+    rnd = random.Random(seed)
+    lines = ["G04 Synthetic benchmark board*", "%FSLAX24Y24*%", "%MOIN*%",
+             "%ADD10C,0.0100*%", "%ADD11R,0.0600X0.0400*%", "%ADD12C,0.0500*%",
+             "G01*", "G75*"]
+
+    def xy():
+        return rnd.randint(0, 40000), rnd.randint(0, 40000)
+
+    for n in range(n_traces):
+        lines.append("G54D10*")
+        x, y = xy()
+        lines.append("X%dY%dD02*" % (x, y))
+        for _ in range(3):
+            x, y = x + rnd.randint(-500, 500), y + rnd.randint(-500, 500)
+            lines.append("X%dY%dD01*" % (x, y))
+        if n % 10 == 0:
+            lines.append("G03X%dY%dI250J0D01*" % (x + 500, y))
+            lines.append("G01*")
+        lines.append("G54D%d*" % (11 if n % 2 else 12))
+        lines.append("X%dY%dD03*" % xy())
+
+    # Copper pour
+    lines.append("G36*")
+    lines.append("X0Y0D02*")
+    for i in range(2000):
+        lines.append("X%dY%dD01*" % (i * 20, 40000 + (i % 2) * 100))
+    lines.append("X40000Y0D01*")
+    lines.append("X0Y0D01*")
+    lines.append("G37*")
+    lines.append("M02*")
+    return lines
+
+
+class ChainGerber(Gerber):
+    """
+    Gerber parsed with the chain of patterns only.
+    """
+
+    def tokenize(self, glines):
+        in_macro = False
+        for gline in glines:
+            gline = gline.strip(' \r\n')
+
+            if in_macro:
+                match = self.am2_re.search(gline)
+                if match:
+                    in_macro = False
+                    yield TK_MACRO_BODY, gline, (match.group(1), True)
+                else:
+                    yield TK_MACRO_BODY, gline, (gline, False)
+                continue
+
+            kind, data = self.classify(gline)
+            if kind == TK_MACRO_START and not data[2]:
+                in_macro = True
+            yield kind, gline, data
+
+
+def best(fcn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        fcn()
+        times.append(perf_counter() - start)
+    return min(times)
+
+
+def main():
+    if len(sys.argv) > 1:
+        with mapped(sys.argv[1]) as buf:
+            lines = list(gerber_statements(buf))
+        source = sys.argv[1]
+    else:
+        lines = synthetic_board()
+        source = "synthetic board"
+
+    print("%s: %d statements, best of 3" % (source, len(lines)))
+    logging.disable(logging.INFO)
+
+    results = {}
+    rates = {}
+    for name, cls in (("before", ChainGerber), ("after", Gerber)):
+        def parse():
+            gerber = cls()
+            gerber.parse_lines(lines, follow=True)
+            results[name] = gerber.solid_geometry
+
+        rates[name] = len(lines) / best(parse)
+
+    same = [geo.wkb for geo in results["before"]] == [geo.wkb for geo in results["after"]]
+    print("  parse_lines(follow=True): %8.1fk -> %8.1fk statements/s (x%.2f), same geometry: %s" %
+          (rates["before"] / 1e3, rates["after"] / 1e3, rates["after"] / rates["before"], same))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+import unittest
+
+from fcCamlib.aperture import ApertureMacro
+
+
+def evaluate(expr, variables=None):
+    return eval(ApertureMacro.compile_expression(expr), {'__builtins__': {}, 'v': variables or {}})
+
+
+class ExpressionTestCase(unittest.TestCase):
+
+    def test_multiply_constant(self):
+        self.assertAlmostEqual(evaluate("$3x0.75", {"3": 2.0}), 1.5)
+        self.assertAlmostEqual(evaluate("$1x2", {"1": 0.5}), 1.0)
+
+    def test_multiply_variables(self):
+        self.assertAlmostEqual(evaluate("$1X$2", {"1": 3.0, "2": 0.5}), 1.5)
+        self.assertAlmostEqual(evaluate("$1x$2", {"1": 3.0, "2": 0.5}), 1.5)
+
+    def test_undefined_variable(self):
+        self.assertEqual(evaluate("$4x2+1"), 1)
+
+    def test_variable_definition(self):
+        am = ApertureMacro(name="TEST")
+        am.append("$3=$1x$2*\n1,1,$3,0,0*")
+        am.locvars = {"1": 2.0, "2": 0.25}
+        am.parse_content()
+        self.assertAlmostEqual(am.locvars["3"], 0.5)
+        self.assertAlmostEqual(am.primitives[0][2], 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from fcCamlib import drillorder
+from fcCamlib.cncjob import CNCjob
+from fcCamlib.drillorder import DrillOrder, nearest_neighbour_order, nearest_neighbours, travel
+from fcCamlib.excellon import Excellon
+
+EXCELLON = """M48
+INCH,TZ
+T1C0.0300
+T2C0.0400
+%
+T1
+X010000Y010000
+X000000Y020000
+X015000Y000000
+X002000Y001000
+T2
+X030000Y030000
+X001000Y030000
+X025000Y005000
+M30
+"""
+
+
+def greedy(points, start=(0, 0)):
+    """
+    Nearest neighbour order by a scan of the remaining points.
+    """
+    remaining = list(range(len(points)))
+    current = np.asarray(start, dtype=float)
+    order = []
+    while remaining:
+        d = np.hypot(*(points[remaining] - current).T)
+        j = remaining.pop(int(d.argmin()))
+        order.append(j)
+        current = points[j]
+    return np.array(order)
+
+
+def boards():
+    rnd = np.random.default_rng(1)
+    yield rnd.random((500, 2)) * 10
+    # Two clusters far apart
+    yield np.vstack([rnd.random((200, 2)), rnd.random((200, 2)) + 50])
+    # A row of holes and repeated holes
+    yield np.column_stack([np.arange(100) * 0.1, np.zeros(100)])
+    yield np.ones((20, 2))
+
+
+class WithoutScipyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(drillorder, "cKDTree", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_nearest_matches_scan(self):
+        for points in boards():
+            for start in [(0, 0), (-20, 30)]:
+                self.assertAlmostEqual(travel(points, nearest_neighbour_order(points, start), start),
+                                       travel(points, greedy(points, start), start))
+
+    def test_order_is_permutation(self):
+        for points in boards():
+            order = nearest_neighbour_order(points)
+            self.assertEqual(sorted(order.tolist()), list(range(len(points))))
+
+    def test_neighbours_past_deadline(self):
+        points = np.random.default_rng(2).random((50, 2))
+        self.assertIsNone(nearest_neighbours(points, 8, deadline=time.perf_counter() - 1))
+        self.assertEqual(nearest_neighbours(points, 8).shape, (50, 8))
+
+    def test_time_budget(self):
+        points = np.random.default_rng(3).random((20000, 2)) * 10
+        with mock.patch.dict(DrillOrder.defaults, {"time_budget": 0.2}):
+            started = time.perf_counter()
+            order, before, after = DrillOrder("optimized").order(points)
+            elapsed = time.perf_counter() - started
+        self.assertLess(after, before)
+        self.assertLess(elapsed, 2.0)
+
+
+class DrillTravelTestCase(unittest.TestCase):
+
+    def test_travel_before_is_file_order(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "board.drl")
+            with open(filename, "w") as f:
+                f.write(EXCELLON)
+            excellon = Excellon()
+            excellon.parse_file(filename)
+            excellon.create_geometry()
+
+        groups = excellon.drill_table.by_tool()
+        points = np.vstack([excellon.drill_table.xy[groups[tool]] for tool in sorted(groups)])
+        file_travel = travel(points, np.arange(len(points)))
+
+        for method in DrillOrder.methods:
+            job = CNCjob()
+            job.generate_from_excellon_by_tool(excellon, "all", drillorder=method)
+            before, after = job.drill_travel
+            self.assertAlmostEqual(before, file_travel)
+            self.assertLessEqual(after, before)
+
+
+if __name__ == '__main__':
+    unittest.main()
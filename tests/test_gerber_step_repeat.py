@@ -0,0 +1,65 @@
+import unittest
+
+from fcCamlib.gerber import Gerber
+
+HEADER = ["%FSLAX24Y24*%", "%MOIN*%", "%ADD10C,0.1000*%", "%ADD11R,0.3000X0.3000*%"]
+
+# A pad and a trace.
+BLOCK = ["G54D11*", "X0Y0D03*", "G54D10*", "G01*", "X0Y0D02*", "X5000Y0D01*"]
+
+# Clears the middle of the pad.
+CLEAR = ["%LPC*%", "G54D10*", "X0Y0D03*", "%LPD*%"]
+
+
+def parse(lines):
+    gerber = Gerber()
+    gerber.use_buffer_for_union = False
+    gerber.parse_lines(HEADER + lines + ["M02*"])
+    return gerber.solid_geometry
+
+
+def flattened(block, nx, ny, dx, dy):
+    """
+    The block repeated by hand, for comparison.
+    """
+    lines = []
+    for iy in range(ny):
+        for ix in range(nx):
+            for line in block:
+                if line.startswith("X"):
+                    x, rest = line[1:].split("Y")
+                    y, op = rest.split("D")
+                    line = "X%dY%dD%s" % (int(x) + ix * dx * 10000, int(y) + iy * dy * 10000, op)
+                lines.append(line)
+    return lines
+
+
+class StepRepeatTestCase(unittest.TestCase):
+
+    def assertSameArea(self, a, b):
+        self.assertAlmostEqual(a.area, b.area, places=4)
+        self.assertLess(a.symmetric_difference(b).area, 1e-4)
+
+    def check(self, block, nx, ny, dx, dy, extra=()):
+        sr = "%%SRX%dY%dI%.1fJ%.1f*%%" % (nx, ny, dx, dy)
+        repeated = parse([sr] + block + ["%SR*%"] + list(extra))
+        flat = parse(flattened(block, nx, ny, dx, dy) + list(extra))
+        self.assertSameArea(repeated, flat)
+        return repeated
+
+    def test_disjoint_copies(self):
+        geo = self.check(BLOCK, 3, 2, 1.0, 1.0)
+        self.assertEqual(len(geo.geoms), 6)
+
+    def test_overlapping_copies(self):
+        self.check(BLOCK, 3, 2, 0.4, 0.2)
+
+    def test_copies_overlapping_the_rest(self):
+        self.check(BLOCK, 2, 2, 1.0, 1.0, extra=["G54D10*", "X0Y0D02*", "X10000Y10000D01*"])
+
+    def test_clear_layers(self):
+        self.check(BLOCK + CLEAR, 2, 2, 0.4, 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
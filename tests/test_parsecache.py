@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from shapely.geometry import Point
+
+from fcCamlib.parsecache import ParseCache
+from fcCamlib.parsestats import ParseStats
+
+
+class Parsed:
+    cache_attrs = ["units"]
+
+    def __init__(self):
+        self.units = None
+        self.solid_geometry = []
+
+
+class LoadOrParseTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ParseCache(self.tmp.name)
+        self.parses = 0
+
+    def tearDown(self):
+        ParseStats.defaults["enabled"] = False
+        self.tmp.cleanup()
+
+    def open(self):
+        obj = Parsed()
+
+        def parse():
+            self.parses += 1
+            obj.units = "MM"
+            obj.solid_geometry = [Point(0, 0).buffer(1)]
+
+        cached = self.cache.load_or_parse("k", obj, parse)
+        self.assertEqual(obj.units, "MM")
+        self.assertEqual(len(obj.solid_geometry), 1)
+        return cached
+
+    def test_second_open_is_cached(self):
+        self.assertFalse(self.open())
+        self.assertTrue(os.path.exists(self.cache.entry_path("k")))
+        self.assertTrue(self.open())
+        self.assertEqual(self.parses, 1)
+
+    def test_parse_stats_bypass_cache(self):
+        self.open()
+        ParseStats.defaults["enabled"] = True
+        self.assertFalse(self.open())
+        self.assertEqual(self.parses, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
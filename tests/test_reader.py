@@ -0,0 +1,27 @@
+import unittest
+
+from fcCamlib.reader import gerber_statements, lines, split_lines
+
+
+class SplitLinesTestCase(unittest.TestCase):
+
+    def test_line_endings(self):
+        self.assertEqual(split_lines("a\nb\r\nc\rd"), ["a", "b", "c", "d"])
+        self.assertEqual(split_lines("a\n\nb\n"), ["a", "", "b"])
+        self.assertEqual(split_lines(""), [])
+
+    def test_other_separators_are_data(self):
+        text = "a\x85b\x0bc\x0cd\x1ce\x1df\x1eg"
+        self.assertEqual(split_lines(text + "\n"), [text])
+
+    def test_lines(self):
+        self.assertEqual(list(lines(b"G01*\r\nX1\x85Y2*\n")), ["G01*", "X1\x85Y2*"])
+
+    def test_gerber_statements(self):
+        buf = b"%FSLAX24Y24*%\nG04 a\x0cb*\nX0Y0D02*X1Y1D01*\n"
+        self.assertEqual(list(gerber_statements(buf)),
+                         ["%FSLAX24Y24*%", "G04 a\x0cb*", "X0Y0D02*", "X1Y1D01*"])
+
+
+if __name__ == '__main__':
+    unittest.main()